@@ -0,0 +1,418 @@
+"""
+Walk-forward backtesting
+Rolling-origin evaluation of the per-bin forecasters: at each of several
+cutoffs a model is fitted on the history up to that point and scored on
+what followed, hour by hour ahead. Bins are sharded across the training
+process pool; background jobs persist progress and per-bin results in
+backtest_jobs / backtest_results.
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.database_models import BacktestJob, BacktestResult, TrainingJobStatus
+from app.utils.database import SessionLocal
+from app.ml.fill_level_forecaster import (
+    ARIMA_AVAILABLE, ARIMA_ORDER, DIRECT_HORIZONS, FillLevelForecaster,
+    arima_forecast, arima_state, direct_targets, interpolate_horizons
+)
+from app.ml.forecast_engine import TARGET, recursive_forecast
+from app.ml.reading_loader import load_reading_frames
+from app.ml.training_jobs import MIN_READINGS, SHARD_SIZE, get_executor, own_job, reset_executor
+
+if ARIMA_AVAILABLE:
+    from statsmodels.tsa.arima.model import ARIMA
+
+BACKTEST_MODEL_TYPES = ['linear', 'tree', 'forest', 'arima']
+# Forecast origins per bin
+BACKTEST_FOLDS = int(os.getenv('BACKTEST_FOLDS', '8'))
+# Prepared rows the first origin is trained on
+MIN_TRAIN_ROWS = 48
+
+
+def fold_origins(hours: np.ndarray, horizons: List[int], folds: int,
+                 min_train_rows: int = MIN_TRAIN_ROWS) -> Tuple[np.ndarray, List[int]]:
+    """
+    Rows to forecast from, spread evenly over the history
+
+    Every origin has at least min_train_rows rows up to and including it and
+    is followed by readings beyond its longest horizon, so all horizons are
+    scored on the same origins. Horizons too long for any origin are dropped.
+
+    Args:
+        hours: Row times in hours since the first row
+        horizons: Hours ahead to score, ascending
+        folds: Maximum origins
+
+    Returns:
+        (origin row indices, horizons kept)
+    """
+    horizons = list(horizons)
+    rows = np.arange(len(hours))
+    while horizons:
+        eligible = rows[(rows >= min_train_rows - 1) & (hours + horizons[-1] <= hours[-1])]
+        if len(eligible):
+            picks = np.unique(np.linspace(0, len(eligible) - 1, min(folds, len(eligible))).round().astype(int))
+            return eligible[picks], horizons
+        horizons.pop()
+    return rows[:0], []
+
+
+def horizon_metrics(truth: np.ndarray, forecasts: np.ndarray, horizons: List[int]) -> Dict:
+    """
+    MAE and RMSE per horizon over the folds that produced a forecast
+
+    Args:
+        truth: (folds, horizons) fill levels that followed each origin
+        forecasts: (folds, horizons) forecasts, NaN for failed folds
+    """
+    errors = forecasts - truth
+    scored = ~np.isnan(errors)
+    if not scored.any():
+        return {'error': 'No fold produced a forecast'}
+
+    per_horizon = {}
+    for i, h in enumerate(horizons):
+        e = errors[scored[:, i], i]
+        if len(e):
+            per_horizon[h] = {'mae': float(np.mean(np.abs(e))), 'rmse': float(np.sqrt(np.mean(e ** 2))), 'n': len(e)}
+    e = errors[scored]
+    return {
+        'mae': float(np.mean(np.abs(e))),
+        'rmse': float(np.sqrt(np.mean(e ** 2))),
+        'folds': int(scored.all(axis=1).sum()),
+        'horizons': per_horizon
+    }
+
+
+def _fold_forecasts(model_type: str, strategy: str, params: Optional[Dict], df: pd.DataFrame,
+                    X: pd.DataFrame, hours: np.ndarray, fill: np.ndarray, origins: np.ndarray,
+                    bin_info: Dict, steps: int) -> np.ndarray:
+    """(folds, steps) hourly forecasts from models fitted on the rows up to each origin"""
+    forecasts = np.full((len(origins), steps), np.nan)
+    for i, origin in enumerate(origins):
+        seen = slice(0, origin + 1)
+        try:
+            if model_type == 'arima':
+                fitted = ARIMA(fill[seen], order=ARIMA_ORDER).fit()
+                forecasts[i] = arima_forecast(arima_state(fitted), fill[seen], steps)
+            elif strategy == 'direct':
+                # Targets only from readings already seen at the origin
+                horizons, usable, targets = direct_targets(hours[seen], fill[seen])
+                if not horizons or np.count_nonzero(usable) < 5:
+                    continue
+                model = FillLevelForecaster._new_model(model_type, params)
+                model.fit(X.iloc[seen][usable], targets if len(horizons) > 1 else targets[:, 0])
+                at_horizons = np.ravel(model.predict(X.iloc[origin:origin + 1]))
+                forecasts[i] = interpolate_horizons(horizons, fill[origin], at_horizons, steps)
+            else:
+                model = FillLevelForecaster._new_model(model_type, params).fit(X.iloc[seen], fill[seen])
+                forecasts[i] = recursive_forecast(model, list(X.columns), df.iloc[seen], bin_info, steps)
+        except (ValueError, np.linalg.LinAlgError):
+            # Scored on the remaining folds
+            continue
+    return forecasts
+
+
+def backtest_bin(bin_id: str, readings, bin_info: Dict, model_types: List[str],
+                 strategy: str = 'recursive', horizons: Optional[List[int]] = None,
+                 folds: int = BACKTEST_FOLDS, resample: Optional[bool] = None) -> Dict:
+    """
+    Rolling-origin backtest of one bin's models
+
+    Features are prepared once over the whole history and sliced at each
+    origin; lag, rolling and rate features only look back, so a slice holds
+    what prediction would have built at that time (up to reading cleaning,
+    which smooths over neighbouring readings, as for train_models' holdout).
+    Models use the bin's searched hyperparameters, if any. Nothing is
+    saved: the bin's trained models are left untouched.
+
+    Args:
+        bin_id: Bin identifier
+        readings: List of BinReading objects, or a reading DataFrame (reading_loader)
+        bin_info: Dictionary with bin metadata
+        model_types: Model types to evaluate (BACKTEST_MODEL_TYPES)
+        strategy: recursive or direct (ARIMA is always recursive)
+        horizons: Hours ahead to score (default DIRECT_HORIZONS)
+        folds: Maximum forecast origins
+        resample: Resample readings onto the hourly grid (None keeps the
+            setting saved with the first of model_types)
+
+    Returns:
+        Origins and horizons used, and per model type its MAE/RMSE overall
+        and per horizon (or {'error': ...})
+    """
+    forecaster = FillLevelForecaster(bin_id)
+    forecaster._set_preprocessing(resample, FillLevelForecaster._model_key(model_types[0], strategy))
+    forecaster._load_hyperparameters()
+    df = forecaster.prepare_data(readings, bin_info)
+    if len(df) < MIN_TRAIN_ROWS + 1:
+        return {'error': f'Insufficient data for backtesting (need {MIN_TRAIN_ROWS + 1} prepared rows)'}
+
+    hours = (df['timestamp'] - df['timestamp'].iloc[0]).dt.total_seconds().to_numpy() / 3600
+    fill = df[TARGET].to_numpy(dtype=float)
+    origins, horizons = fold_origins(hours, sorted(set(horizons or DIRECT_HORIZONS)), folds)
+    if not len(origins):
+        return {'error': 'Insufficient history after the first origin for any horizon'}
+
+    X = df[[col for col in df.columns if col not in [TARGET, 'timestamp']]]
+    truth = np.column_stack([np.interp(hours[origins] + h, hours, fill) for h in horizons])
+    columns = [h - 1 for h in horizons]
+
+    results = {}
+    for model_type in model_types:
+        if model_type not in BACKTEST_MODEL_TYPES:
+            results[model_type] = {'error': f'Unknown model type {model_type}'}
+        elif model_type == 'arima' and not ARIMA_AVAILABLE:
+            results[model_type] = {'error': 'ARIMA requires statsmodels'}
+        else:
+            key = f'{model_type}_direct' if strategy == 'direct' and model_type != 'arima' else model_type
+            forecasts = _fold_forecasts(
+                model_type, strategy, forecaster.tuned_params(key),
+                df, X, hours, fill, origins, bin_info, horizons[-1]
+            )
+            results[model_type] = horizon_metrics(truth, forecasts[:, columns], horizons)
+
+    return {
+        'strategy': strategy,
+        'folds': len(origins),
+        'first_origin': df['timestamp'].iloc[origins[0]].isoformat(),
+        'last_origin': df['timestamp'].iloc[origins[-1]].isoformat(),
+        'horizons': horizons,
+        'models': results
+    }
+
+
+def backtest_shard(bin_infos: Dict[str, Dict], model_types: List[str], strategy: str,
+                   horizons: List[int], folds: int, resample: Optional[bool] = None) -> Dict[str, Dict]:
+    """
+    Backtest a shard of bins (runs in a worker process)
+
+    Returns:
+        backtest_bin results (or {'error': ...}) keyed by bin_id
+    """
+    db = SessionLocal()
+    try:
+        readings_by_bin = load_reading_frames(db, list(bin_infos))
+    finally:
+        db.close()
+
+    results = {}
+    for bin_id, bin_info in bin_infos.items():
+        readings = readings_by_bin.get(bin_id, ())
+        if len(readings) < MIN_READINGS:
+            results[bin_id] = {'error': f'Insufficient data (need at least {MIN_READINGS} readings)'}
+            continue
+        try:
+            results[bin_id] = backtest_bin(
+                bin_id, readings, bin_info, model_types, strategy, horizons, folds, resample
+            )
+        except Exception as e:
+            results[bin_id] = {'error': str(e)}
+    return results
+
+
+def run_backtest(bin_infos: Dict[str, Dict], model_types: List[str], strategy: str = 'recursive',
+                 horizons: Optional[List[int]] = None, folds: int = BACKTEST_FOLDS,
+                 resample: Optional[bool] = None) -> Iterator[Dict[str, Dict]]:
+    """
+    Fan shards of bins out to the training process pool
+
+    Yields:
+        Each shard's per-bin results as it completes
+    """
+    items = list(bin_infos.items())
+    shards = [dict(items[i:i + SHARD_SIZE]) for i in range(0, len(items), SHARD_SIZE)]
+    executor = get_executor()
+    futures = {
+        executor.submit(backtest_shard, shard, model_types, strategy, horizons, folds, resample): shard
+        for shard in shards
+    }
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except BrokenProcessPool:
+            reset_executor()
+            yield {bin_id: {'error': 'Backtest worker crashed'} for bin_id in futures[future]}
+        except Exception as e:
+            yield {bin_id: {'error': str(e)} for bin_id in futures[future]}
+
+
+def summarize(results: Iterable[Dict]) -> Dict:
+    """
+    Per-horizon errors pooled over bins, weighting each bin by its folds
+
+    Args:
+        results: backtest_bin results
+
+    Returns:
+        {'models': {model_type: {horizon: {'mae', 'rmse', 'n', 'bins'}}},
+        'best_model': {horizon: lowest-MAE model type}}
+    """
+    pooled = {}
+    for result in results:
+        for model_type, metrics in result.get('models', {}).items():
+            for h, m in metrics.get('horizons', {}).items():
+                acc = pooled.setdefault(model_type, {}).setdefault(int(h), [0.0, 0.0, 0, 0])
+                acc[0] += m['mae'] * m['n']
+                acc[1] += m['rmse'] ** 2 * m['n']
+                acc[2] += m['n']
+                acc[3] += 1
+
+    models = {
+        model_type: {
+            h: {'mae': round(abs_sum / n, 3), 'rmse': round(float(np.sqrt(sq_sum / n)), 3), 'n': n, 'bins': bins}
+            for h, (abs_sum, sq_sum, n, bins) in sorted(by_horizon.items())
+        }
+        for model_type, by_horizon in pooled.items()
+    }
+    horizons = sorted({h for by_horizon in models.values() for h in by_horizon})
+    best_model = {
+        h: min((m for m in models if h in models[m]), key=lambda m: models[m][h]['mae'])
+        for h in horizons
+    }
+    return {'models': models, 'best_model': best_model}
+
+
+def format_table(summary: Dict) -> str:
+    """Per-horizon MAE / RMSE table of a summary, one column pair per model type"""
+    models = list(summary['models'])
+    horizons = sorted(summary['best_model'], key=int)
+    lines = [f"{'hours':>6} " + ' '.join(f"{m + ' MAE':>12} {m + ' RMSE':>12}" for m in models) + f" {'best':>8}"]
+    for h in horizons:
+        cells = []
+        for m in models:
+            metrics = summary['models'][m].get(h)
+            cells.append(f"{metrics['mae']:>12.2f} {metrics['rmse']:>12.2f}" if metrics else f"{'-':>12} {'-':>12}")
+        lines.append(f"{h:>6} " + ' '.join(cells) + f" {summary['best_model'][h]:>8}")
+    return '\n'.join(lines)
+
+
+def submit_backtest_job(db: Session, bin_infos: Dict[str, Dict], model_types: List[str],
+                        strategy: str = 'recursive', horizons: Optional[List[int]] = None,
+                        folds: int = BACKTEST_FOLDS, resample: Optional[bool] = None) -> BacktestJob:
+    """
+    Create a backtest job and start it in the background
+
+    Args:
+        db: Database session
+        bin_infos: Bin metadata dictionaries keyed by bin_id
+        model_types: Model types to evaluate
+        strategy: recursive or direct
+        horizons: Hours ahead to score (default DIRECT_HORIZONS)
+        folds: Maximum forecast origins per bin
+        resample: Resample readings onto the hourly grid (None: the setting saved with each bin's first model type)
+
+    Returns:
+        The queued BacktestJob
+    """
+    horizons = sorted(set(horizons or DIRECT_HORIZONS))
+    job = BacktestJob(
+        job_id=uuid.uuid4().hex,
+        status=TrainingJobStatus.QUEUED,
+        model_types=list(model_types),
+        strategy=strategy,
+        horizons=horizons,
+        folds=folds,
+        total_bins=len(bin_infos),
+        completed_bins=0,
+        failed_bins=0
+    )
+    own_job(job)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    threading.Thread(
+        target=_run_job, args=(job.job_id, bin_infos, list(model_types), strategy, horizons, folds, resample),
+        daemon=True
+    ).start()
+    return job
+
+
+def _run_job(job_id: str, bin_infos: Dict[str, Dict], model_types: List[str], strategy: str,
+             horizons: List[int], folds: int, resample: Optional[bool]):
+    """Coordinator thread: record shard results as they finish, then the pooled summary"""
+    db = SessionLocal()
+    try:
+        job = get_backtest_job(db, job_id)
+        job.status = TrainingJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        completed = []
+        for results in run_backtest(bin_infos, model_types, strategy, horizons, folds, resample):
+            completed.extend(r for r in results.values() if 'error' not in r)
+            _record_results(db, job, results)
+
+        job.summary = summarize(completed)
+        job.status = TrainingJobStatus.COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job = get_backtest_job(db, job_id)
+        if job is not None:
+            job.status = TrainingJobStatus.FAILED
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+
+def _record_results(db: Session, job: BacktestJob, results: Dict[str, Dict]):
+    """Persist one shard's per-bin results and advance the job's progress"""
+    now = datetime.utcnow()
+    rows = []
+    for bin_id, metrics in results.items():
+        error = metrics.get('error')
+        rows.append({
+            'job_id': job.job_id,
+            'bin_id': bin_id,
+            'metrics': None if error else metrics,
+            'error': error,
+            'evaluated_at': now
+        })
+    db.execute(insert(BacktestResult), rows)
+
+    failed = sum(1 for row in rows if row['error'])
+    job.completed_bins += len(rows) - failed
+    job.failed_bins += failed
+    db.commit()
+
+
+def backtest_job_status(job: BacktestJob) -> Dict:
+    """Status, progress and (once completed) pooled per-horizon errors of a backtest job"""
+    done = job.completed_bins + job.failed_bins
+    return {
+        'job_id': job.job_id,
+        'status': job.status.value if job.status else None,
+        'model_types': job.model_types,
+        'strategy': job.strategy,
+        'horizons': job.horizons,
+        'folds': job.folds,
+        'total_bins': job.total_bins,
+        'completed_bins': job.completed_bins,
+        'failed_bins': job.failed_bins,
+        'progress_percent': round(100 * done / job.total_bins, 1) if job.total_bins else 100.0,
+        'summary': job.summary,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def get_backtest_job(db: Session, job_id: str) -> Optional[BacktestJob]:
+    return db.query(BacktestJob).filter(BacktestJob.job_id == job_id).first()
@@ -0,0 +1,280 @@
+"""
+Fill-level forecasts for many bins in one pass
+Loads recent reading windows in one query, cleans them set-wise and steps
+every bin through the ring-buffer engine together
+"""
+
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.database_models import BinReading
+from app.ml.fill_level_forecaster import FillLevelForecaster, arima_forecast, forecast_result, interpolate_horizons
+from app.ml.forecast_engine import EXOGENOUS_COLUMNS, LAGS, TARGET, ForecastBatch
+from app.ml.global_forecaster import GlobalForecaster
+from app.ml.reading_loader import load_reading_frame
+
+# Readings per bin: enough that CONTEXT_ROWS (100) survive cleaning and the lag/rate passes
+BATCH_WINDOW = 150
+MIN_READINGS = 20
+NUMERIC_COLUMNS = [TARGET] + EXOGENOUS_COLUMNS
+
+
+def load_forecast_windows(db: Session, bin_ids: List[str], window: int = BATCH_WINDOW) -> pd.DataFrame:
+    """
+    Fetch the latest `window` readings of each bin in one query
+
+    Returns:
+        DataFrame of bin_id, timestamp and the numeric reading columns,
+        grouped by bin (in bin_ids order) and sorted oldest to newest
+    """
+    rn = func.row_number().over(
+        partition_by=BinReading.bin_id,
+        order_by=(BinReading.timestamp.desc(), BinReading.id.desc())
+    ).label('rn')
+    ranked = select(
+        BinReading.bin_id, BinReading.timestamp, BinReading.fill_level_percent,
+        BinReading.weight_kg, BinReading.temperature_c, BinReading.battery_percent, rn
+    ).where(BinReading.bin_id.in_(bin_ids)).subquery()
+
+    query = select(
+        ranked.c.bin_id, ranked.c.timestamp, ranked.c.fill_level_percent,
+        ranked.c.weight_kg, ranked.c.temperature_c, ranked.c.battery_percent
+    ).where(ranked.c.rn <= window).order_by(ranked.c.bin_id, ranked.c.rn.desc())
+    # Core execution: plain tuples without ORM row processing
+    rows = db.connection().execute(query).all()
+
+    frame = pd.DataFrame(rows, columns=['bin_id', 'timestamp'] + NUMERIC_COLUMNS)
+    frame[NUMERIC_COLUMNS] = frame[NUMERIC_COLUMNS].astype(float)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+
+    # Stable reorder into the caller's bin order
+    order = {bin_id: i for i, bin_id in enumerate(bin_ids)}
+    frame['_order'] = frame['bin_id'].map(order)
+    return frame.sort_values('_order', kind='stable').drop(columns='_order').reset_index(drop=True)
+
+
+def clean_windows(frame: pd.DataFrame, threshold: float = 3.0, window: int = 3) -> pd.DataFrame:
+    """
+    DataPreprocessor.clean_readings applied to every bin's window at once
+
+    Forward fill (limit 2) and interpolation of gaps, IQR outlier removal
+    and centered smoothing of fill level, each within its own bin.
+    """
+    if frame.empty:
+        return frame
+
+    frame = frame.copy()
+    frame[NUMERIC_COLUMNS] = frame.groupby('bin_id', sort=False)[NUMERIC_COLUMNS].ffill(limit=2)
+
+    # Gaps longer than the forward-fill limit are rare; interpolate only those bins
+    gappy = frame.loc[frame[NUMERIC_COLUMNS].isna().any(axis=1), 'bin_id'].unique()
+    if len(gappy):
+        mask = frame['bin_id'].isin(gappy)
+        frame.loc[mask, NUMERIC_COLUMNS] = frame[mask].groupby('bin_id', sort=False)[NUMERIC_COLUMNS].transform(
+            lambda col: col.interpolate(method='linear', limit_direction='both')
+        )
+    frame = frame.dropna()
+
+    groups = frame.groupby('bin_id', sort=False)[TARGET]
+    q1 = frame['bin_id'].map(groups.quantile(0.25))
+    q3 = frame['bin_id'].map(groups.quantile(0.75))
+    iqr = q3 - q1
+    fill = frame[TARGET]
+    keep = (
+        (groups.transform('size') < 4) |
+        ((fill >= q1 - threshold * iqr) & (fill <= q3 + threshold * iqr)) |
+        (fill == 0) | (fill == 100)
+    )
+    frame = frame[keep]
+
+    groups = frame.groupby('bin_id', sort=False)[TARGET]
+    smoothed = groups.rolling(window=window, center=True, min_periods=1).mean()
+    smoothed = smoothed.reset_index(level=0, drop=True)
+    long_enough = groups.transform('size') >= window
+    frame[TARGET] = np.where(long_enough, smoothed.reindex(frame.index), frame[TARGET])
+
+    return frame
+
+
+def forecast_bins(db: Session, bin_infos: Dict[str, Dict], hours_ahead: int = 24,
+                  model_type: str = 'forest', strategy: str = 'recursive',
+                  window: int = BATCH_WINDOW) -> List[Dict]:
+    """
+    Forecast many bins with one reading query and one model call per step
+    per distinct model
+
+    Bins without a trained model, or with too little clean history, are
+    skipped, as the per-bin endpoint would fail for them. ARIMA bins are
+    forecast one by one from their saved parameters.
+
+    Args:
+        db: Database session
+        bin_infos: Bin metadata dictionaries keyed by bin_id
+        hours_ahead: Hours to predict ahead
+        model_type: Model to use (linear, tree, forest, or global for the
+            pooled model with its per-bin fallbacks)
+        strategy: recursive or direct (per-bin regression models only)
+        window: Readings per bin to load (for bins whose models use the
+            hourly grid, loaded per bin: their recorded lookback, or hours
+            of history for older models)
+
+    Returns:
+        Prediction dictionaries in the format of FillLevelForecaster.predict
+    """
+    model_key = f'{model_type}_direct' if strategy == 'direct' and model_type != 'arima' else model_type
+    global_model = None
+    if model_type == 'global':
+        global_model = GlobalForecaster.load()
+        if global_model is None or strategy == 'direct':
+            return []
+
+    frame = load_forecast_windows(db, list(bin_infos), window)
+    counts = frame.groupby('bin_id', sort=False).size()
+    frame = clean_windows(frame[frame['bin_id'].map(counts) >= MIN_READINGS])
+
+    batch = ForecastBatch(hours_ahead)
+    queued = []
+
+    bin_ids = frame['bin_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, bin_ids[1:] != bin_ids[:-1]]) if len(frame) else []
+    ends = np.r_[starts[1:], len(frame)] if len(frame) else []
+    fills = frame[TARGET].to_numpy()
+    timestamps = frame['timestamp']
+    times = timestamps.to_numpy()
+    exogenous = frame[EXOGENOUS_COLUMNS].to_numpy()
+
+    for start, end in zip(starts, ends):
+        bin_id = bin_ids[start]
+        bin_info = bin_infos[bin_id]
+        # prepare_data drops rows carrying a missing metadata value
+        if bin_info['capacity_liters'] is None or bin_info['ward'] is None:
+            continue
+        # The lag pass drops max(LAGS) rows and the rate pass one more
+        history_rows = (end - start) - max(LAGS) - 1
+        if history_rows < 1:
+            continue
+
+        latest = dict(zip(EXOGENOUS_COLUMNS, exogenous[end - 1]))
+        current = (fills[end - 1], timestamps.iloc[end - 1])
+
+        key = global_model.fallback_bins.get(bin_id) if global_model is not None else model_key
+        forecaster = None
+        if key is not None:
+            forecaster = FillLevelForecaster(bin_id)
+            forecaster._load_models([key])
+            if key not in forecaster.models:
+                if global_model is None:
+                    continue
+                forecaster = None
+
+        if forecaster is None:
+            # Every bin on the pooled model shares one predict call per step
+            try:
+                global_model.add_to_batch(
+                    batch, fills[start:end], history_rows, times[start:end], latest, bin_info
+                )
+            except ValueError:
+                continue
+            queued.append((bin_id, None, 'global') + current + (None,))
+            continue
+
+        bin_fills, last_time, prev_time = fills[start:end], timestamps.iloc[end - 1], timestamps.iloc[end - 2]
+        if forecaster.preprocessing.get('resample'):
+            # Models on the hourly grid load the lookback recorded at training,
+            # or a window in hours rather than readings
+            lookback = forecaster.lookback(key)
+            if lookback is not None:
+                readings = load_reading_frame(db, bin_id, limit=lookback)
+            else:
+                readings = load_reading_frame(db, bin_id, since=last_time - timedelta(hours=window))
+            prepared = forecaster.prepare_data(readings, bin_info, bridge_gaps=True)
+            if len(prepared) < 2:
+                continue
+            bin_fills = prepared[TARGET].to_numpy(dtype=float)
+            history_rows = len(prepared)
+            last_time, prev_time = prepared['timestamp'].iloc[-1], prepared['timestamp'].iloc[-2]
+            latest = prepared[EXOGENOUS_COLUMNS].iloc[-1].to_dict()
+            current = (bin_fills[-1], last_time)
+
+        if key == 'arima':
+            # ARIMA filters its own recent history: forecast now, outside the batch
+            history = bin_fills[len(bin_fills) - history_rows:]
+            queued.append((bin_id, forecaster, 'arima') + current +
+                          (arima_forecast(forecaster.models[key], history, hours_ahead),))
+            continue
+
+        try:
+            batch.add(
+                forecaster.models[key], forecaster.feature_columns,
+                fills=bin_fills,
+                history_rows=history_rows,
+                last_time=last_time,
+                exogenous=latest,
+                bin_info=bin_info,
+                prev_time=prev_time
+            )
+        except ValueError:
+            continue
+        queued.append((bin_id, forecaster, key if global_model is not None else model_type) + current + (None,))
+
+    # Queued bins without a forecast yet are the batch's rows, in order
+    batched = [q[1] for q in queued if q[5] is None]
+    if not batched:
+        forecasts = []
+    elif strategy == 'direct':
+        forecasts = _direct_forecasts(batch, batched, model_key, hours_ahead)
+    else:
+        forecasts = batch.recursive()
+    forecasts = iter(forecasts)
+
+    results = []
+    for bin_id, _, used_type, current_fill, current_time, forecast in queued:
+        if forecast is None:
+            forecast = next(forecasts)
+            # A direct model whose forecast failed: skip the bin, as for other unusable bins
+            if forecast is None:
+                continue
+        results.append(forecast_result(
+            bin_id, used_type, 'recursive' if used_type == 'arima' else strategy, current_fill, current_time,
+            forecast
+        ))
+    return results
+
+
+def _direct_forecasts(batch: ForecastBatch, forecasters: List[FillLevelForecaster],
+                      model_key: str, hours_ahead: int) -> List[np.ndarray]:
+    """
+    One predict call per distinct direct model on the bins' latest features
+
+    Returns:
+        Hourly forecasts in the order of forecasters; None for a bin whose
+        model could not be interpolated onto its horizons
+    """
+    columns, X = batch.latest_features()
+    index = {col: i for i, col in enumerate(columns)}
+
+    groups = OrderedDict()
+    for i, forecaster in enumerate(forecasters):
+        groups.setdefault(id(forecaster.models[model_key]), []).append(i)
+
+    forecasts = [None] * len(forecasters)
+    for rows in groups.values():
+        forecaster = forecasters[rows[0]]
+        cols = [index[col] for col in forecaster.feature_columns]
+        features = pd.DataFrame(X[np.ix_(rows, cols)], columns=forecaster.feature_columns)
+        at_horizons = np.asarray(forecaster.models[model_key].predict(features))
+        at_horizons = at_horizons.reshape(len(rows), -1)
+        for row, values in zip(rows, at_horizons):
+            try:
+                forecasts[row] = interpolate_horizons(
+                    forecasters[row].direct_horizons[model_key], batch.bins[row]['fills'][-1], values, hours_ahead
+                )
+            except (KeyError, ValueError):
+                continue
+    return forecasts
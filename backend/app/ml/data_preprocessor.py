@@ -3,12 +3,73 @@ Data Preprocessing Module for Waste Bin Fill-Level Forecasting
 Handles data cleaning, feature engineering, and preparation for ML models
 """
 
+import os
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.model_selection import train_test_split
+from pandas.tseries.frequencies import to_offset
+
+# Reading fields used for forecasting
+READING_COLUMNS = ['timestamp', 'fill_level_percent', 'weight_kg', 'temperature_c', 'battery_percent']
+
+# Resampling grid (the recursive forecaster steps one hour at a time) and the
+# longest gap between readings that is interpolated onto it
+RESAMPLE_FREQ = 'h'
+RESAMPLE_MAX_GAP_HOURS = 6
+RESAMPLE_CACHE_MAX_ENTRIES = int(os.getenv('RESAMPLE_CACHE_MAX_ENTRIES', '1024'))
+
+
+def reading_signature(readings) -> Optional[Tuple]:
+    """
+    Cheap identity of a bin's reading history: count, first and last
+    timestamp and the last fill level
+
+    Readings are appended, not edited, so a new reading changes it.
+    """
+    if len(readings) == 0:
+        return None
+    if isinstance(readings, pd.DataFrame):
+        first, last = readings.iloc[0], readings.iloc[-1]
+        return len(readings), first['timestamp'], last['timestamp'], last['fill_level_percent']
+    first, last = readings[0], readings[-1]
+    return len(readings), first.timestamp, last.timestamp, last.fill_level_percent
+
+
+class ResampledReadingsCache:
+    """
+    LRU cache of each bin's cleaned, resampled readings, keyed by bin and
+    reading_signature, so repeated forecasts over unchanged history skip
+    cleaning and resampling
+    """
+    
+    def __init__(self, max_entries: int = RESAMPLE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # bin_id -> (signature, frame)
+    
+    def get(self, bin_id: str, signature: Tuple) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(bin_id)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(bin_id)
+            return entry[1].copy()
+    
+    def put(self, bin_id: str, signature: Tuple, frame: pd.DataFrame) -> None:
+        with self._lock:
+            self._entries[bin_id] = (signature, frame.copy())
+            self._entries.move_to_end(bin_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+resampled_readings_cache = ResampledReadingsCache()
 
 
 class DataPreprocessor:
@@ -17,29 +78,26 @@ class DataPreprocessor:
     def __init__(self):
         self.scaler = StandardScaler()
         
-    def clean_readings(self, readings: List) -> pd.DataFrame:
+    def clean_readings(self, readings) -> pd.DataFrame:
         """
         Convert readings to DataFrame and clean data
         
         Args:
-            readings: List of BinReading objects
+            readings: DataFrame with READING_COLUMNS (see reading_loader),
+                or a list of BinReading objects or rows with those attributes
             
         Returns:
             Cleaned DataFrame
         """
         # Convert to DataFrame
-        data = []
-        for reading in readings:
-            data.append({
-                'timestamp': reading.timestamp,
-                'fill_level_percent': reading.fill_level_percent,
-                'weight_kg': reading.weight_kg,
-                'temperature_c': reading.temperature_c,
-                'battery_percent': reading.battery_percent
+        if isinstance(readings, pd.DataFrame):
+            df = readings.reindex(columns=READING_COLUMNS)
+        else:
+            df = pd.DataFrame({
+                col: [getattr(reading, col) for reading in readings]
+                for col in READING_COLUMNS
             })
         
-        df = pd.DataFrame(data)
-        
         if df.empty:
             return df
             
@@ -57,6 +115,44 @@ class DataPreprocessor:
         
         return df
     
+    def resample(self, df: pd.DataFrame, freq: str = RESAMPLE_FREQ,
+                 max_gap_hours: float = RESAMPLE_MAX_GAP_HOURS) -> pd.DataFrame:
+        """
+        Align cleaned readings onto a fixed-frequency grid
+        
+        Each grid point takes the latest reading in its interval, so bursty
+        feeds shrink to one row per interval and lag/rolling features become
+        offsets in time. Gaps of up to max_gap_hours between readings are
+        interpolated in time; grid points inside longer gaps are left NaN,
+        so the rows whose lags would span such a gap are dropped by the lag
+        pass instead.
+        
+        Args:
+            df: Cleaned readings (clean_readings)
+            freq: Grid step as a pandas frequency string
+            max_gap_hours: Longest gap between readings to fill
+            
+        Returns:
+            DataFrame with one row per grid point from the first reading's
+            interval to the last one's
+        """
+        if df.empty:
+            return df
+        
+        grid = df.set_index('timestamp').resample(freq).last()
+        
+        # Cleaned readings carry no NaN, so a grid point is either empty or complete
+        missing = grid.isna().any(axis=1)
+        if missing.any():
+            step_hours = pd.Timedelta(to_offset(freq)) / pd.Timedelta(hours=1)
+            gap_steps = missing.groupby((~missing).cumsum()).transform('sum')
+            fillable = missing & ((gap_steps + 1) * step_hours <= max_gap_hours)
+            if fillable.any():
+                interpolated = grid.interpolate(method='time', limit_area='inside')
+                grid.loc[fillable] = interpolated.loc[fillable]
+        
+        return grid.reset_index()
+    
     def _handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
         """Handle missing values using forward fill and interpolation"""
         # Forward fill for small gaps
@@ -238,15 +334,14 @@ class FeatureEngineer:
         return df
     
     @staticmethod
-    def add_bin_metadata(df: pd.DataFrame, bin_info: Dict) -> pd.DataFrame:
+    def bin_metadata_features(bin_info: Dict) -> Dict:
         """
-        Add bin metadata as features
+        Bin metadata encoded as feature values
         
         Args:
-            df: DataFrame with readings
             bin_info: Dictionary with bin metadata (type, zone, capacity, etc.)
         """
-        df = df.copy()
+        features = {}
         
         # Add categorical features
         if 'bin_type' in bin_info:
@@ -257,25 +352,40 @@ class FeatureEngineer:
                 'public_space': [0, 0, 1]
             }
             bin_type_encoded = bin_type_map.get(bin_info['bin_type'], [0, 0, 0])
-            df['bin_type_residential'] = bin_type_encoded[0]
-            df['bin_type_commercial'] = bin_type_encoded[1]
-            df['bin_type_public'] = bin_type_encoded[2]
+            features['bin_type_residential'] = bin_type_encoded[0]
+            features['bin_type_commercial'] = bin_type_encoded[1]
+            features['bin_type_public'] = bin_type_encoded[2]
         
         # Add numeric features
         if 'capacity_liters' in bin_info:
-            df['capacity_liters'] = bin_info['capacity_liters']
+            features['capacity_liters'] = bin_info['capacity_liters']
         
         if 'ward' in bin_info:
-            df['ward'] = bin_info['ward']
+            features['ward'] = bin_info['ward']
         
         # Add zone encoding
         if 'zone' in bin_info:
             zone_map = {'North': 1, 'South': 2, 'East': 3, 'West': 4, 'Central': 5}
-            df['zone_encoded'] = zone_map.get(bin_info['zone'], 0)
+            features['zone_encoded'] = zone_map.get(bin_info['zone'], 0)
+        
+        return features
+    
+    @staticmethod
+    def add_bin_metadata(df: pd.DataFrame, bin_info: Dict) -> pd.DataFrame:
+        """
+        Add bin metadata as features
+        
+        Args:
+            df: DataFrame with readings
+            bin_info: Dictionary with bin metadata (type, zone, capacity, etc.)
+        """
+        df = df.copy()
+        
+        for col, value in FeatureEngineer.bin_metadata_features(bin_info).items():
+            df[col] = value
         
         return df
 
-
 def create_train_test_split(df: pd.DataFrame, target_col: str = 'fill_level_percent',
                             test_size: float = 0.2, temporal: bool = True) -> Tuple:
     """
@@ -20,7 +20,164 @@ try:
 except ImportError:
     ARIMA_AVAILABLE = False
 
-from app.ml.data_preprocessor import DataPreprocessor, FeatureEngineer, create_train_test_split
+from app.ml.data_preprocessor import (
+    DataPreprocessor, FeatureEngineer, RESAMPLE_FREQ, RESAMPLE_MAX_GAP_HOURS,
+    create_train_test_split, reading_signature, resampled_readings_cache
+)
+from app.ml.forecast_engine import CONTEXT_ROWS, LAGS, RING_SIZE, recursive_forecast
+from app.ml.flat_forest import flatten_model
+from app.ml.hyperparameter_search import TUNABLE_MODEL_TYPES, sample_candidates, search
+from app.ml.model_registry import dump_artifact, model_registry
+
+# Where trained models are saved; overridable for scratch runs and benchmarks
+MODEL_DIR = os.getenv('FORECAST_MODEL_DIR', os.path.join(os.path.dirname(__file__), 'trained_models'))
+
+# Hours ahead fitted by the direct strategy; hourly values in between are interpolated
+DIRECT_HORIZONS = [1, 6, 12, 24, 48, 168]
+STRATEGIES = ['recursive', 'direct']
+# Per-bin model types train_models knows
+MODEL_TYPES = ['linear', 'tree', 'forest', 'arima']
+
+ARIMA_ORDER = (2, 1, 2)
+
+# Leading rows prepare_data drops: the lag pass max(LAGS), the rate pass one more
+WARMUP_ROWS = max(LAGS) + 1
+# Headroom on the recorded lookback for readings cleaning drops and for feeds
+# that report more often than during training
+LOOKBACK_MARGIN = 1.5
+
+# Save tree and forest models as memory-mappable FlatForest arrays (flat_forest)
+FLAT_TREE_MODELS = os.getenv('FORECAST_FLAT_TREE_MODELS', '1') == '1'
+
+# Threads per random forest fit; training pool workers set this to 1 so that
+# one process per core does not oversubscribe the machine
+MODEL_N_JOBS = -1
+
+
+def interpolate_horizons(horizons: List[int], current_fill: float, at_horizons: np.ndarray,
+                         hours_ahead: int) -> np.ndarray:
+    """
+    Hourly values from direct-model predictions at a few horizons, linear
+    from the current fill level and held flat past the last horizon
+    """
+    return np.interp(
+        np.arange(1, hours_ahead + 1),
+        [0] + list(horizons),
+        np.concatenate([[current_fill], np.clip(at_horizons, 0, 100)])
+    )
+
+
+def model_outputs(model) -> int:
+    """Values a fitted model predicts per row (one per horizon for direct models)"""
+    if hasattr(model, 'n_outputs_'):
+        return model.n_outputs_
+    coef = getattr(model, 'coef_', None)
+    return 1 if coef is None or np.ndim(coef) == 1 else np.shape(coef)[0]
+
+
+def arima_state(fitted) -> Dict:
+    """
+    Compact form of a fitted ARIMA: its order and estimated parameters
+
+    The statsmodels results object also keeps the training series and every
+    filter output (megabytes per bin); the parameters alone define the model.
+    """
+    return {
+        'order': tuple(fitted.model.order),
+        'param_names': list(fitted.model.param_names),
+        'params': np.asarray(fitted.params, dtype=float)
+    }
+
+
+def arima_forecast(state: Dict, series: np.ndarray, steps: int) -> np.ndarray:
+    """
+    Forecast from saved ARIMA parameters without refitting
+
+    The state to forecast from is rebuilt by one Kalman filter pass with the
+    fixed parameters over the last CONTEXT_ROWS values, so forecasts start
+    at the latest reading rather than where training ended.
+
+    Returns:
+        Clipped forecasts for the next `steps` rows
+    """
+    model = ARIMA(np.asarray(series, dtype=float)[-CONTEXT_ROWS:], order=state['order'])
+    forecast = model.filter(state['params']).forecast(steps=steps)
+    return np.clip(np.asarray(forecast), 0, 100)
+
+
+def forecast_result(bin_id: str, model_type: str, strategy: str, current_fill: float,
+                    current_time, forecast: np.ndarray) -> Dict:
+    """Response dictionary for an hourly forecast starting after current_time"""
+    timestamps = pd.date_range(current_time + timedelta(hours=1), periods=len(forecast), freq='h')
+    predictions = [
+        {
+            'timestamp': timestamp,
+            'predicted_fill_level': predicted_fill
+        }
+        for timestamp, predicted_fill in zip(timestamps, np.round(forecast, 2).tolist())
+    ]
+    
+    # Calculate when bin will be full
+    hours_until_full = None
+    predicted_full_time = None
+    
+    for i, pred in enumerate(predictions):
+        if pred['predicted_fill_level'] >= 100:
+            hours_until_full = i + 1
+            predicted_full_time = pred['timestamp']
+            break
+    
+    return {
+        'bin_id': bin_id,
+        'model_type': model_type,
+        'strategy': strategy,
+        'current_fill_level': round(current_fill, 2),
+        'current_time': current_time,
+        'predicted_fill_level': predictions[-1]['predicted_fill_level'],
+        'prediction_time': predictions[-1]['timestamp'],
+        'hours_until_full': hours_until_full,
+        'predicted_full_time': predicted_full_time,
+        'hourly_predictions': predictions
+    }
+
+
+def lookback_readings(model_key: str, readings_per_row: float) -> int:
+    """
+    Readings to load so that prediction sees everything it uses
+
+    Recursive models and ARIMA read the last CONTEXT_ROWS prepared rows,
+    direct models the lag and rolling windows behind the latest row; the
+    feature passes drop WARMUP_ROWS more, and each prepared row stands for
+    readings_per_row readings (more when cleaning drops readings, or when
+    several readings fall in one resampled hour).
+    """
+    context = RING_SIZE if model_key.endswith('_direct') else CONTEXT_ROWS
+    return int(np.ceil((context + WARMUP_ROWS) * readings_per_row * LOOKBACK_MARGIN))
+
+
+def direct_targets(hours: np.ndarray, fill: np.ndarray) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    Training targets for direct models: the fill level each row is followed
+    by at every horizon in DIRECT_HORIZONS, interpolated from the series
+
+    Horizons that leave fewer than 10 rows with a known future are skipped.
+
+    Args:
+        hours: Row times in hours since the first row
+        fill: Fill level of each row
+
+    Returns:
+        (horizons, rows with a known future at every horizon,
+        (usable rows, horizons) target matrix); ([], None, None) if no
+        horizon is usable
+    """
+    horizons = [h for h in DIRECT_HORIZONS if np.count_nonzero(hours + h <= hours[-1]) >= 10]
+    if not horizons:
+        return [], None, None
+    
+    usable = hours + horizons[-1] <= hours[-1]
+    targets = np.column_stack([np.interp(hours[usable] + h, hours, fill) for h in horizons])
+    return horizons, usable, targets
 
 
 class FillLevelForecaster:
@@ -31,26 +188,44 @@ class FillLevelForecaster:
         self.models = {}
         self.preprocessor = DataPreprocessor()
         self.feature_engineer = FeatureEngineer()
+        # Feature columns and preprocessing prepare_data applies: those being
+        # trained with, or of the model loaded last, e.g.
+        # {'resample': {'freq': 'h', 'max_gap_hours': 6}}
         self.feature_columns = []
+        self.preprocessing = {}
+        # Each loaded model's own, per model key ('forest', 'linear_direct', ...);
+        # models of one bin may be trained with different settings
+        self.model_features = {}
+        self.model_preprocessing = {}
+        # Horizons each direct model was fitted on, per model key
+        self.direct_horizons = {}
         self.metrics = {}
+        # Searched parameters per model key ('forest', 'tree_direct', ...),
+        # reused by every retrain until the next search
+        self.hyperparameters = {}
         
         # Model directory for persistence
-        self.model_dir = os.path.join(os.path.dirname(__file__), 'trained_models')
+        self.model_dir = MODEL_DIR
         os.makedirs(self.model_dir, exist_ok=True)
     
-    def prepare_data(self, readings: List, bin_info: Dict) -> pd.DataFrame:
+    def prepare_data(self, readings: List, bin_info: Dict, bridge_gaps: bool = False) -> pd.DataFrame:
         """
         Prepare data for training/prediction
         
         Args:
-            readings: List of BinReading objects
+            readings: List of BinReading objects, or a reading DataFrame (reading_loader)
             bin_info: Dictionary with bin metadata
+            bridge_gaps: With resampling, drop the empty grid points of long
+                gaps before feature engineering, so the latest readings stay
+                usable right after a gap (prediction)
             
         Returns:
             DataFrame with engineered features
         """
         # Clean readings
-        df = self.preprocessor.clean_readings(readings)
+        df = self._clean_readings(readings)
+        if bridge_gaps:
+            df = df.dropna()
         
         if df.empty:
             return df
@@ -75,25 +250,74 @@ class FillLevelForecaster:
         
         return df
     
+    def _clean_readings(self, readings) -> pd.DataFrame:
+        """
+        Cleaned readings, resampled onto the grid if the bin's models use one
+        
+        Resampled frames are cached per bin until a new reading arrives.
+        """
+        resample = self.preprocessing.get('resample')
+        if not resample:
+            return self.preprocessor.clean_readings(readings)
+        
+        signature = reading_signature(readings)
+        if signature is not None:
+            signature += (resample['freq'], resample['max_gap_hours'])
+            df = resampled_readings_cache.get(self.bin_id, signature)
+            if df is not None:
+                return df
+        
+        df = self.preprocessor.resample(
+            self.preprocessor.clean_readings(readings), resample['freq'], resample['max_gap_hours']
+        )
+        if signature is not None:
+            resampled_readings_cache.put(self.bin_id, signature, df)
+        return df
+    
     def train_models(self, readings: List, bin_info: Dict, 
-                    model_types: List[str] = ['linear', 'tree', 'forest']) -> Dict:
+                    model_types: List[str] = ['linear', 'tree', 'forest'],
+                    strategy: str = 'recursive', resample: Optional[bool] = None,
+                    tune: bool = False) -> Dict:
         """
         Train multiple ML models
         
         Args:
-            readings: List of BinReading objects
+            readings: List of BinReading objects, or a reading DataFrame (reading_loader)
             bin_info: Dictionary with bin metadata
             model_types: List of model types to train
+            strategy: 'recursive' (one-step models) or 'direct' (one model
+                per type predicting every horizon in DIRECT_HORIZONS)
+            resample: Resample readings onto an hourly grid before feature
+                engineering (None keeps each model's saved setting; models
+                saved with different settings are trained separately)
+            tune: Search tree and forest hyperparameters on the training
+                split first (hyperparameter_search); otherwise the bin's
+                previously searched ones, if any, are used
             
         Returns:
             Dictionary with training metrics
         """
+        if resample is None:
+            groups = {}
+            for model_type in model_types:
+                saved = self.saved_preprocessing(self._model_key(model_type, strategy)) or {}
+                groups.setdefault(bool(saved.get('resample')), []).append(model_type)
+            if len(groups) > 1:
+                return self._train_groups(groups, readings, bin_info, strategy, tune)
+            resample = next(iter(groups), False)
+        
+        self._set_preprocessing(resample)
+        self._load_hyperparameters()
+        
         # Prepare data
         df = self.prepare_data(readings, bin_info)
         
         if df.empty or len(df) < 10:
             return {'error': 'Insufficient data for training'}
         
+        if strategy == 'direct':
+            return self._train_direct_models(df, model_types, len(readings), tune)
+        
         # Create train/test split
         X_train, X_test, y_train, y_test = create_train_test_split(
             df, target_col='fill_level_percent', test_size=0.2, temporal=True
@@ -105,11 +329,13 @@ class FillLevelForecaster:
         # Store feature columns
         self.feature_columns = X_train.columns.tolist()
         
+        tuning = self._tune(model_types, X_train, y_train) if tune else {}
+        
         results = {}
         
         # Train Linear Regression
         if 'linear' in model_types:
-            lr_model = LinearRegression()
+            lr_model = self._model('linear')
             lr_model.fit(X_train, y_train)
             self.models['linear'] = lr_model
             
@@ -119,12 +345,7 @@ class FillLevelForecaster:
         
         # Train Decision Tree
         if 'tree' in model_types:
-            dt_model = DecisionTreeRegressor(
-                max_depth=10,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42
-            )
+            dt_model = self._model('tree')
             dt_model.fit(X_train, y_train)
             self.models['tree'] = dt_model
             
@@ -134,14 +355,7 @@ class FillLevelForecaster:
         
         # Train Random Forest
         if 'forest' in model_types:
-            rf_model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=15,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1
-            )
+            rf_model = self._model('forest')
             rf_model.fit(X_train, y_train)
             self.models['forest'] = rf_model
             
@@ -157,11 +371,168 @@ class FillLevelForecaster:
             except Exception as e:
                 results['arima'] = {'error': str(e)}
         
+        self._add_tuning_results(results, tuning)
+        
         # Store metrics
         self.metrics = results
         
         # Save models
-        self._save_models()
+        self._save_models([model_type for model_type, m in results.items() if 'error' not in m])
+        self._save_metrics(results, df, len(readings))
+        
+        return results
+    
+    def _train_groups(self, groups: Dict[bool, List[str]], readings: List, bin_info: Dict,
+                      strategy: str, tune: bool) -> Dict:
+        """Train model types saved with and without resampling apart, each keeping its setting"""
+        results = {}
+        for resample, model_types in groups.items():
+            forecaster = FillLevelForecaster(self.bin_id)
+            group_results = forecaster.train_models(readings, bin_info, model_types, strategy, resample, tune)
+            if 'error' in group_results:
+                group_results = {model_type: group_results for model_type in model_types}
+            results.update(group_results)
+            self.models.update(forecaster.models)
+        self.metrics = results
+        return results
+    
+    @staticmethod
+    def _model_key(model_type: str, strategy: str) -> str:
+        """Key a model is saved under: '<type>_direct' for direct models"""
+        return f'{model_type}_direct' if strategy == 'direct' and model_type != 'arima' else model_type
+    
+    def _set_preprocessing(self, resample: Optional[bool], model_key: Optional[str] = None):
+        """
+        Resample onto the hourly grid or not (None keeps the setting saved
+        with model_key)
+        """
+        if resample is None:
+            self.preprocessing = (self.saved_preprocessing(model_key) if model_key else None) or {}
+        elif resample:
+            self.preprocessing = {'resample': {'freq': RESAMPLE_FREQ, 'max_gap_hours': RESAMPLE_MAX_GAP_HOURS}}
+        else:
+            self.preprocessing = {}
+    
+    @staticmethod
+    def _new_model(model_type: str, params: Optional[Dict] = None):
+        """Unfitted regressor for a model type, params overriding the defaults"""
+        if model_type == 'linear':
+            return LinearRegression()
+        if model_type == 'tree':
+            model = DecisionTreeRegressor(
+                max_depth=10,
+                min_samples_split=5,
+                min_samples_leaf=2,
+                random_state=42
+            )
+        else:
+            model = RandomForestRegressor(
+                n_estimators=100,
+                max_depth=15,
+                min_samples_split=5,
+                min_samples_leaf=2,
+                random_state=42,
+                n_jobs=MODEL_N_JOBS
+            )
+        return model.set_params(**params) if params else model
+    
+    def tuned_params(self, model_key: str) -> Optional[Dict]:
+        """Hyperparameters searched for a model key, None for the defaults"""
+        return self.hyperparameters.get(model_key, {}).get('params')
+    
+    def _model(self, model_key: str):
+        """Unfitted regressor for a model key, with the bin's searched hyperparameters"""
+        return self._new_model(model_key.split('_')[0], self.tuned_params(model_key))
+    
+    def _tune(self, model_types: List[str], X_train, y_train, suffix: str = '') -> Dict:
+        """
+        Search hyperparameters of the tree and forest models on the training
+        split, starting from the configuration in use, and save the winners
+
+        Returns:
+            Search results per model key
+        """
+        tuning = {}
+        for model_type in model_types:
+            if model_type not in TUNABLE_MODEL_TYPES:
+                continue
+            key = f'{model_type}{suffix}'
+            result = search(
+                lambda params: self._new_model(model_type, params),
+                sample_candidates(model_type, self._model(key).get_params()),
+                X_train, y_train, n_jobs=MODEL_N_JOBS
+            )
+            if 'error' not in result:
+                self.hyperparameters[key] = {**result, 'tuned_at': datetime.utcnow().isoformat()}
+            tuning[key] = result
+        
+        if any('error' not in result for result in tuning.values()):
+            self._save_hyperparameters()
+        return tuning
+    
+    def _add_tuning_results(self, results: Dict, tuning: Dict, suffix: str = ''):
+        """Record in each model's metrics the hyperparameters it was trained with and this run's search"""
+        for model_type, metrics in results.items():
+            key = f'{model_type}{suffix}'
+            if 'error' in metrics:
+                continue
+            if self.tuned_params(key):
+                metrics['hyperparameters'] = self.tuned_params(key)
+            if key in tuning:
+                metrics['tuning'] = {k: v for k, v in tuning[key].items() if k != 'params'}
+    
+    def _train_direct_models(self, df: pd.DataFrame, model_types: List[str], readings_count: int,
+                             tune: bool = False) -> Dict:
+        """
+        Fit multi-output models mapping a reading's features to the fill
+        level at each horizon in DIRECT_HORIZONS
+        
+        Targets are interpolated from the (irregular) reading series; horizons
+        that leave fewer than 10 rows with a known future are skipped.
+        """
+        hours = (df['timestamp'] - df['timestamp'].iloc[0]).dt.total_seconds().to_numpy() / 3600
+        horizons, usable, targets = direct_targets(hours, df['fill_level_percent'].to_numpy(dtype=float))
+        if not horizons:
+            return {'error': 'Insufficient history for direct forecasting'}
+        
+        feature_cols = [col for col in df.columns if col not in ['fill_level_percent', 'timestamp']]
+        X = df.loc[usable, feature_cols]
+        
+        # Temporal split, as for the one-step models
+        split_idx = int(len(X) * 0.8)
+        if split_idx < 5:
+            return {'error': 'Insufficient training data'}
+        X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
+        y_train, y_test = targets[:split_idx], targets[split_idx:]
+        
+        self.feature_columns = feature_cols
+        
+        y_fit = y_train if len(horizons) > 1 else y_train[:, 0]
+        tuning = self._tune(model_types, X_train, y_fit, '_direct') if tune else {}
+        
+        results = {}
+        for model_type in model_types:
+            if model_type not in ['linear', 'tree', 'forest']:
+                results[model_type] = {'error': f'{model_type} does not support the direct strategy'}
+                continue
+            
+            model = self._model(f'{model_type}_direct')
+            model.fit(X_train, y_fit)
+            self.models[f'{model_type}_direct'] = model
+            self.direct_horizons[f'{model_type}_direct'] = horizons
+            
+            y_pred = np.asarray(model.predict(X_test)).reshape(len(X_test), -1)
+            metrics = self._evaluate_model(y_test.ravel(), y_pred.ravel())
+            metrics['horizons'] = {
+                h: self._evaluate_model(y_test[:, i], y_pred[:, i])
+                for i, h in enumerate(horizons)
+            }
+            results[model_type] = metrics
+        
+        self._add_tuning_results(results, tuning, '_direct')
+        self.metrics = results
+        self._save_models([f'{model_type}_direct' for model_type, m in results.items() if 'error' not in m])
+        self._save_metrics({f'{model_type}_direct': m for model_type, m in results.items()}, df, readings_count)
         
         return results
     
@@ -175,7 +546,7 @@ class FillLevelForecaster:
         train, test = time_series[:train_size], time_series[train_size:]
         
         # Fit ARIMA model (p=2, d=1, q=2)
-        model = ARIMA(train, order=(2, 1, 2))
+        model = ARIMA(train, order=ARIMA_ORDER)
         fitted_model = model.fit()
         
         # Predict
@@ -184,8 +555,8 @@ class FillLevelForecaster:
         # Evaluate
         metrics = self._evaluate_model(test, predictions)
         
-        # Store fitted model
-        self.models['arima'] = fitted_model
+        # Store parameters only; forecasts re-filter recent readings with them
+        self.models['arima'] = arima_state(fitted_model)
         
         return metrics
     
@@ -209,28 +580,33 @@ class FillLevelForecaster:
         }
     
     def predict(self, readings: List, bin_info: Dict, hours_ahead: int = 24,
-                model_type: str = 'forest') -> Dict:
+                model_type: str = 'forest', strategy: str = 'recursive') -> Dict:
         """
         Make predictions for future fill levels
         
         Args:
-            readings: List of BinReading objects
+            readings: List of BinReading objects, or a reading DataFrame (reading_loader)
             bin_info: Dictionary with bin metadata
             hours_ahead: Hours to predict ahead
             model_type: Type of model to use
+            strategy: 'recursive' or 'direct' (ignored by ARIMA, which
+                forecasts every step at once)
             
         Returns:
             Dictionary with predictions
         """
+        model_key = self._model_key(model_type, strategy)
+        
         # Load model if not in memory
-        if model_type not in self.models:
-            self._load_models()
+        if model_key not in self.models:
+            self._load_models([model_key])
         
-        if model_type not in self.models:
-            return {'error': f'Model {model_type} not trained'}
+        if model_key not in self.models:
+            return {'error': f'Model {model_key} not trained'}
+        self._use_model(model_key)
         
         # Prepare data
-        df = self.prepare_data(readings, bin_info)
+        df = self.prepare_data(readings, bin_info, bridge_gaps=True)
         
         if df.empty:
             return {'error': 'Insufficient data for prediction'}
@@ -240,123 +616,38 @@ class FillLevelForecaster:
         current_time = df['timestamp'].iloc[-1]
         
         # For ARIMA, use different prediction method
-        if model_type == 'arima' and ARIMA_AVAILABLE:
-            return self._predict_arima(hours_ahead, current_fill, current_time)
-        
-        # For regression models, use recursive multi-step forecasting
-        predictions = []
-        
-        # Prepare context buffer (need enough rows for lags and rolling windows)
-        # We'll maintain a sliding window of historical + predicted data
-        context_df = df.copy()
-        
-        for hour in range(1, hours_ahead + 1):
-            future_time = current_time + timedelta(hours=hour)
-            
-            # 1. Create a placeholder row for the next hour
-            # Use the previous prediction (or current_fill if first step) as a starting point
-            prev_fill = predictions[-1]['predicted_fill_level'] if predictions else current_fill
-            new_row = pd.DataFrame([{
-                'timestamp': future_time,
-                'fill_level_percent': prev_fill
-            }])
-            
-            # 2. Add to context and re-engineer features
-            # We only need the last 50-100 rows for lags/rolling features
-            predict_buffer = pd.concat([context_df, new_row], ignore_index=True).tail(100)
-            
-            # Apply all feature engineering steps to the buffer
-            processed_buffer = self.feature_engineer.extract_time_features(predict_buffer)
-            processed_buffer = self.feature_engineer.extract_lag_features(processed_buffer)
-            processed_buffer = self.feature_engineer.extract_rolling_features(processed_buffer)
-            processed_buffer = self.feature_engineer.extract_rate_features(processed_buffer)
-            processed_buffer = self.feature_engineer.add_bin_metadata(processed_buffer, bin_info)
-            
-            # 3. Extract the features for the current prediction step (the last row)
-            step_features = processed_buffer.iloc[-1:]
-            
-            # Ensure all required features are present
-            for col in self.feature_columns:
-                if col not in step_features.columns:
-                    step_features[col] = 0
-            
-            step_input = step_features[self.feature_columns]
-            
-            # 4. Predict
-            model = self.models[model_type]
-            predicted_fill = model.predict(step_input)[0]
-            predicted_fill = np.clip(predicted_fill, 0, 100)
-            
-            # 5. Store prediction and update context for next step
-            predictions.append({
-                'timestamp': future_time,
-                'predicted_fill_level': round(predicted_fill, 2)
-            })
-            
-            # Update the fill level in our context buffer for the next iteration
-            context_df = pd.concat([context_df, new_row], ignore_index=True).tail(100)
-            context_df.iloc[-1, context_df.columns.get_loc('fill_level_percent')] = predicted_fill
-        
-        # Calculate when bin will be full
-        hours_until_full = None
-        predicted_full_time = None
-        
-        for i, pred in enumerate(predictions):
-            if pred['predicted_fill_level'] >= 100:
-                hours_until_full = i + 1
-                predicted_full_time = pred['timestamp']
-                break
+        if model_type == 'arima':
+            if not ARIMA_AVAILABLE:
+                return {'error': 'ARIMA requires statsmodels'}
+            forecast = arima_forecast(self.models['arima'], df['fill_level_percent'].values, hours_ahead)
+            return forecast_result(self.bin_id, 'arima', 'recursive', current_fill, current_time, forecast)
+        
+        if model_key != model_type:
+            # Direct models: one predict call for every horizon, then interpolate
+            forecast = self._predict_direct(model_key, df, hours_ahead)
+        else:
+            # For regression models, use recursive multi-step forecasting
+            try:
+                forecast = recursive_forecast(
+                    self.models[model_type], self.feature_columns, df, bin_info, hours_ahead
+                )
+            except ValueError as e:
+                return {'error': str(e)}
         
-        return {
-            'bin_id': self.bin_id,
-            'model_type': model_type,
-            'current_fill_level': round(current_fill, 2),
-            'current_time': current_time,
-            'predicted_fill_level': predictions[-1]['predicted_fill_level'],
-            'prediction_time': predictions[-1]['timestamp'],
-            'hours_until_full': hours_until_full,
-            'predicted_full_time': predicted_full_time,
-            'hourly_predictions': predictions
-        }
+        return forecast_result(self.bin_id, model_type, strategy, current_fill, current_time, forecast)
     
-    def _predict_arima(self, hours_ahead: int, current_fill: float, 
-                      current_time: datetime) -> Dict:
-        """Make predictions using ARIMA model"""
-        model = self.models['arima']
-        
-        # Forecast
-        forecast = model.forecast(steps=hours_ahead)
-        forecast = np.clip(forecast, 0, 100)
-        
-        predictions = []
-        for i, pred_fill in enumerate(forecast):
-            future_time = current_time + timedelta(hours=i+1)
-            predictions.append({
-                'timestamp': future_time,
-                'predicted_fill_level': round(pred_fill, 2)
-            })
-        
-        # Calculate when bin will be full
-        hours_until_full = None
-        predicted_full_time = None
-        
-        for i, pred in enumerate(predictions):
-            if pred['predicted_fill_level'] >= 100:
-                hours_until_full = i + 1
-                predicted_full_time = pred['timestamp']
-                break
+    def _predict_direct(self, model_key: str, df: pd.DataFrame, hours_ahead: int) -> np.ndarray:
+        """
+        Hourly forecast from a direct model: predict every trained horizon
+        from the latest feature row, then interpolate linearly from the
+        current fill level (holding the last horizon beyond its end)
+        """
+        row = df.iloc[-1:].reindex(columns=self.feature_columns, fill_value=0)
+        at_horizons = np.ravel(self.models[model_key].predict(row))
         
-        return {
-            'bin_id': self.bin_id,
-            'model_type': 'arima',
-            'current_fill_level': round(current_fill, 2),
-            'current_time': current_time,
-            'predicted_fill_level': predictions[-1]['predicted_fill_level'],
-            'prediction_time': predictions[-1]['timestamp'],
-            'hours_until_full': hours_until_full,
-            'predicted_full_time': predicted_full_time,
-            'hourly_predictions': predictions
-        }
+        return interpolate_horizons(
+            self.direct_horizons[model_key], df['fill_level_percent'].iloc[-1], at_horizons, hours_ahead
+        )
     
     def _create_future_features(self, last_row: pd.DataFrame, 
                                future_time: datetime, bin_info: Dict) -> pd.DataFrame:
@@ -382,7 +673,7 @@ class FillLevelForecaster:
             return {'error': 'Feature importance only available for tree-based models'}
         
         if model_type not in self.models:
-            self._load_models()
+            self._load_models([model_type])
         
         if model_type not in self.models:
             return {'error': f'Model {model_type} not trained'}
@@ -414,40 +705,154 @@ class FillLevelForecaster:
             'features': feature_importance[:15]  # Top 15 features
         }
     
-    def _save_models(self):
-        """Save trained models to disk"""
-        for model_type, model in self.models.items():
-            if model_type != 'arima':  # ARIMA models are harder to serialize
-                model_path = os.path.join(
-                    self.model_dir, 
-                    f'{self.bin_id}_{model_type}.joblib'
-                )
-                joblib.dump(model, model_path)
+    def _save_models(self, model_keys: List[str]):
+        """
+        Save the models just trained to disk, each with the feature columns
+        and preprocessing it was trained with (and horizons, if direct), so
+        retraining one type leaves the others' settings as they were
+        """
+        for model_type in model_keys:
+            if model_type not in self.models:
+                continue
+            model = self.models[model_type]
+            model_path = os.path.join(
+                self.model_dir, 
+                f'{self.bin_id}_{model_type}.joblib'
+            )
+            if FLAT_TREE_MODELS:
+                # Served from here on in the form it is saved in
+                model = self.models[model_type] = flatten_model(model)
+            # Replaced rather than rewritten: other processes may have it mapped
+            dump_artifact(model, model_path)
+            model_registry.put(self.bin_id, model_type, model_path, model)
+            
+            self.model_features[model_type] = self.feature_columns
+            self.model_preprocessing[model_type] = self.preprocessing
+            settings = {'features': self.feature_columns, 'preprocessing': self.preprocessing}
+            if model_type in self.direct_horizons:
+                settings['horizons'] = self.direct_horizons[model_type]
+            for name, value in settings.items():
+                path = os.path.join(self.model_dir, f'{self.bin_id}_{model_type}_{name}.joblib')
+                joblib.dump(value, path)
+                model_registry.put(self.bin_id, f'{model_type}_{name}', path, value)
+    
+    def _save_metrics(self, results: Dict, df: pd.DataFrame, readings_count: int):
+        """
+        Merge evaluation metrics into the bin's saved metrics, stamped with
+        the training time, the span of readings trained on and the lookback
+        prediction needs (lookback_readings)
+
+        Models that failed to train keep their previous entry, as their
+        previously saved model files are kept too.
+        """
+        trained = {
+            'trained_at': datetime.utcnow().isoformat(),
+            'data_start': df['timestamp'].iloc[0].isoformat(),
+            'data_end': df['timestamp'].iloc[-1].isoformat(),
+            'training_rows': len(df)
+        }
+        # Raw readings per prepared row, as observed on the training data
+        readings_per_row = max(1.0, readings_count / (len(df) + WARMUP_ROWS))
+        saved = self.load_metrics()
+        for model_type, metrics in results.items():
+            if 'error' not in metrics:
+                saved[model_type] = {
+                    **metrics, **trained,
+                    'lookback_readings': lookback_readings(model_type, readings_per_row)
+                }
+        
+        metrics_path = os.path.join(self.model_dir, f'{self.bin_id}_metrics.joblib')
+        joblib.dump(saved, metrics_path)
+        model_registry.put(self.bin_id, 'metrics', metrics_path, saved)
+    
+    def load_metrics(self) -> Dict:
+        """
+        Evaluation metrics saved when the bin's models were trained
         
-        # Save feature columns
-        feature_path = os.path.join(
-            self.model_dir, 
-            f'{self.bin_id}_features.joblib'
-        )
-        joblib.dump(self.feature_columns, feature_path)
+        Returns:
+            Metrics per model type (direct models as '<type>_direct'), each
+            with trained_at, data_start, data_end and training_rows
+        """
+        metrics_path = os.path.join(self.model_dir, f'{self.bin_id}_metrics.joblib')
+        saved = model_registry.get(self.bin_id, 'metrics', metrics_path)
+        return dict(saved) if saved else {}
     
-    def _load_models(self):
-        """Load trained models from disk"""
-        for model_type in ['linear', 'tree', 'forest']:
+    def lookback(self, model_key: str) -> Optional[int]:
+        """
+        Latest readings a prediction with this model needs, as recorded
+        when it was trained (None for models trained before it was recorded)
+        """
+        return self.load_metrics().get(model_key, {}).get('lookback_readings')
+    
+    def _load_models(self, model_types: Optional[List[str]] = None):
+        """Load trained models from disk through the shared model registry"""
+        for model_type in model_types or ['linear', 'tree', 'forest']:
             model_path = os.path.join(
                 self.model_dir, 
                 f'{self.bin_id}_{model_type}.joblib'
             )
-            if os.path.exists(model_path):
-                self.models[model_type] = joblib.load(model_path)
-        
-        # Load feature columns
-        feature_path = os.path.join(
-            self.model_dir, 
-            f'{self.bin_id}_features.joblib'
-        )
-        if os.path.exists(feature_path):
-            self.feature_columns = joblib.load(feature_path)
+            # Flat tree models are memory-mapped; other models load as usual
+            model = model_registry.get(self.bin_id, model_type, model_path, mmap_mode='r')
+            if model is None:
+                continue
+            self.models[model_type] = model
+            if model_type.endswith('_direct') and not self._load_direct_horizons(model_type):
+                continue
+            self.model_features[model_type] = self._saved_setting(model_type, 'features') or []
+            self.model_preprocessing[model_type] = self.saved_preprocessing(model_type) or {}
+            self._use_model(model_type)
+    
+    def _use_model(self, model_key: str):
+        """Make a loaded model's feature columns and preprocessing the ones prepare_data applies"""
+        if model_key in self.model_features:
+            self.feature_columns = self.model_features[model_key]
+            self.preprocessing = self.model_preprocessing[model_key]
+    
+    def _saved_setting(self, model_key: str, name: str):
+        """
+        A setting saved with a model ({bin}_{key}_{name}); models saved
+        before settings were kept per model fall back to the bin's shared one
+        """
+        for artifact in (f'{model_key}_{name}', name):
+            path = os.path.join(self.model_dir, f'{self.bin_id}_{artifact}.joblib')
+            value = model_registry.get(self.bin_id, artifact, path)
+            if value is not None:
+                return value
+        return None
+    
+    def saved_preprocessing(self, model_key: str) -> Optional[Dict]:
+        """Preprocessing a model was saved with (None if never trained)"""
+        return self._saved_setting(model_key, 'preprocessing')
+    
+    def _load_direct_horizons(self, model_key: str) -> bool:
+        """
+        Horizons a direct model was fitted on; a model whose outputs do not
+        match them cannot be interpolated and is dropped, as if untrained
+        """
+        horizons_path = os.path.join(self.model_dir, f'{self.bin_id}_{model_key}_horizons.joblib')
+        horizons = model_registry.get(self.bin_id, f'{model_key}_horizons', horizons_path)
+        if horizons is None:
+            # Models saved before horizons were kept per model shared one file
+            horizons_path = os.path.join(self.model_dir, f'{self.bin_id}_direct_horizons.joblib')
+            horizons = model_registry.get(self.bin_id, 'direct_horizons', horizons_path)
+        
+        if horizons is None or len(horizons) != model_outputs(self.models[model_key]):
+            del self.models[model_key]
+            return False
+        self.direct_horizons[model_key] = horizons
+        return True
+    
+    def _save_hyperparameters(self):
+        """Save the bin's searched hyperparameters, reused by later retrains"""
+        hyperparameters_path = os.path.join(self.model_dir, f'{self.bin_id}_hyperparameters.joblib')
+        joblib.dump(self.hyperparameters, hyperparameters_path)
+        model_registry.put(self.bin_id, 'hyperparameters', hyperparameters_path, self.hyperparameters)
+    
+    def _load_hyperparameters(self):
+        """Hyperparameters searched for the bin's models (none until first tuned)"""
+        hyperparameters_path = os.path.join(self.model_dir, f'{self.bin_id}_hyperparameters.joblib')
+        saved = model_registry.get(self.bin_id, 'hyperparameters', hyperparameters_path)
+        self.hyperparameters = dict(saved) if saved else {}
 
 
 class ModelComparator:
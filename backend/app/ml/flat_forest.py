@@ -0,0 +1,140 @@
+"""
+Flat tree ensembles
+Fitted sklearn decision trees and random forests flattened into a few
+contiguous node arrays, evaluated with NumPy. Saved with joblib and loaded
+with mmap_mode='r', the arrays are memory-mapped, so processes serving the
+same models share their pages through the OS cache.
+"""
+
+from typing import Union
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+# sklearn's child index of a leaf
+TREE_LEAF = -1
+# Rows traversed together; bounds the (rows x trees) index arrays
+CHUNK_ROWS = 4096
+
+
+class FlatForest:
+    """
+    A tree or forest regressor as node arrays shared by all its trees
+
+    Node i of the ensemble splits on feature[i] at threshold[i] and
+    continues at left[i] or right[i] (TREE_LEAF at leaves); value[i] holds
+    the leaf's outputs. roots[t] is the first node of tree t. Predictions
+    match the estimator's predict: inputs are compared as float32 against
+    float64 thresholds, and tree outputs are summed in tree order before
+    averaging.
+
+    Exposes the parts of the estimator API used by forecasting: predict,
+    feature_importances_, n_outputs_ and n_features_in_.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 missing_go_to_left: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 feature_importances: np.ndarray, n_features_in: int, single_tree: bool = False):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_go_to_left = missing_go_to_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.feature_importances_ = feature_importances
+        self.n_features_in_ = n_features_in
+        self.single_tree = single_tree
+
+    @classmethod
+    def from_estimator(cls, model: Union[DecisionTreeRegressor, RandomForestRegressor]) -> 'FlatForest':
+        """Flatten a fitted DecisionTreeRegressor or RandomForestRegressor"""
+        single_tree = isinstance(model, DecisionTreeRegressor)
+        trees = [model.tree_] if single_tree else [e.tree_ for e in model.estimators_]
+
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        def children(attr):
+            # Tree-local child indices shifted to ensemble-wide ones; leaves stay TREE_LEAF
+            return np.concatenate([
+                np.where(getattr(tree, attr) == TREE_LEAF, TREE_LEAF, getattr(tree, attr) + root)
+                for tree, root in zip(trees, roots)
+            ]).astype(np.int32)
+
+        return cls(
+            feature=np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+            threshold=np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+            left=children('children_left'),
+            right=children('children_right'),
+            missing_go_to_left=np.concatenate([tree.missing_go_to_left for tree in trees]).astype(bool),
+            value=np.concatenate([tree.value[:, :, 0] for tree in trees]).astype(np.float64),
+            roots=roots.astype(np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            feature_importances=np.asarray(model.feature_importances_, dtype=np.float64),
+            n_features_in=model.n_features_in_,
+            single_tree=single_tree
+        )
+
+    @property
+    def n_outputs_(self) -> int:
+        return self.value.shape[1]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predictions shaped as the estimator's: (rows,) for one output,
+        (rows, outputs) otherwise
+
+        Args:
+            X: Feature matrix or DataFrame, columns in training order
+        """
+        predicted = self.predict_array(np.asarray(X))
+        return predicted[:, 0] if self.n_outputs_ == 1 else predicted
+
+    def predict_array(self, X: np.ndarray) -> np.ndarray:
+        """(rows, outputs) predictions for a feature matrix"""
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((len(X), self.n_outputs_))
+        for start in range(0, len(X), CHUNK_ROWS):
+            out[start:start + CHUNK_ROWS] = self._predict_chunk(X[start:start + CHUNK_ROWS])
+        return out
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        # Every (row, tree) pair descends one level per pass, all pairs at
+        # once; pairs that reached a leaf drop out of the active set
+        n_rows, n_trees = len(X), self.n_trees
+        node = np.tile(self.roots, n_rows)
+        offset = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        flat_X = X.ravel()
+        active = np.arange(n_rows * n_trees)
+        for _ in range(self.max_depth):
+            current = node[active]
+            left = self.left[current]
+            internal = left != TREE_LEAF
+            if not internal.all():
+                active, current, left = active[internal], current[internal], left[internal]
+                if not len(active):
+                    break
+            x = flat_X[offset[active] + self.feature[current]]
+            go_left = (x <= self.threshold[current]) | (np.isnan(x) & self.missing_go_to_left[current])
+            node[active] = np.where(go_left, left, self.right[current])
+
+        # Tree order summation, as the estimator's predict
+        leaves = self.value[node].reshape(n_rows, n_trees, -1)
+        total = np.zeros((n_rows, self.n_outputs_))
+        for t in range(n_trees):
+            total += leaves[:, t]
+        return total if self.single_tree else total / n_trees
+
+
+def flatten_model(model):
+    """The model as a FlatForest if it is a tree or forest regressor, otherwise unchanged"""
+    if isinstance(model, (DecisionTreeRegressor, RandomForestRegressor)):
+        return FlatForest.from_estimator(model)
+    return model
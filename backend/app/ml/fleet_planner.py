@@ -0,0 +1,191 @@
+"""
+Fleet Route Planning Module
+Capacitated multi-vehicle routing (CVRP) with OR-Tools
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+from app.utils.distance_store import distance_store
+
+# Bulk density of mixed municipal waste; matches the seed data's weight estimate
+WASTE_DENSITY_KG_PER_LITER = 0.3
+AVERAGE_SPEED_KMH = 30
+SERVICE_MINUTES_PER_BIN = 5
+
+# Cost of leaving a bin unserved, in meters of extra driving
+DROP_PENALTY_METERS = 1_000_000
+
+
+def _status_name(status: int) -> str:
+    """ROUTING_FAIL_TIMEOUT -> 'fail_timeout'"""
+    name = routing_enums_pb2.RoutingSearchStatus.Value.Name(status)
+    return name.replace('ROUTING_', '').lower()
+
+
+def estimate_bin_load_kg(fill_level_percent: float, capacity_liters: float) -> float:
+    """Expected waste weight in a bin from its fill level and volume"""
+    fill = max(0.0, min(100.0, fill_level_percent or 0.0))
+    return fill / 100.0 * (capacity_liters or 0) * WASTE_DENSITY_KG_PER_LITER
+
+
+def plan_fleet_routes(vehicles: List, bins: List, fill_levels: Dict[str, float],
+                      depots: Optional[List[Tuple[float, float]]] = None,
+                      shift_minutes: float = 480, time_limit_seconds: int = 10) -> Dict:
+    """
+    Solve a capacitated VRP for the fleet
+
+    Vehicles are assigned to depots round-robin and return to their depot.
+    Each route must fit the vehicle's capacity_kg and the shift length
+    (travel at AVERAGE_SPEED_KMH plus SERVICE_MINUTES_PER_BIN per stop).
+    Bins that cannot be served are dropped at a large penalty and reported.
+
+    Args:
+        vehicles: Vehicle objects (vehicle_id, capacity_kg)
+        bins: Bin objects to collect
+        fill_levels: Current fill level per bin_id
+        depots: (latitude, longitude) pairs; defaults to the centroid of the bins
+        shift_minutes: Maximum route duration per vehicle
+        time_limit_seconds: Solver time budget
+
+    Returns:
+        Dictionary with one route per vehicle and the unassigned bins
+    """
+    empty_plan = {
+        'routes': [],
+        'unassigned_bins': [bin.bin_id for bin in bins],
+        'total_distance_km': 0,
+        'solver_status': 'not_solved'
+    }
+    if not vehicles:
+        return empty_plan
+    if not bins:
+        empty_plan['solver_status'] = 'success'
+        return empty_plan
+
+    if not depots:
+        depots = [(
+            float(np.mean([bin.latitude for bin in bins])),
+            float(np.mean([bin.longitude for bin in bins]))
+        )]
+
+    # Node layout: depots first, then bins
+    num_depots = len(depots)
+    num_nodes = num_depots + len(bins)
+    distances_m = np.rint(distance_store.matrix_with_depots(depots, bins) * 1000).astype(np.int64)
+    travel_s = np.rint(distances_m / (AVERAGE_SPEED_KMH / 3.6)).astype(np.int64)
+    service_s = SERVICE_MINUTES_PER_BIN * 60
+
+    loads = [0] * num_depots + [
+        int(round(estimate_bin_load_kg(fill_levels.get(bin.bin_id, 0), bin.capacity_liters)))
+        for bin in bins
+    ]
+
+    vehicle_depots = [i % num_depots for i in range(len(vehicles))]
+    manager = pywrapcp.RoutingIndexManager(
+        num_nodes, len(vehicles), vehicle_depots, vehicle_depots
+    )
+    routing = pywrapcp.RoutingModel(manager)
+
+    def distance_callback(from_index, to_index):
+        return int(distances_m[manager.IndexToNode(from_index), manager.IndexToNode(to_index)])
+
+    distance_cb = routing.RegisterTransitCallback(distance_callback)
+    routing.SetArcCostEvaluatorOfAllVehicles(distance_cb)
+
+    # Capacity constraint
+    def demand_callback(from_index):
+        return loads[manager.IndexToNode(from_index)]
+
+    demand_cb = routing.RegisterUnaryTransitCallback(demand_callback)
+    routing.AddDimensionWithVehicleCapacity(
+        demand_cb, 0, [int(v.capacity_kg or 0) for v in vehicles], True, 'Capacity'
+    )
+
+    # Shift length constraint: travel plus service time at the origin bin
+    def time_callback(from_index, to_index):
+        from_node = manager.IndexToNode(from_index)
+        to_node = manager.IndexToNode(to_index)
+        service = service_s if from_node >= num_depots else 0
+        return int(travel_s[from_node, to_node]) + service
+
+    time_cb = routing.RegisterTransitCallback(time_callback)
+    routing.AddDimension(time_cb, 0, int(shift_minutes * 60), True, 'Time')
+
+    # Allow dropping bins that do not fit any route
+    for node in range(num_depots, num_nodes):
+        routing.AddDisjunction([manager.NodeToIndex(node)], DROP_PENALTY_METERS)
+
+    search_params = pywrapcp.DefaultRoutingSearchParameters()
+    search_params.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_params.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_params.time_limit.seconds = max(1, int(time_limit_seconds))
+
+    solution = routing.SolveWithParameters(search_params)
+    status = _status_name(routing.status())
+    if solution is None:
+        empty_plan['solver_status'] = status
+        return empty_plan
+
+    time_dimension = routing.GetDimensionOrDie('Time')
+    routes = []
+    served = set()
+    total_distance_m = 0
+
+    for vehicle_idx, vehicle in enumerate(vehicles):
+        index = routing.Start(vehicle_idx)
+        route_distance_m = 0
+        load_kg = 0
+        sequence = []
+
+        while not routing.IsEnd(index):
+            node = manager.IndexToNode(index)
+            next_index = solution.Value(routing.NextVar(index))
+            route_distance_m += int(distances_m[node, manager.IndexToNode(next_index)])
+
+            if node >= num_depots:
+                bin = bins[node - num_depots]
+                load_kg += loads[node]
+                served.add(node)
+                sequence.append({
+                    "sequence": len(sequence) + 1,
+                    "bin_id": bin.bin_id,
+                    "latitude": bin.latitude,
+                    "longitude": bin.longitude,
+                    "bin_type": bin.bin_type.value,
+                    "zone": bin.zone,
+                    "load_kg": loads[node]
+                })
+            index = next_index
+
+        if not sequence:
+            continue
+
+        duration_s = solution.Value(time_dimension.CumulVar(index))
+        depot_lat, depot_lon = depots[vehicle_depots[vehicle_idx]]
+        total_distance_m += route_distance_m
+        routes.append({
+            "vehicle_id": vehicle.vehicle_id,
+            "depot": {"latitude": depot_lat, "longitude": depot_lon},
+            "bins_to_collect": [stop["bin_id"] for stop in sequence],
+            "total_distance_km": round(route_distance_m / 1000, 2),
+            "estimated_duration_minutes": round(duration_s / 60, 2),
+            "load_kg": load_kg,
+            "capacity_kg": vehicle.capacity_kg,
+            "optimized_sequence": sequence
+        })
+
+    return {
+        'routes': routes,
+        'unassigned_bins': [
+            bin.bin_id for node, bin in enumerate(bins, start=num_depots) if node not in served
+        ],
+        'total_distance_km': round(total_distance_m / 1000, 2),
+        'solver_status': status
+    }
@@ -0,0 +1,361 @@
+"""
+Recursive multi-step forecasting over fixed-size ring buffers
+Keeps lag, rolling and rate features current in O(1) per predicted hour,
+for one bin or many bins stepped in lockstep
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.ml.data_preprocessor import FeatureEngineer
+from app.ml.flat_forest import FlatForest
+
+TARGET = 'fill_level_percent'
+LAGS = [1, 2, 3, 6, 12]
+WINDOWS = [6, 12, 24]
+EXOGENOUS_COLUMNS = ['weight_kg', 'temperature_c', 'battery_percent']
+TIME_COLUMNS = [
+    'hour', 'day_of_week', 'is_weekend', 'day_of_month', 'month',
+    'hour_sin', 'hour_cos', 'day_sin', 'day_cos'
+]
+
+# Rows the DataFrame feature passes saw per step (predict_buffer.tail(100))
+CONTEXT_ROWS = 100
+RING_SIZE = max(max(LAGS), max(WINDOWS)) + 1
+# Bins stepped together; bounds the (bins x hours) calendar block
+CHUNK_BINS = 1024
+
+
+class FillRings:
+    """
+    Last RING_SIZE fill levels of each bin plus running sums per rolling window
+
+    All bins push in lockstep, so they share one head index. Bins with less
+    history are left-padded with zeros, which drop out of the sums unchanged.
+    """
+
+    def __init__(self, histories: List[np.ndarray]):
+        padded = np.zeros((len(histories), RING_SIZE))
+        for i, history in enumerate(histories):
+            tail = history[-RING_SIZE:]
+            padded[i, RING_SIZE - len(tail):] = tail
+
+        self.values = np.zeros((len(histories), RING_SIZE))
+        self.head = -1  # slot of the newest values
+        self.sums = {w: np.zeros(len(histories)) for w in WINDOWS}
+        self.squares = {w: np.zeros(len(histories)) for w in WINDOWS}
+        for column in padded.T:
+            self.push(column)
+
+    def ago(self, k: int) -> np.ndarray:
+        """Values k steps before the newest (0 = newest)"""
+        return self.values[:, (self.head - k) % RING_SIZE]
+
+    def push(self, values: np.ndarray) -> None:
+        for w in WINDOWS:
+            leaving = self.ago(w - 1)
+            self.sums[w] = self.sums[w] - leaving + values
+            self.squares[w] = self.squares[w] - leaving * leaving + values * values
+        self.head = (self.head + 1) % RING_SIZE
+        self.values[:, self.head] = values
+
+    def replace_newest(self, values: np.ndarray) -> None:
+        old = self.values[:, self.head]
+        for w in WINDOWS:
+            self.sums[w] = self.sums[w] + (values - old)
+            self.squares[w] = self.squares[w] + (values * values - old * old)
+        self.values[:, self.head] = values
+
+    def rolling(self, w: int):
+        """Mean and sample std of the newest w values"""
+        mean = self.sums[w] / w
+        var = (self.squares[w] - self.sums[w] * mean) / (w - 1)
+        return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def batch_predictor(model, feature_columns: List[str]) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Row-wise predict for the fitted estimator
+
+    Flat trees and forests, and sklearn ones, are evaluated directly on the
+    feature matrix, skipping per-call input validation (and the thread pool
+    a forest with n_jobs=-1 spins up); anything else goes through predict().
+    """
+    if isinstance(model, FlatForest) and model.n_outputs_ == 1:
+        return lambda X: model.predict_array(X)[:, 0]
+
+    if hasattr(model, 'tree_') and model.n_outputs_ == 1:
+        tree = model.tree_
+        return lambda X: tree.predict(X.astype(np.float32))[:, 0]
+
+    estimators = getattr(model, 'estimators_', None)
+    if estimators and getattr(model, 'n_outputs_', 0) == 1 and all(hasattr(e, 'tree_') for e in estimators):
+        trees = [e.tree_ for e in estimators]
+
+        def predict_forest(X):
+            X = X.astype(np.float32)
+            total = np.zeros(len(X))
+            for tree in trees:
+                total += tree.predict(X)[:, 0]
+            return total / len(trees)
+
+        return predict_forest
+
+    return lambda X: np.asarray(model.predict(pd.DataFrame(X, columns=feature_columns)))
+
+
+class ForecastBatch:
+    """
+    Bins forecast together, one model call per distinct model per step
+
+    add() one bin at a time, then recursive() or latest_features(). Linear
+    models of different bins are stacked into one coefficient matrix; bins
+    whose model object is shared (e.g. a pooled model) share one predict
+    call; other models are called once per step on their own rows.
+    """
+
+    def __init__(self, hours_ahead: int):
+        self.hours_ahead = hours_ahead
+        self.bins = []
+
+    def __len__(self):
+        return len(self.bins)
+
+    def add(self, model, feature_columns: List[str], fills: np.ndarray, history_rows: int,
+            last_time, exogenous: Dict, bin_info: Dict, prev_time=None) -> None:
+        """
+        Queue one bin
+
+        Args:
+            model: Fitted regressor
+            feature_columns: Column order the model was trained with
+            fills: Fill levels up to the latest reading (at least the last
+                RING_SIZE are used)
+            history_rows: Rows of prepared history (prepare_data) behind the
+                latest reading, which decides how many rows the feature
+                passes would see
+            last_time: Timestamp of the latest reading
+            exogenous: Features held constant over the horizon: the latest
+                sensor values (weight, temperature, battery) and any other
+                per-bin values the model was trained with
+            bin_info: Dictionary with bin metadata
+            prev_time: Timestamp of the reading before it (latest_features only)
+
+        Raises:
+            ValueError: Too little history for the lag features
+        """
+        if history_rows + 1 - max(LAGS) < 1:
+            raise ValueError('Not enough history for lag features')
+        static = dict(exogenous)
+        static.update(FeatureEngineer.bin_metadata_features(bin_info))
+        self.bins.append({
+            'model': model,
+            'feature_columns': list(feature_columns),
+            'fills': np.asarray(fills, dtype=float),
+            'history_rows': history_rows,
+            'last_time': pd.Timestamp(last_time),
+            'prev_time': prev_time,
+            'static': static
+        })
+
+    def recursive(self) -> np.ndarray:
+        """
+        Predict hourly fill levels by feeding each prediction back as history
+
+        Each step sees the same features the DataFrame pipeline builds for
+        the last row of the trailing CONTEXT_ROWS readings: lags and rolling
+        windows over fill level (the row's own placeholder is the previous
+        prediction, rounded), rate features against the previous row,
+        exogenous sensor values carried forward from the last reading, and
+        calendar and bin features precomputed for the whole horizon.
+
+        Returns:
+            (bins, hours_ahead) array of clipped, unrounded predictions
+        """
+        out = np.empty((len(self.bins), self.hours_ahead))
+        for start in range(0, len(self.bins), CHUNK_BINS):
+            out[start:start + CHUNK_BINS] = self._recursive_chunk(self.bins[start:start + CHUNK_BINS])
+        return out
+
+    def latest_features(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Feature rows prepare_data would build for each bin's latest reading
+
+        Returns:
+            (columns, matrix) with one row per bin in add() order
+        """
+        columns = self._columns(self.bins)
+        index = {col: i for i, col in enumerate(columns)}
+        X = self._static_matrix(self.bins, index)
+        times = pd.DataFrame({'timestamp': [b['last_time'] for b in self.bins]})
+        self._set_time_features(X, index, FeatureEngineer.extract_time_features(times))
+
+        rings = FillRings([b['fills'] for b in self.bins])
+        # Rows left after prepare_data's lag pass (its final dropna takes one more)
+        rows = np.array([b['history_rows'] + 1 for b in self.bins])
+        time_diff = np.array([
+            (b['last_time'] - b['prev_time']).total_seconds() / 3600 for b in self.bins
+        ])
+        change = rings.ago(0) - rings.ago(1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(time_diff != 0, change / time_diff, 0.0)
+        self._set_dynamic_features(X, index, rings, rows, (time_diff, change, rate))
+        return columns, X
+
+    def _recursive_chunk(self, bins: List[Dict]) -> np.ndarray:
+        hours = self.hours_ahead
+        columns = self._columns(bins)
+        index = {col: i for i, col in enumerate(columns)}
+        static = self._static_matrix(bins, index)
+
+        # Calendar features for every (bin, hour) in one pass
+        offsets = np.arange(1, hours + 1) * np.timedelta64(3600, 's')
+        last_times = np.array([b['last_time'].to_datetime64() for b in bins])
+        future = pd.DataFrame({'timestamp': (last_times[:, None] + offsets).ravel()})
+        future = FeatureEngineer.extract_time_features(future)
+        calendar = [
+            (index[col], future[col].to_numpy(dtype=float).reshape(len(bins), hours))
+            for col in TIME_COLUMNS if col in index
+        ]
+
+        groups = self._model_groups(bins, columns)
+        rings = FillRings([b['fills'] for b in bins])
+        history_rows = np.array([b['history_rows'] for b in bins])
+        predictions = np.empty((len(bins), hours))
+        placeholder = np.array([b['fills'][-1] for b in bins])
+
+        for step in range(hours):
+            rings.push(placeholder)
+            X = static.copy()
+            for slot, values in calendar:
+                X[:, slot] = values[:, step]
+            # Rows left after the lag pass drops the first max(LAGS) of the buffer
+            rows = np.minimum(CONTEXT_ROWS, history_rows + step + 1) - max(LAGS)
+            # Steps are one hour apart, including the first one after the last reading
+            change = rings.ago(0) - rings.ago(1)
+            self._set_dynamic_features(X, index, rings, rows, (1.0, change, change))
+
+            predicted = np.clip(self._predict(groups, X), 0, 100)
+            predictions[:, step] = predicted
+            # The context keeps the exact prediction; the next placeholder is rounded
+            rings.replace_newest(predicted)
+            placeholder = np.round(predicted, 2)
+
+        return predictions
+
+    @staticmethod
+    def _columns(bins: List[Dict]) -> List[str]:
+        """Union of the bins' feature columns, in first-seen order"""
+        columns = OrderedDict()
+        for b in bins:
+            columns.update((col, None) for col in b['feature_columns'])
+        return list(columns)
+
+    @staticmethod
+    def _static_matrix(bins: List[Dict], index: Dict[str, int]) -> np.ndarray:
+        X = np.zeros((len(bins), len(index)))
+        for i, b in enumerate(bins):
+            for col, value in b['static'].items():
+                if col in index:
+                    X[i, index[col]] = value
+        return X
+
+    @staticmethod
+    def _set_time_features(X: np.ndarray, index: Dict[str, int], times: pd.DataFrame) -> None:
+        for col in TIME_COLUMNS:
+            if col in index:
+                X[:, index[col]] = times[col].to_numpy(dtype=float)
+
+    @staticmethod
+    def _set_dynamic_features(X: np.ndarray, index: Dict[str, int], rings: FillRings,
+                              rows: np.ndarray, rate_values) -> None:
+        """Lag, rolling and rate columns; unavailable ones stay 0 as in predict()"""
+        for lag in LAGS:
+            slot = index.get(f'{TARGET}_lag_{lag}')
+            if slot is not None:
+                X[:, slot] = rings.ago(lag)
+
+        for w in WINDOWS:
+            mean_slot = index.get(f'{TARGET}_rolling_mean_{w}')
+            std_slot = index.get(f'{TARGET}_rolling_std_{w}')
+            if mean_slot is None and std_slot is None:
+                continue
+            available = rows >= w
+            mean, std = rings.rolling(w)
+            if mean_slot is not None:
+                X[:, mean_slot] = np.where(available, mean, 0.0)
+            if std_slot is not None:
+                X[:, std_slot] = np.where(available, std, 0.0)
+
+        available = rows >= 2
+        for col, value in zip(('time_diff_hours', 'fill_change', 'fill_rate'), rate_values):
+            slot = index.get(col)
+            if slot is not None:
+                X[:, slot] = np.where(available, value, 0.0)
+
+    @staticmethod
+    def _model_groups(bins: List[Dict], columns: List[str]) -> Dict:
+        """Stacked linear coefficients plus one predictor per distinct other model"""
+        index = {col: i for i, col in enumerate(columns)}
+        linear_rows, coefs, intercepts = [], [], []
+        shared = OrderedDict()  # (id(model), feature columns) -> (rows, cols, predictor)
+
+        for i, b in enumerate(bins):
+            model, feature_columns = b['model'], b['feature_columns']
+            cols = [index[col] for col in feature_columns]
+            if hasattr(model, 'coef_') and np.ndim(model.coef_) == 1:
+                coef = np.zeros(len(columns))
+                coef[cols] = model.coef_
+                linear_rows.append(i)
+                coefs.append(coef)
+                intercepts.append(float(np.ravel(model.intercept_)[0]))
+                continue
+            key = (id(model), tuple(feature_columns))
+            if key not in shared:
+                shared[key] = ([], np.array(cols), batch_predictor(model, feature_columns))
+            shared[key][0].append(i)
+
+        return {
+            'linear': (np.array(linear_rows, dtype=int), np.array(coefs), np.array(intercepts)),
+            'shared': [(np.array(rows), cols, predict) for rows, cols, predict in shared.values()]
+        }
+
+    @staticmethod
+    def _predict(groups: Dict, X: np.ndarray) -> np.ndarray:
+        predicted = np.empty(len(X))
+        rows, coefs, intercepts = groups['linear']
+        if len(rows):
+            predicted[rows] = np.einsum('ij,ij->i', X[rows], coefs) + intercepts
+        for rows, cols, predict in groups['shared']:
+            predicted[rows] = predict(X[np.ix_(rows, cols)])
+        return predicted
+
+
+def recursive_forecast(model, feature_columns: List[str], history: pd.DataFrame,
+                       bin_info: Dict, hours_ahead: int) -> np.ndarray:
+    """
+    Recursive forecast for a single bin
+
+    Args:
+        model: Fitted regressor
+        feature_columns: Column order the model was trained with
+        history: Prepared DataFrame (timestamp, fill level, sensor columns)
+        bin_info: Dictionary with bin metadata
+        hours_ahead: Number of hourly steps
+
+    Returns:
+        Clipped (unrounded) predictions, one per hour
+    """
+    batch = ForecastBatch(hours_ahead)
+    batch.add(
+        model, feature_columns,
+        fills=history[TARGET].to_numpy(dtype=float),
+        history_rows=len(history),
+        last_time=history['timestamp'].iloc[-1],
+        exogenous={col: history[col].iloc[-1] for col in EXOGENOUS_COLUMNS if col in history.columns},
+        bin_info=bin_info
+    )
+    return batch.recursive()[0]
@@ -0,0 +1,341 @@
+"""
+Precomputed forecasts
+A background scheduler keeps one forecast per bin and model in bin_forecasts;
+forecasting reads are served from it while fresh and computed live otherwise
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Bin, BinForecast, BinLatestState
+from app.utils.database import SessionLocal
+from app.ml.batch_forecaster import forecast_bins
+from app.ml.fill_level_forecaster import forecast_result
+
+# Hours precomputed per bin; shorter requests are served from the head of the curve
+FORECAST_HORIZON_HOURS = 168
+# Precomputed models as model_type or model_type:strategy, e.g. "forest,global,linear:direct"
+SCHEDULED_MODELS = [
+    tuple(entry.split(':')) if ':' in entry else (entry, 'recursive')
+    for entry in os.getenv('FORECAST_SCHEDULE_MODELS', 'forest').split(',') if entry
+]
+# Full refresh of every bin
+FORECAST_REFRESH_SECONDS = int(os.getenv('FORECAST_REFRESH_SECONDS', '900'))
+# Refresh of bins whose forecast went stale since the last cycle
+FORECAST_POLL_SECONDS = int(os.getenv('FORECAST_POLL_SECONDS', '30'))
+# Older forecasts are not served even without new readings
+FORECAST_MAX_AGE_SECONDS = int(os.getenv('FORECAST_MAX_AGE_SECONDS', str(2 * FORECAST_REFRESH_SECONDS)))
+# A newer reading this far (fill percentage points) from the forecast makes it stale
+SIGNIFICANT_CHANGE = 5.0
+# Bins per forecast_bins call and commit during a refresh
+REFRESH_CHUNK_BINS = 500
+
+
+def expected_fill(forecast: BinForecast, at: datetime) -> float:
+    """Fill level the forecast expects at a time, interpolated between hours"""
+    hours = (at - forecast.current_time).total_seconds() / 3600
+    curve = [forecast.current_fill_level] + list(forecast.hourly_forecast)
+    return float(np.interp(hours, np.arange(len(curve)), curve))
+
+
+def is_fresh(forecast: BinForecast, latest: Optional[BinLatestState], now: datetime) -> bool:
+    """
+    A forecast is fresh while younger than FORECAST_MAX_AGE_SECONDS and no
+    reading since its start strays SIGNIFICANT_CHANGE from its curve (e.g.
+    a collection emptying the bin)
+    """
+    if now - forecast.generated_at > timedelta(seconds=FORECAST_MAX_AGE_SECONDS):
+        return False
+    if latest is None or latest.reading_timestamp is None or latest.reading_timestamp <= forecast.current_time:
+        return True
+    return abs(latest.fill_level_percent - expected_fill(forecast, latest.reading_timestamp)) <= SIGNIFICANT_CHANGE
+
+
+class ForecastStore:
+    """
+    Reads and writes of bin_forecasts, with counters of forecasts served
+    from the table and of requests left to live computation
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.served = 0
+        self.live = 0
+
+    def get(self, db: Session, bin_ids: List[str], model_type: str, strategy: str,
+            hours_ahead: int) -> Dict[str, Dict]:
+        """
+        Fresh precomputed forecasts for bins
+
+        Args:
+            db: Database session
+            bin_ids: Bins to look up
+            model_type: Model the forecast was made with
+            strategy: recursive or direct
+            hours_ahead: Hours to predict ahead
+
+        Returns:
+            Prediction dictionaries in the format of FillLevelForecaster.predict
+            plus generated_at, keyed by bin_id; bins without a fresh forecast
+            are absent and left to the caller to compute
+        """
+        found = {}
+        if hours_ahead <= FORECAST_HORIZON_HOURS:
+            rows = db.query(BinForecast, BinLatestState).outerjoin(
+                BinLatestState, BinLatestState.bin_id == BinForecast.bin_id
+            ).filter(
+                BinForecast.bin_id.in_(bin_ids),
+                BinForecast.model_type == model_type,
+                BinForecast.strategy == strategy
+            ).all()
+
+            now = datetime.utcnow()
+            for forecast, latest in rows:
+                if not is_fresh(forecast, latest, now):
+                    continue
+                prediction = forecast_result(
+                    forecast.bin_id, forecast.model_type, forecast.strategy, forecast.current_fill_level,
+                    forecast.current_time, np.asarray(forecast.hourly_forecast[:hours_ahead])
+                )
+                prediction['generated_at'] = forecast.generated_at
+                found[forecast.bin_id] = prediction
+
+        with self._lock:
+            self.served += len(found)
+            self.live += len(bin_ids) - len(found)
+        return found
+
+    def refresh(self, db: Session, model_type: str, strategy: str,
+                bin_ids: Optional[Iterable[str]] = None, stop: Optional[threading.Event] = None) -> int:
+        """
+        Recompute and store forecasts for bins (all bins if None)
+
+        Bins the batch forecaster skips (no trained model, too little
+        history) keep no row. Once stop is set, the refresh ends after the
+        current chunk; bins not reached keep their stored forecasts.
+
+        Returns:
+            Number of forecasts written
+        """
+        # Imported here: the routes module imports this one
+        from app.routes.forecasting import get_bin_info
+
+        query = db.query(Bin).order_by(Bin.id)
+        if bin_ids is not None:
+            bin_ids = list(bin_ids)
+            if not bin_ids:
+                return 0
+            query = query.filter(Bin.bin_id.in_(bin_ids))
+        bins = query.all()
+
+        written = 0
+        for start in range(0, len(bins), REFRESH_CHUNK_BINS):
+            if stop is not None and stop.is_set():
+                break
+            chunk = bins[start:start + REFRESH_CHUNK_BINS]
+            predictions = forecast_bins(
+                db, {bin.bin_id: get_bin_info(bin) for bin in chunk},
+                FORECAST_HORIZON_HOURS, model_type, strategy
+            )
+            now = datetime.utcnow()
+            rows = [
+                {
+                    'bin_id': prediction['bin_id'],
+                    'model_type': model_type,
+                    'strategy': strategy,
+                    'current_fill_level': float(prediction['current_fill_level']),
+                    'current_time': pd.Timestamp(prediction['current_time']).to_pydatetime(),
+                    'hourly_forecast': [p['predicted_fill_level'] for p in prediction['hourly_predictions']],
+                    'hours_until_full': prediction['hours_until_full'],
+                    'predicted_full_time': pd.Timestamp(prediction['predicted_full_time']).to_pydatetime()
+                    if prediction['predicted_full_time'] is not None else None,
+                    'generated_at': now
+                }
+                for prediction in predictions
+            ]
+            self.invalidate(db, [bin.bin_id for bin in chunk], model_type, strategy)
+            if rows:
+                db.execute(insert(BinForecast), rows)
+            db.commit()
+            written += len(rows)
+        return written
+
+    @staticmethod
+    def invalidate(db: Session, bin_ids: Optional[List[str]] = None, model_type: Optional[str] = None,
+                   strategy: Optional[str] = None) -> None:
+        """Drop stored forecasts (of every bin, model or strategy when not given); the caller commits"""
+        query = db.query(BinForecast)
+        if bin_ids is not None:
+            query = query.filter(BinForecast.bin_id.in_(bin_ids))
+        if model_type is not None:
+            query = query.filter(BinForecast.model_type == model_type)
+        if strategy is not None:
+            query = query.filter(BinForecast.strategy == strategy)
+        query.delete(synchronize_session=False)
+
+    @staticmethod
+    def stale_bin_ids(db: Session, model_type: str, strategy: str) -> List[str]:
+        """Bins whose stored forecast is no longer fresh"""
+        rows = db.query(BinForecast, BinLatestState).outerjoin(
+            BinLatestState, BinLatestState.bin_id == BinForecast.bin_id
+        ).filter(
+            BinForecast.model_type == model_type,
+            BinForecast.strategy == strategy
+        ).all()
+        now = datetime.utcnow()
+        return [forecast.bin_id for forecast, latest in rows if not is_fresh(forecast, latest, now)]
+
+    def stats(self, db: Session) -> Dict:
+        ages = db.query(
+            func.count(BinForecast.id), func.min(BinForecast.generated_at)
+        ).one()
+        with self._lock:
+            lookups = self.served + self.live
+            return {
+                'forecasts': ages[0],
+                'oldest_generated_at': ages[1].isoformat() if ages[1] else None,
+                'served': self.served,
+                'live': self.live,
+                'served_rate': round(self.served / lookups, 4) if lookups else None
+            }
+
+
+class ForecastScheduler:
+    """
+    Background thread refreshing bin_forecasts
+
+    Every FORECAST_REFRESH_SECONDS it recomputes every bin's forecasts; in
+    between, every FORECAST_POLL_SECONDS, only bins whose forecast went stale
+    or whose models were retrained (request_refresh).
+    """
+
+    def __init__(self, store: ForecastStore, models: List[Tuple[str, str]] = SCHEDULED_MODELS,
+                 refresh_seconds: int = FORECAST_REFRESH_SECONDS, poll_seconds: int = FORECAST_POLL_SECONDS):
+        self.store = store
+        self.models = models
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        self._cycle_lock = threading.Lock()  # one cycle at a time
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = set()  # bins to refresh next cycle
+        self._pending_all = False
+        self._last_full = None  # monotonic time of the last full refresh
+        self.cycles = 0
+        self.failed_cycles = 0
+        self.last_error = None
+        self.last_cycle_at = None
+        self.last_cycle_seconds = None
+        self.last_cycle_forecasts = 0
+        self.total_cycle_seconds = 0.0
+        self.last_full_refresh_at = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread; a running cycle ends after its current chunk"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def request_refresh(self, bin_ids: Optional[Iterable[str]] = None):
+        """Refresh these bins (all bins if None) on the next cycle"""
+        with self._pending_lock:
+            if bin_ids is None:
+                self._pending_all = True
+            else:
+                self._pending.update(bin_ids)
+
+    def _loop(self):
+        self.run_cycle(full=True)
+        while not self._stop.wait(self.poll_seconds):
+            due = time.monotonic() - self._last_full >= self.refresh_seconds
+            self.run_cycle(full=due)
+
+    def run_cycle(self, full: bool = True) -> int:
+        """
+        One refresh cycle: every bin, or only stale and requested ones
+
+        Returns:
+            Number of forecasts written
+        """
+        with self._pending_lock:
+            full = full or self._pending_all
+            pending, self._pending, self._pending_all = self._pending, set(), False
+
+        with self._cycle_lock:
+            if full:
+                self._last_full = time.monotonic()
+
+            start = time.perf_counter()
+            db = SessionLocal()
+            written = 0
+            try:
+                for model_type, strategy in self.models:
+                    if self._stop.is_set():
+                        break
+                    bin_ids = None
+                    if not full:
+                        bin_ids = pending | set(self.store.stale_bin_ids(db, model_type, strategy))
+                    written += self.store.refresh(db, model_type, strategy, bin_ids, self._stop)
+                self.last_error = None
+            except Exception as e:
+                db.rollback()
+                self.failed_cycles += 1
+                self.last_error = str(e)
+            finally:
+                db.close()
+
+            elapsed = time.perf_counter() - start
+            self.cycles += 1
+            self.total_cycle_seconds += elapsed
+            self.last_cycle_seconds = elapsed
+            self.last_cycle_forecasts = written
+            self.last_cycle_at = datetime.utcnow()
+            if full:
+                self.last_full_refresh_at = self.last_cycle_at
+            return written
+
+    def stats(self, db: Session) -> Dict:
+        """
+        Scheduler and table metrics: cycle counts and durations, and the
+        refresh lag (age of the oldest stored forecast)
+        """
+        store = self.store.stats(db)
+        oldest = store.pop('oldest_generated_at')
+        lag = (datetime.utcnow() - datetime.fromisoformat(oldest)).total_seconds() if oldest else None
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'models': [f'{model_type}:{strategy}' for model_type, strategy in self.models],
+            'refresh_seconds': self.refresh_seconds,
+            'poll_seconds': self.poll_seconds,
+            'cycles': self.cycles,
+            'failed_cycles': self.failed_cycles,
+            'last_error': self.last_error,
+            'last_cycle_at': self.last_cycle_at.isoformat() if self.last_cycle_at else None,
+            'last_cycle_seconds': round(self.last_cycle_seconds, 4) if self.last_cycle_seconds is not None else None,
+            'mean_cycle_seconds': round(self.total_cycle_seconds / self.cycles, 4) if self.cycles else None,
+            'last_cycle_forecasts': self.last_cycle_forecasts,
+            'last_full_refresh_at': self.last_full_refresh_at.isoformat() if self.last_full_refresh_at else None,
+            'refresh_lag_seconds': round(lag, 1) if lag is not None else None,
+            **store
+        }
+
+
+forecast_store = ForecastStore()
+forecast_scheduler = ForecastScheduler(forecast_store)
@@ -0,0 +1,329 @@
+"""
+Global Forecasting Model
+One model pooled across all bins, conditioned on bin metadata and per-bin
+statistics, with per-bin models kept only where they measurably win
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from app.ml.fill_level_forecaster import (
+    FillLevelForecaster, MODEL_DIR, WARMUP_ROWS, forecast_result, lookback_readings
+)
+from app.ml.forecast_engine import CONTEXT_ROWS, EXOGENOUS_COLUMNS, TARGET, ForecastBatch
+from app.ml.model_registry import dump_artifact, model_registry
+
+GLOBAL_MODEL_ID = 'global'
+GLOBAL_MODEL_TYPES = ['gbm', 'forest']
+# Pooled model trained by default, and served for model_type=global until
+# one is trained; after that the type trained last is served
+DEFAULT_GLOBAL_MODEL_TYPE = os.getenv('GLOBAL_MODEL_TYPE', 'gbm')
+# A per-bin model replaces the global one only if it cuts holdout MAE by this fraction
+FALLBACK_MIN_GAIN = 0.10
+PER_BIN_MODEL_TYPES = ['linear', 'tree', 'forest']
+# Longest stretch of each bin's holdout scored by recursive forecasts
+HOLDOUT_HOURS = 168
+# Latest readings per bin the pooled model trains on, so a training job's
+# memory is bounded however long the bins' histories grow
+GLOBAL_TRAINING_READINGS = int(os.getenv('GLOBAL_TRAINING_READINGS', '2000'))
+
+
+def bin_statistics(timestamps: np.ndarray, fills: np.ndarray) -> Dict[str, float]:
+    """
+    Per-bin features summarising the most recent CONTEXT_ROWS prepared rows
+
+    Args:
+        timestamps: datetime64 reading times, oldest first
+        fills: Fill levels aligned with timestamps
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[us]')[-CONTEXT_ROWS:]
+    fills = np.asarray(fills, dtype=float)[-CONTEXT_ROWS:]
+    hours = np.diff(timestamps).astype('timedelta64[us]').astype(np.int64) / 3.6e9
+    changes = np.diff(fills)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(hours != 0, changes / hours, 0.0)
+
+    return {
+        'bin_mean_fill': float(fills.mean()),
+        'bin_std_fill': float(fills.std()),
+        'bin_mean_fill_rate': float(rates.mean()) if len(rates) else 0.0,
+        'bin_median_interval_hours': float(np.median(hours)) if len(hours) else 0.0
+    }
+
+
+class GlobalForecaster:
+    """Single fill-level model shared by every bin"""
+
+    def __init__(self, model_type: str = DEFAULT_GLOBAL_MODEL_TYPE):
+        self.model_type = model_type
+        self.model = None
+        self.feature_columns = []
+        self.fallback_bins = {}  # bin_id -> per-bin model type that beat the global model
+        self.metrics = {}
+        self.holdout_maes = {}  # bin_id -> {'global' or per-bin model type: recursive MAE}
+        self.lookback = None  # latest readings a prediction needs (lookback_readings)
+        self.model_dir = MODEL_DIR
+        self._helper = FillLevelForecaster(GLOBAL_MODEL_ID)
+
+    def _new_model(self):
+        if self.model_type == 'gbm':
+            return HistGradientBoostingRegressor(max_iter=300, learning_rate=0.1, random_state=42)
+        return FillLevelForecaster._new_model('forest')
+
+    def prepare_bin(self, readings: List, bin_info: Dict) -> pd.DataFrame:
+        """Per-bin prepared data (FillLevelForecaster.prepare_data)"""
+        return self._helper.prepare_data(readings, bin_info)
+
+    @staticmethod
+    def _with_statistics(df: pd.DataFrame, stats: Dict[str, float]) -> pd.DataFrame:
+        df = df.copy()
+        for col, value in stats.items():
+            df[col] = value
+        return df
+
+    def train(self, bins: Iterable[Tuple[str, List, Dict]], compare_per_bin: bool = True) -> Dict:
+        """
+        Train the pooled model on every bin's history
+
+        Each bin contributes its first 80% of rows to training and the rest
+        to the holdout; per-bin statistics come from the training part only.
+        Besides one-step metrics, each bin's holdout is forecast recursively
+        from the split point, as served. With compare_per_bin, bins whose
+        saved per-bin model beats the global one on that recursive holdout
+        MAE by FALLBACK_MIN_GAIN keep using it.
+
+        Args:
+            bins: (bin_id, readings, bin_info) per bin
+            compare_per_bin: Evaluate saved per-bin models for fallback
+
+        Returns:
+            Dictionary with training metrics
+        """
+        start = time.perf_counter()
+        train_frames, test_frames, holdouts = [], [], []
+        readings_per_row = 1.0
+
+        for bin_id, readings, bin_info in bins:
+            df = self.prepare_bin(readings, bin_info)
+            if len(df) < 10:
+                continue
+            # The bin with the most readings per prepared row sizes the lookback
+            readings_per_row = max(readings_per_row, len(readings) / (len(df) + WARMUP_ROWS))
+            split_idx = int(len(df) * 0.8)
+            train, test = df.iloc[:split_idx], df.iloc[split_idx:]
+            stats = bin_statistics(train['timestamp'].to_numpy(), train[TARGET].to_numpy())
+            train_frames.append(self._with_statistics(train, stats))
+            test_frames.append(self._with_statistics(test, stats))
+            holdouts.append((bin_id, train, test, bin_info))
+
+        if not train_frames:
+            return {'error': 'Insufficient data for training'}
+
+        pooled_train = pd.concat(train_frames, ignore_index=True)
+        pooled_test = pd.concat(test_frames, ignore_index=True)
+        self.feature_columns = [
+            col for col in pooled_train.columns if col not in [TARGET, 'timestamp']
+        ]
+
+        self.model = self._new_model()
+        self.model.fit(pooled_train[self.feature_columns], pooled_train[TARGET])
+        self.lookback = lookback_readings(GLOBAL_MODEL_ID, readings_per_row)
+        train_seconds = time.perf_counter() - start
+
+        y_pred = np.clip(self.model.predict(pooled_test[self.feature_columns]), 0, 100)
+        self.metrics = self._helper._evaluate_model(pooled_test[TARGET].to_numpy(), y_pred)
+
+        self.holdout_maes = self._holdout_maes(holdouts, compare_per_bin)
+        self.fallback_bins = {}
+        for bin_id, maes in self.holdout_maes.items():
+            per_bin = {k: v for k, v in maes.items() if k != 'global'}
+            if per_bin and 'global' in maes:
+                best_type = min(per_bin, key=per_bin.get)
+                if per_bin[best_type] < maes['global'] * (1 - FALLBACK_MIN_GAIN):
+                    self.fallback_bins[bin_id] = best_type
+
+        scored = {bin_id: maes for bin_id, maes in self.holdout_maes.items() if 'global' in maes}
+        global_maes = [maes['global'] for maes in scored.values()]
+        served = [maes[self.fallback_bins.get(bin_id, 'global')] for bin_id, maes in scored.items()]
+        self.metrics.update({
+            'bins': len(train_frames),
+            'train_rows': len(pooled_train),
+            'train_seconds': round(train_seconds, 2),
+            'holdout_mae': round(float(np.mean(global_maes)), 4) if scored else None,
+            'holdout_mae_with_fallback': round(float(np.mean(served)), 4) if scored else None,
+            'fallback_bins': len(self.fallback_bins)
+        })
+
+        self._save()
+        return self.metrics
+
+    def _holdout_maes(self, holdouts: List[Tuple[str, pd.DataFrame, pd.DataFrame, Dict]],
+                      compare_per_bin: bool) -> Dict[str, Dict[str, float]]:
+        """
+        Recursive forecast MAE of each bin's holdout, for the global model
+        and (with compare_per_bin) every saved per-bin model, in one batch
+
+        Forecasts start at the last training row and are interpolated to
+        the holdout readings' times within HOLDOUT_HOURS.
+        """
+        batch = ForecastBatch(HOLDOUT_HOURS)
+        scored = []
+
+        for bin_id, train, test, bin_info in holdouts:
+            fills = train[TARGET].to_numpy(dtype=float)
+            times = train['timestamp'].to_numpy()
+            exogenous = train[EXOGENOUS_COLUMNS].iloc[-1].to_dict()
+            offsets = ((test['timestamp'] - train['timestamp'].iloc[-1]) / pd.Timedelta(hours=1)).to_numpy()
+            within = offsets <= HOLDOUT_HOURS
+            target = (offsets[within], test[TARGET].to_numpy()[within])
+
+            candidates = [('global', None)]
+            if compare_per_bin:
+                forecaster = FillLevelForecaster(bin_id)
+                forecaster._load_models(PER_BIN_MODEL_TYPES)
+                # Models on the hourly grid cannot be scored on these raw-row features
+                candidates += [
+                    (model_type, forecaster) for model_type in forecaster.models
+                    if not forecaster.model_preprocessing[model_type]
+                ]
+
+            for name, forecaster in candidates:
+                try:
+                    if forecaster is None:
+                        self.add_to_batch(batch, fills, len(train), times, exogenous, bin_info)
+                    else:
+                        batch.add(forecaster.models[name], forecaster.model_features[name], fills,
+                                  len(train), times[-1], exogenous, bin_info)
+                except ValueError:
+                    continue
+                scored.append((bin_id, name) + target)
+
+        maes = {}
+        if not scored:
+            return maes
+        hours = np.arange(1, HOLDOUT_HOURS + 1)
+        for (bin_id, name, offsets, y_true), forecast in zip(scored, batch.recursive()):
+            if len(y_true):
+                predicted = np.interp(offsets, hours, forecast)
+                maes.setdefault(bin_id, {})[name] = float(np.mean(np.abs(y_true - predicted)))
+        return maes
+
+    def _paths(self) -> Tuple[str, str]:
+        base = os.path.join(self.model_dir, f'{GLOBAL_MODEL_ID}_{self.model_type}')
+        return f'{base}.joblib', f'{base}_meta.joblib'
+
+    @staticmethod
+    def _active_path() -> str:
+        return os.path.join(MODEL_DIR, f'{GLOBAL_MODEL_ID}_active.joblib')
+
+    @classmethod
+    def active_model_type(cls) -> str:
+        """Pooled model type served for model_type=global: the one trained last"""
+        active = model_registry.get(GLOBAL_MODEL_ID, 'active', cls._active_path())
+        return active or DEFAULT_GLOBAL_MODEL_TYPE
+
+    def _save(self):
+        """Save the pooled model and its metadata to disk, and serve it from now on"""
+        model_path, meta_path = self._paths()
+        meta = {
+            'feature_columns': self.feature_columns,
+            'fallback_bins': self.fallback_bins,
+            'metrics': self.metrics,
+            'lookback': self.lookback
+        }
+        # Replaced rather than rewritten: the API process may be loading them
+        dump_artifact(self.model, model_path)
+        dump_artifact(meta, meta_path)
+        model_registry.put(GLOBAL_MODEL_ID, self.model_type, model_path, self.model)
+        model_registry.put(GLOBAL_MODEL_ID, f'{self.model_type}_meta', meta_path, meta)
+        # Switched last, once the model it points to is in place
+        dump_artifact(self.model_type, self._active_path())
+        model_registry.put(GLOBAL_MODEL_ID, 'active', self._active_path(), self.model_type)
+
+    @classmethod
+    def load(cls, model_type: Optional[str] = None) -> Optional['GlobalForecaster']:
+        """
+        Load a trained pooled model through the model registry, or None
+
+        Args:
+            model_type: gbm or forest (default: the served type, active_model_type)
+        """
+        model_type = model_type or cls.active_model_type()
+        forecaster = cls(model_type)
+        model_path, meta_path = forecaster._paths()
+        model = model_registry.get(GLOBAL_MODEL_ID, model_type, model_path)
+        meta = model_registry.get(GLOBAL_MODEL_ID, f'{model_type}_meta', meta_path)
+        if model is None or meta is None:
+            return None
+        forecaster.model = model
+        forecaster.feature_columns = meta['feature_columns']
+        forecaster.fallback_bins = meta['fallback_bins']
+        forecaster.metrics = meta['metrics']
+        forecaster.lookback = meta.get('lookback')
+        return forecaster
+
+    def bin_lookback(self, bin_id: str) -> Optional[int]:
+        """
+        Latest readings a prediction for the bin needs: enough for the global
+        model and for the bin's fallback model, which predict() may use
+        (None if either was trained before lookbacks were recorded)
+        """
+        needed = [self.lookback]
+        if bin_id in self.fallback_bins:
+            needed.append(FillLevelForecaster(bin_id).lookback(self.fallback_bins[bin_id]))
+        return None if None in needed else max(needed)
+
+    def predict(self, bin_id: str, readings: List, bin_info: Dict, hours_ahead: int = 24) -> Dict:
+        """
+        Recursive forecast for one bin, using its per-bin model if it was
+        selected as a fallback
+
+        Returns:
+            Dictionary with predictions, as FillLevelForecaster.predict
+        """
+        if bin_id in self.fallback_bins:
+            prediction = FillLevelForecaster(bin_id).predict(
+                readings, bin_info, hours_ahead, self.fallback_bins[bin_id]
+            )
+            # A per-bin model deleted since training falls through to the global model
+            if 'error' not in prediction:
+                return prediction
+
+        df = self.prepare_bin(readings, bin_info)
+        if df.empty:
+            return {'error': 'Insufficient data for prediction'}
+
+        batch = ForecastBatch(hours_ahead)
+        try:
+            self.add_to_batch(batch, df[TARGET].to_numpy(dtype=float), len(df),
+                              df['timestamp'].to_numpy(), df[EXOGENOUS_COLUMNS].iloc[-1].to_dict(), bin_info)
+        except ValueError as e:
+            return {'error': str(e)}
+
+        return forecast_result(
+            bin_id, 'global', 'recursive', df[TARGET].iloc[-1], df['timestamp'].iloc[-1],
+            batch.recursive()[0]
+        )
+
+    def add_to_batch(self, batch: ForecastBatch, fills: np.ndarray, history_rows: int,
+                     timestamps: np.ndarray, exogenous: Dict, bin_info: Dict) -> None:
+        """
+        Queue a bin on a ForecastBatch with the pooled model; every bin added
+        this way shares one model call per step
+
+        Args:
+            fills, timestamps: Fill levels and times of the bin's prepared
+                rows (the last history_rows of them)
+        """
+        stats = bin_statistics(timestamps[-history_rows:], fills[-history_rows:])
+        batch.add(
+            self.model, self.feature_columns, fills, history_rows,
+            last_time=pd.Timestamp(timestamps[-1]),
+            exogenous={**exogenous, **stats},
+            bin_info=bin_info
+        )
@@ -0,0 +1,117 @@
+"""
+Hyperparameter search for the tree and forest forecasters
+Samples candidate configurations from a small grid and scores them with
+time-series cross-validation, pruning the worse half after every fold, so
+most of the budget goes to the candidates still in contention
+"""
+
+import math
+import os
+import random
+from typing import Callable, Dict, List
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+
+SEARCH_SPACES = {
+    'tree': {
+        'max_depth': [5, 8, 10, 15, None],
+        'min_samples_split': [2, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 4, 8]
+    },
+    'forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [8, 12, 15, None],
+        'min_samples_split': [2, 5, 10],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': [1.0, 0.5, 'sqrt']
+    }
+}
+TUNABLE_MODEL_TYPES = list(SEARCH_SPACES)
+
+# Configurations tried per model, the current one included
+TUNING_CANDIDATES = int(os.getenv('TUNING_CANDIDATES', '12'))
+# Expanding-window folds (TimeSeriesSplit); later folds train on more rows
+TUNING_SPLITS = int(os.getenv('TUNING_SPLITS', '4'))
+# Fewest rows in a fold's test window
+MIN_TEST_ROWS = 5
+
+
+def sample_candidates(model_type: str, current: Dict, count: int = TUNING_CANDIDATES, seed: int = 0) -> List[Dict]:
+    """
+    The current configuration followed by count - 1 distinct others drawn
+    from the model type's search space
+
+    Args:
+        model_type: tree or forest
+        current: Parameters the model is trained with now (searched keys only)
+    """
+    current = {key: current[key] for key in SEARCH_SPACES[model_type]}
+    others = [params for params in ParameterGrid(SEARCH_SPACES[model_type]) if params != current]
+    return [current] + random.Random(seed).sample(others, min(count - 1, len(others)))
+
+
+def _fold_mae(model, X: np.ndarray, y: np.ndarray, train: np.ndarray, test: np.ndarray) -> float:
+    model.fit(X[train], y[train])
+    predicted = np.clip(model.predict(X[test]), 0, 100)
+    return float(np.mean(np.abs(predicted - y[test])))
+
+
+def search(make_model: Callable[[Dict], object], candidates: List[Dict], X, y,
+           splits: int = TUNING_SPLITS, n_jobs: int = 1) -> Dict:
+    """
+    Successive-halving search over time-series folds
+
+    Every candidate is scored on the first (smallest) fold; after each fold
+    only the better half by mean MAE so far goes on to the next. Candidates
+    still alive have been scored on the same folds, so they are compared on
+    equal terms; the best after the last fold wins.
+
+    Args:
+        make_model: Unfitted estimator for a parameter dict
+        candidates: Parameter dicts (sample_candidates)
+        X: Training features, in time order
+        y: Training targets (one column per horizon for direct models)
+        splits: TimeSeriesSplit folds, reduced for short histories
+        n_jobs: Candidates fitted at once (threads; -1 for every core).
+            With more than one, each estimator is kept to one thread.
+
+    Returns:
+        The winning parameters with their cross-validated MAE, the current
+        configuration's MAE (candidates[0], None if pruned before the last
+        fold), and the candidates and fits run; or {'error': ...}
+    """
+    X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+    splits = min(splits, len(X) // MIN_TEST_ROWS - 1)
+    if splits < 2:
+        return {'error': 'Insufficient training data for cross-validation'}
+    folds = list(TimeSeriesSplit(n_splits=splits).split(X))
+
+    def model(params):
+        estimator = make_model(params)
+        if n_jobs != 1 and 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+        return estimator
+
+    scores = {i: [] for i in range(len(candidates))}
+    alive = list(scores)
+    fits = 0
+    with Parallel(n_jobs=n_jobs, prefer='threads') as parallel:
+        for k, (train, test) in enumerate(folds):
+            maes = parallel(delayed(_fold_mae)(model(candidates[i]), X, y, train, test) for i in alive)
+            fits += len(alive)
+            for i, mae in zip(alive, maes):
+                scores[i].append(mae)
+            if k < len(folds) - 1:
+                alive = sorted(alive, key=lambda i: np.mean(scores[i]))[:math.ceil(len(alive) / 2)]
+
+    best = min(alive, key=lambda i: np.mean(scores[i]))
+    return {
+        'params': candidates[best],
+        'cv_mae': round(float(np.mean(scores[best])), 3),
+        'current_cv_mae': round(float(np.mean(scores[0])), 3) if 0 in alive else None,
+        'candidates': len(candidates),
+        'folds': len(folds),
+        'fits': fits
+    }
@@ -0,0 +1,151 @@
+"""
+Process-wide cache of trained models loaded from disk
+LRU-bounded by entry count and approximate size, invalidated by file mtime
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+
+# Sized for /predictions-batch (up to 5000 bins per request, raised from 256
+# so such requests don't thrash the cache); DEFAULT_MAX_BYTES bounds memory
+DEFAULT_MAX_ENTRIES = int(os.getenv("MODEL_REGISTRY_MAX_ENTRIES", "4096"))
+DEFAULT_MAX_BYTES = int(os.getenv("MODEL_REGISTRY_MAX_MB", "512")) * 1024 * 1024
+
+
+class ModelRegistry:
+    """
+    LRU cache of joblib artifacts keyed by (bin_id, artifact)
+
+    An entry remembers the (mtime_ns, size) of the file it was loaded from;
+    a lookup stats the file and reloads when it changed, so models rewritten
+    by _save_models (in this or another process) are picked up. Sizes are
+    approximated by the on-disk pickle size.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (version, size, obj)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.load_seconds = 0.0
+
+    @staticmethod
+    def _version(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, bin_id: str, artifact: str, path: str, mmap_mode: Optional[str] = None) -> Optional[Any]:
+        """
+        Return the artifact stored at path, loading it on a miss
+
+        Args:
+            mmap_mode: joblib mmap_mode; 'r' memory-maps the artifact's
+                arrays instead of reading them into the heap
+
+        Returns:
+            The loaded object, or None if the file does not exist
+        """
+        key = (bin_id, artifact)
+        version = self._version(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if version is not None and entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                # File rewritten or removed since it was cached
+                self._drop(key)
+                self.invalidations += 1
+            if version is None:
+                return None
+            self.misses += 1
+
+        start = time.perf_counter()
+        obj = joblib.load(path, mmap_mode=mmap_mode)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.load_seconds += elapsed
+            self._store(key, version, obj)
+        return obj
+
+    def put(self, bin_id: str, artifact: str, path: str, obj: Any) -> None:
+        """Cache an object that was just written to path"""
+        version = self._version(path)
+        if version is None:
+            return
+        with self._lock:
+            if (bin_id, artifact) in self._entries:
+                self._drop((bin_id, artifact))
+            self._store((bin_id, artifact), version, obj)
+
+    def invalidate(self, bin_id: Optional[str] = None) -> None:
+        """Drop one bin's artifacts, or everything"""
+        with self._lock:
+            keys = [k for k in self._entries if bin_id is None or k[0] == bin_id]
+            for key in keys:
+                self._drop(key)
+
+    def _store(self, key, version, obj) -> None:
+        size = version[1]
+        if size > self.max_bytes:
+            return  # Never cache something that would evict everything else
+        self._entries[key] = (version, size, obj)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'approx_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'load_seconds': round(self.load_seconds, 4)
+            }
+
+
+def dump_artifact(obj: Any, path: str) -> None:
+    """
+    joblib.dump through a temporary file renamed over path, so processes
+    that memory-mapped the previous file keep a valid mapping instead of
+    seeing it truncated
+    """
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# Shared by every FillLevelForecaster in the process
+model_registry = ModelRegistry()
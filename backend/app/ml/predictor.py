@@ -1,6 +1,16 @@
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Bin, BinReading
+
+# Readings per bin used by the batch predictor (matches the per-bin LIMIT 50)
+DEFAULT_WINDOW = 50
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
 
 def predict_fill_level(readings: List, hours_ahead: int = 24):
     """
@@ -68,3 +78,178 @@ def predict_fill_level(readings: List, hours_ahead: int = 24):
         "predicted_full_time": predicted_full_time,
         "hours_until_full": round(hours_until_full, 2) if hours_until_full else None
     }
+
+
+def predict_from_regression_state(state, hours_ahead: int = 24):
+    """
+    O(1) prediction from a bin's running regression sums (see
+    app.utils.regression_state); same output format as predict_fill_level
+
+    x is hours relative to the newest reading, so "now" is x = 0.
+    """
+    current = state.last_fill_level
+    if (state.reading_count or 0) < 2:
+        return {
+            "bin_id": state.bin_id,
+            "current_fill_level": current,
+            "predicted_fill_level": current,
+            "predicted_full_time": None,
+            "hours_until_full": None
+        }
+
+    w = state.weight_sum
+    x_mean = state.sum_x / w
+    y_mean = state.sum_y / w
+    variance = state.sum_xx / w - x_mean * x_mean
+    covariance = state.sum_xy / w - x_mean * state.sum_y / w
+
+    # All readings at (nearly) the same instant: no trend
+    slope = covariance / variance if variance > 1e-9 else 0
+    intercept = y_mean - slope * x_mean
+
+    predicted_fill = max(0, min(100, slope * hours_ahead + intercept))
+
+    hours_until_full = None
+    predicted_full_time = None
+    if slope > 0 and current < 100:
+        hours_until_full = (100 - current) / slope
+        predicted_full_time = state.anchor_timestamp + timedelta(hours=hours_until_full)
+
+    return {
+        "bin_id": state.bin_id,
+        "current_fill_level": round(current, 2),
+        "predicted_fill_level": round(predicted_fill, 2),
+        "predicted_full_time": predicted_full_time,
+        "hours_until_full": round(hours_until_full, 2) if hours_until_full else None
+    }
+
+
+def load_reading_windows(db: Session, window: int = DEFAULT_WINDOW, bin_filter=None) -> dict:
+    """
+    Fetch the latest `window` readings of every bin in one query
+
+    Args:
+        db: Database session
+        window: Readings per bin
+        bin_filter: Optional SQLAlchemy criterion on Bin (e.g. Bin.area_name == "X")
+
+    Returns:
+        Dictionary of contiguous arrays: bin_ids (one per bin), offsets
+        (start of each bin's run), timestamps (datetime64[us]) and
+        fill_levels, each run sorted oldest to newest
+    """
+    rn = func.row_number().over(
+        partition_by=BinReading.bin_id,
+        order_by=(BinReading.timestamp.desc(), BinReading.id.desc())
+    ).label('rn')
+    ranked = select(
+        BinReading.bin_id, BinReading.timestamp, BinReading.fill_level_percent, rn
+    ).subquery()
+
+    query = select(
+        ranked.c.bin_id, ranked.c.timestamp, ranked.c.fill_level_percent
+    ).join(Bin, Bin.bin_id == ranked.c.bin_id).where(ranked.c.rn <= window)
+    if bin_filter is not None:
+        query = query.where(bin_filter)
+    # Core execution: plain tuples without ORM row processing
+    rows = db.connection().execute(query.order_by(Bin.id, ranked.c.rn.desc())).all()
+
+    if not rows:
+        return {
+            'bin_ids': [],
+            'offsets': np.empty(0, dtype=np.int64),
+            'timestamps': np.empty(0, dtype='datetime64[us]'),
+            'fill_levels': np.empty(0, dtype=np.float64)
+        }
+
+    row_bin_ids, timestamps, fill_levels = zip(*rows)
+    starts = [0] + [i for i in range(1, len(rows)) if row_bin_ids[i] != row_bin_ids[i - 1]]
+    # Much faster than letting NumPy convert datetime objects one by one
+    micros = np.fromiter(
+        ((t - _EPOCH) // _MICROSECOND for t in timestamps), dtype=np.int64, count=len(rows)
+    )
+    return {
+        'bin_ids': [row_bin_ids[i] for i in starts],
+        'offsets': np.array(starts, dtype=np.int64),
+        'timestamps': micros.astype('datetime64[us]'),
+        'fill_levels': np.array(fill_levels, dtype=np.float64)
+    }
+
+
+def predict_fill_levels_batch(bin_ids: List[str], offsets: np.ndarray, timestamps: np.ndarray,
+                              fill_levels: np.ndarray, hours_ahead: int = 24,
+                              min_readings: int = 1) -> List[dict]:
+    """
+    Vectorized predict_fill_level over many bins at once
+
+    Readings for all bins are laid out back to back, each run sorted by
+    timestamp and starting at offsets[i]; the regression sums are computed
+    per run with np.add.reduceat.
+
+    Args:
+        bin_ids: Bin id per run
+        offsets: Start index of each run
+        timestamps: datetime64 reading times
+        fill_levels: Fill level per reading
+        hours_ahead: Prediction horizon
+        min_readings: Skip bins with fewer readings
+
+    Returns:
+        List of prediction dicts in the same format as predict_fill_level
+    """
+    if len(bin_ids) == 0:
+        return []
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(np.append(offsets, len(fill_levels)))
+    last = offsets + counts - 1
+    group = np.repeat(np.arange(len(offsets)), counts)
+
+    micros = np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64)
+    hours = (micros - micros[offsets][group]) / 3.6e9
+    fill_levels = np.asarray(fill_levels, dtype=np.float64)
+
+    x_mean = np.add.reduceat(hours, offsets) / counts
+    y_mean = np.add.reduceat(fill_levels, offsets) / counts
+    dx = hours - x_mean[group]
+    dy = fill_levels - y_mean[group]
+    numerator = np.add.reduceat(dx * dy, offsets)
+    denominator = np.add.reduceat(dx * dx, offsets)
+
+    slope = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+    intercept = y_mean - slope * x_mean
+
+    current = fill_levels[last]
+    predicted = np.clip(slope * (hours[last] + hours_ahead) + intercept, 0, 100)
+    filling = (slope > 0) & (current < 100)
+    hours_until_full = np.divide(100 - current, slope, out=np.zeros_like(slope), where=filling)
+
+    predictions = []
+    for i, bin_id in enumerate(bin_ids):
+        if counts[i] < min_readings:
+            continue
+        if counts[i] < 2:
+            predictions.append({
+                "bin_id": bin_id,
+                "current_fill_level": float(current[i]),
+                "predicted_fill_level": float(current[i]),
+                "predicted_full_time": None,
+                "hours_until_full": None
+            })
+            continue
+
+        full_in = None
+        full_time = None
+        if filling[i]:
+            full_in = float(hours_until_full[i])
+            full_time = timestamps[last[i]].astype(datetime) + timedelta(hours=full_in)
+
+        predictions.append({
+            "bin_id": bin_id,
+            "current_fill_level": round(float(current[i]), 2),
+            "predicted_fill_level": round(float(predicted[i]), 2),
+            "predicted_full_time": full_time,
+            "hours_until_full": round(full_in, 2) if full_in else None
+        })
+
+    return predictions
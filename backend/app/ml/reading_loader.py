@@ -0,0 +1,104 @@
+"""
+Reading loader for forecasting
+Selects only the columns forecasting uses and builds DataFrames straight
+from the DB-API rows, without materializing BinReading objects
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.models.database_models import BinReading
+from app.ml.data_preprocessor import READING_COLUMNS
+
+NUMERIC_COLUMNS = READING_COLUMNS[1:]
+
+
+def _columns():
+    # Timestamps come back as the driver returns them (ISO strings on SQLite)
+    # and are parsed once per column instead of once per row
+    return [
+        type_coerce(BinReading.timestamp, String).label('timestamp'),
+        BinReading.fill_level_percent, BinReading.weight_kg,
+        BinReading.temperature_c, BinReading.battery_percent
+    ]
+
+
+def _to_frame(rows: List, columns: List[str]) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], format='ISO8601')
+    frame[NUMERIC_COLUMNS] = frame[NUMERIC_COLUMNS].astype(float)
+    return frame
+
+
+def load_reading_frame(db: Session, bin_id: str, since: Optional[datetime] = None,
+                       limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    A bin's readings as a DataFrame, oldest first
+
+    Args:
+        db: Database session
+        bin_id: Bin identifier
+        since: Only readings at or after this time
+        limit: Only the latest `limit` readings
+
+    Returns:
+        DataFrame with READING_COLUMNS, accepted by DataPreprocessor.clean_readings
+    """
+    query = select(*_columns()).where(BinReading.bin_id == bin_id)
+    if since is not None:
+        query = query.where(BinReading.timestamp >= since)
+    if limit is not None:
+        # Newest first, so the scan stops after `limit` rows
+        query = query.order_by(BinReading.timestamp.desc()).limit(limit)
+    else:
+        query = query.order_by(BinReading.timestamp.asc())
+
+    # Core execution: plain tuples without ORM row processing
+    rows = db.connection().execute(query).all()
+    if limit is not None:
+        rows.reverse()
+    return _to_frame(rows, READING_COLUMNS)
+
+
+def load_reading_frames(db: Session, bin_ids: Optional[List[str]] = None,
+                        limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Readings of many bins in one query, split into one DataFrame per bin
+
+    Args:
+        db: Database session
+        bin_ids: Bins to load (all bins if None)
+        limit: Only each bin's latest `limit` readings
+
+    Returns:
+        DataFrames as load_reading_frame, keyed by bin_id; bins without
+        readings are absent
+    """
+    if limit is None:
+        query = select(BinReading.bin_id, *_columns())
+        if bin_ids is not None:
+            query = query.where(BinReading.bin_id.in_(bin_ids))
+        query = query.order_by(BinReading.bin_id, BinReading.timestamp.asc())
+    else:
+        rn = func.row_number().over(
+            partition_by=BinReading.bin_id,
+            order_by=(BinReading.timestamp.desc(), BinReading.id.desc())
+        ).label('rn')
+        ranked = select(BinReading.bin_id, *_columns(), rn)
+        if bin_ids is not None:
+            ranked = ranked.where(BinReading.bin_id.in_(bin_ids))
+        ranked = ranked.subquery()
+        query = select(
+            ranked.c.bin_id, *[ranked.c[col] for col in READING_COLUMNS]
+        ).where(ranked.c.rn <= limit).order_by(ranked.c.bin_id, ranked.c.rn.desc())
+
+    rows = db.connection().execute(query).all()
+    frame = _to_frame(rows, ['bin_id'] + READING_COLUMNS)
+    return {
+        bin_id: group[READING_COLUMNS].reset_index(drop=True)
+        for bin_id, group in frame.groupby('bin_id', sort=False)
+    }
@@ -1,16 +1,137 @@
-from geopy.distance import geodesic
 from typing import List
+import time
+import numpy as np
 import random
 
+from app.utils.distance import haversine_km
+from app.utils.distance_store import distance_store
+
+STRATEGIES = ("nearest_neighbor", "local_search")
+# Minimum gain (km) for a move to count as an improvement
+IMPROVEMENT_EPS = 1e-9
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two points in kilometers"""
-    return geodesic((lat1, lon1), (lat2, lon2)).kilometers
+    return float(haversine_km(lat1, lon1, lat2, lon2))
 
-def optimize_collection_route(vehicle_id: str, bins: List):
+def tour_length(matrix: np.ndarray, tour: np.ndarray) -> float:
+    """Length of a closed tour given as node indices (first == last)"""
+    return float(matrix[tour[:-1], tour[1:]].sum())
+
+def _two_opt_pass(matrix: np.ndarray, tour: np.ndarray, deadline: float) -> bool:
+    """
+    One sweep of 2-opt: for each edge (a, b) find the edge (c, d) whose
+    exchange for (a, c) + (b, d) gains the most, and reverse b..c in place
+    """
+    improved = False
+    n = len(tour)
+    for i in range(n - 3):
+        if time.perf_counter() > deadline:
+            break
+        a, b = tour[i], tour[i + 1]
+        j = np.arange(i + 2, n - 1)
+        c, d = tour[j], tour[j + 1]
+        delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+        best = int(np.argmin(delta))
+        if delta[best] < -IMPROVEMENT_EPS:
+            end = j[best]
+            tour[i + 1:end + 1] = tour[i + 1:end + 1][::-1].copy()
+            improved = True
+    return improved
+
+def _or_opt_pass(matrix: np.ndarray, tour: np.ndarray, deadline: float,
+                 max_segment: int = 3) -> tuple:
+    """
+    One sweep of Or-opt: move segments of 1..max_segment stops (optionally
+    reversed) to the cheapest other edge of the tour
+
+    Returns:
+        (tour, improved)
+    """
+    improved = False
+    for seg_len in range(1, max_segment + 1):
+        i = 1
+        while i + seg_len < len(tour):
+            if time.perf_counter() > deadline:
+                return tour, improved
+            end = i + seg_len - 1
+            first, last = tour[i], tour[end]
+            prev, nxt = tour[i - 1], tour[end + 1]
+            removal_gain = matrix[prev, first] + matrix[last, nxt] - matrix[prev, nxt]
+
+            rest = np.concatenate([tour[:i], tour[end + 1:]])
+            a, b = rest[:-1], rest[1:]
+            base = matrix[a, b]
+            forward = matrix[a, first] + matrix[last, b] - base
+            backward = matrix[a, last] + matrix[first, b] - base
+            # Re-inserting at the original edge is a no-op
+            forward[i - 1] = backward[i - 1] = np.inf
+
+            costs = np.minimum(forward, backward)
+            p = int(np.argmin(costs))
+            if costs[p] - removal_gain < -IMPROVEMENT_EPS:
+                segment = tour[i:end + 1]
+                if backward[p] < forward[p]:
+                    segment = segment[::-1]
+                tour = np.concatenate([rest[:p + 1], segment, rest[p + 1:]])
+                improved = True
+            i += 1
+    return tour, improved
+
+def improve_tour(matrix: np.ndarray, tour: np.ndarray, time_limit_seconds: float = 2.0,
+                 max_iterations: int = 50) -> np.ndarray:
+    """
+    Improve a closed tour with alternating 2-opt and Or-opt sweeps
+
+    Stops at a local optimum, after max_iterations sweeps, or when the time
+    budget runs out; the returned tour is never longer than the input.
+
+    Args:
+        matrix: Symmetric distance matrix
+        tour: Node indices starting and ending at the depot
+        time_limit_seconds: Wall-clock budget
+        max_iterations: Maximum number of 2-opt + Or-opt sweeps
+
+    Returns:
+        Improved tour as a new array
+    """
+    tour = np.array(tour, dtype=np.int64)
+    deadline = time.perf_counter() + time_limit_seconds
+    for _ in range(max_iterations):
+        improved = _two_opt_pass(matrix, tour, deadline)
+        tour, moved = _or_opt_pass(matrix, tour, deadline)
+        if not (improved or moved) or time.perf_counter() > deadline:
+            break
+    return tour
+
+def nearest_neighbor_tour(matrix: np.ndarray) -> np.ndarray:
+    """Greedy closed tour from node 0 (the depot)"""
+    visited = np.zeros(len(matrix), dtype=bool)
+    visited[0] = True
+    tour = [0]
+    current = 0
+    
+    for _ in range(len(matrix) - 1):
+        # Find nearest unvisited bin
+        nearest = int(np.argmin(np.where(visited, np.inf, matrix[current])))
+        tour.append(nearest)
+        visited[nearest] = True
+        current = nearest
+    
+    # Return to depot
+    tour.append(0)
+    return np.array(tour, dtype=np.int64)
+
+def optimize_collection_route(vehicle_id: str, bins: List, strategy: str = "nearest_neighbor",
+                              time_limit_seconds: float = 2.0):
     """
     Optimize collection route using nearest neighbor heuristic
-    In production, use more sophisticated algorithms (OR-Tools, genetic algorithms)
+    
+    strategy="local_search" refines the greedy tour with 2-opt and Or-opt
+    moves within time_limit_seconds.
     """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown routing strategy: {strategy}")
     
     if not bins:
         return {
@@ -18,37 +139,23 @@ def optimize_collection_route(vehicle_id: str, bins: List):
             "bins_to_collect": [],
             "total_distance_km": 0,
             "estimated_duration_minutes": 0,
-            "optimized_sequence": []
+            "optimized_sequence": [],
+            "strategy": strategy,
+            "initial_distance_km": 0
         }
     
     # Depot location (starting point) - using first bin as depot for simplicity
     depot_lat, depot_lon = 28.6139, 77.2090
     
-    # Nearest neighbor algorithm
-    unvisited = bins.copy()
-    route = []
-    current_lat, current_lon = depot_lat, depot_lon
-    total_distance = 0
-    
-    while unvisited:
-        # Find nearest bin
-        nearest_bin = None
-        min_distance = float('inf')
-        
-        for bin in unvisited:
-            dist = calculate_distance(current_lat, current_lon, bin.latitude, bin.longitude)
-            if dist < min_distance:
-                min_distance = dist
-                nearest_bin = bin
-        
-        # Add to route
-        route.append(nearest_bin)
-        total_distance += min_distance
-        current_lat, current_lon = nearest_bin.latitude, nearest_bin.longitude
-        unvisited.remove(nearest_bin)
+    # Index 0 is the depot; bin-to-bin distances come from the shared cache
+    matrix = distance_store.matrix_with_depots([(depot_lat, depot_lon)], bins)
     
-    # Return to depot
-    total_distance += calculate_distance(current_lat, current_lon, depot_lat, depot_lon)
+    tour = nearest_neighbor_tour(matrix)
+    initial_distance = tour_length(matrix, tour)
+    if strategy == "local_search":
+        tour = improve_tour(matrix, tour, time_limit_seconds)
+    total_distance = tour_length(matrix, tour)
+    route = [bins[node - 1] for node in tour[1:-1]]
     
     # Estimate duration (assuming 30 km/h average speed + 5 min per bin)
     travel_time = (total_distance / 30) * 60  # minutes
@@ -72,5 +179,7 @@ def optimize_collection_route(vehicle_id: str, bins: List):
         "bins_to_collect": [bin.bin_id for bin in route],
         "total_distance_km": round(total_distance, 2),
         "estimated_duration_minutes": round(total_duration, 2),
-        "optimized_sequence": optimized_sequence
+        "optimized_sequence": optimized_sequence,
+        "strategy": strategy,
+        "initial_distance_km": round(initial_distance, 2)
     }
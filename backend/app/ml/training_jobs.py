@@ -0,0 +1,419 @@
+"""
+Background training jobs
+Shards bins across a process pool and persists progress and per-bin
+results in training_jobs / training_results; the pooled global model
+trains as a single task on the same pool
+"""
+
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from threadpoolctl import threadpool_limits
+
+from app.models.database_models import BacktestJob, TrainingJob, TrainingJobStatus, TrainingResult
+from app.utils.database import SessionLocal
+from app.ml import fill_level_forecaster
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.global_forecaster import GLOBAL_MODEL_ID, GLOBAL_TRAINING_READINGS, GlobalForecaster
+from app.ml.reading_loader import load_reading_frames
+from app.ml.forecast_store import forecast_store, forecast_scheduler
+
+# One single-threaded worker per core
+TRAINING_WORKERS = int(os.getenv('TRAINING_WORKERS', str(os.cpu_count() or 1)))
+# Bins per worker task: one reading query each, and the granularity of progress
+SHARD_SIZE = 10
+MIN_READINGS = 20
+
+# This process, as the owner of the jobs it submits (their coordinator threads run here)
+JOB_OWNER = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+JOB_HEARTBEAT_SECONDS = int(os.getenv('JOB_HEARTBEAT_SECONDS', '30'))
+# A queued or running job not heard from for this long died with its owner
+JOB_STALE_SECONDS = 4 * JOB_HEARTBEAT_SECONDS
+ACTIVE_STATUSES = [TrainingJobStatus.QUEUED, TrainingJobStatus.RUNNING]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    """Keep each worker to one thread (forest n_jobs and BLAS)"""
+    fill_level_forecaster.MODEL_N_JOBS = 1
+    threadpool_limits(limits=1)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process pool shared by training and backtest jobs, so concurrent jobs queue rather than oversubscribe"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that runs server threads is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=TRAINING_WORKERS,
+                mp_context=get_context('spawn'),
+                initializer=_init_worker
+            )
+        return _executor
+
+
+def reset_executor():
+    """Drop a pool broken by a crashed worker; the next job starts a new one"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def train_shard(bin_infos: Dict[str, Dict], model_types: List[str], strategy: str,
+                resample: Optional[bool] = None, tune: bool = False) -> Dict[str, Dict]:
+    """
+    Train a shard of bins (runs in a worker process)
+
+    Args:
+        bin_infos: Bin metadata dictionaries keyed by bin_id
+        model_types: Model types to train
+        strategy: recursive or direct
+        resample: Train on the hourly grid (None keeps each model's setting)
+        tune: Search tree and forest hyperparameters before training
+
+    Returns:
+        Metrics (or {'error': ...}) keyed by bin_id
+    """
+    db = SessionLocal()
+    try:
+        readings_by_bin = load_reading_frames(db, list(bin_infos))
+    finally:
+        db.close()
+
+    results = {}
+    for bin_id, bin_info in bin_infos.items():
+        readings = readings_by_bin.get(bin_id, ())
+        if len(readings) < MIN_READINGS:
+            results[bin_id] = {'error': 'Insufficient data (need at least 20 readings)'}
+            continue
+        try:
+            results[bin_id] = FillLevelForecaster(bin_id).train_models(
+                readings, bin_info, model_types, strategy, resample, tune
+            )
+        except Exception as e:
+            results[bin_id] = {'error': str(e)}
+    return results
+
+
+def submit_training_job(db: Session, bin_infos: Dict[str, Dict], model_types: List[str],
+                        strategy: str = 'recursive', resample: Optional[bool] = None,
+                        tune: bool = False) -> TrainingJob:
+    """
+    Create a training job and start it in the background
+
+    Args:
+        db: Database session
+        bin_infos: Bin metadata dictionaries keyed by bin_id
+        model_types: Model types to train
+        strategy: recursive or direct
+        resample: Train on the hourly grid (None keeps each model's setting)
+        tune: Search tree and forest hyperparameters before training
+
+    Returns:
+        The queued TrainingJob
+    """
+    job = TrainingJob(
+        job_id=uuid.uuid4().hex,
+        status=TrainingJobStatus.QUEUED,
+        model_types=list(model_types),
+        strategy=strategy,
+        total_bins=len(bin_infos),
+        completed_bins=0,
+        failed_bins=0
+    )
+    own_job(job)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    threading.Thread(
+        target=_run_job, args=(job.job_id, bin_infos, list(model_types), strategy, resample, tune), daemon=True
+    ).start()
+    return job
+
+
+def _run_job(job_id: str, bin_infos: Dict[str, Dict], model_types: List[str], strategy: str,
+             resample: Optional[bool], tune: bool):
+    """Coordinator thread: fan shards out to the pool and record results as they finish"""
+    db = SessionLocal()
+    try:
+        job = db.query(TrainingJob).filter(TrainingJob.job_id == job_id).first()
+        job.status = TrainingJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        items = list(bin_infos.items())
+        shards = [dict(items[i:i + SHARD_SIZE]) for i in range(0, len(items), SHARD_SIZE)]
+        executor = get_executor()
+        futures = {
+            executor.submit(train_shard, shard, model_types, strategy, resample, tune): shard for shard in shards
+        }
+
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except BrokenProcessPool:
+                reset_executor()
+                results = {bin_id: {'error': 'Training worker crashed'} for bin_id in futures[future]}
+            except Exception as e:
+                results = {bin_id: {'error': str(e)} for bin_id in futures[future]}
+            _record_results(db, job, results)
+
+        job.status = TrainingJobStatus.COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        _fail_job(db, job_id, str(e))
+    finally:
+        db.close()
+
+
+def own_job(job):
+    """Claim a new TrainingJob or BacktestJob for this process, which keeps it alive with heartbeats"""
+    job.owner = JOB_OWNER
+    job.heartbeat_at = datetime.utcnow()
+    job_heartbeat.start()
+
+
+class JobHeartbeat:
+    """
+    Background thread tracking which jobs still have a live owner
+
+    Every JOB_HEARTBEAT_SECONDS it stamps heartbeat_at on the queued and
+    running jobs this process owns, then fails those of any process whose
+    heartbeat is older than JOB_STALE_SECONDS: their coordinator threads
+    died with that process (a restart or crash), so they would never finish.
+    Jobs of other live processes keep beating and are left alone.
+    """
+
+    def __init__(self, job_models=(TrainingJob, BacktestJob), interval: int = JOB_HEARTBEAT_SECONDS,
+                 stale_seconds: int = JOB_STALE_SECONDS):
+        self.job_models = job_models
+        self.interval = interval
+        self.stale_seconds = stale_seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def _loop(self):
+        while True:
+            try:
+                self.beat()
+            except Exception:
+                pass  # e.g. the database is briefly unavailable; try again next beat
+            if self._stop.wait(self.interval):
+                return
+
+    def beat(self) -> int:
+        """
+        Stamp this process's active jobs and fail orphaned ones
+
+        Returns:
+            Number of jobs marked failed
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=self.stale_seconds)
+        failed = 0
+        db = SessionLocal()
+        try:
+            for job_model in self.job_models:
+                active = db.query(job_model).filter(job_model.status.in_(ACTIVE_STATUSES))
+                active.filter(job_model.owner == JOB_OWNER).update(
+                    {job_model.heartbeat_at: now}, synchronize_session=False
+                )
+                failed += active.filter(
+                    (job_model.heartbeat_at.is_(None)) | (job_model.heartbeat_at < cutoff)
+                ).update({
+                    job_model.status: TrainingJobStatus.FAILED,
+                    job_model.error: 'Interrupted: the server process running it stopped',
+                    job_model.finished_at: now
+                }, synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+        return failed
+
+
+job_heartbeat = JobHeartbeat()
+
+
+def _fail_job(db: Session, job_id: str, error: str):
+    job = get_job(db, job_id)
+    if job is not None:
+        job.status = TrainingJobStatus.FAILED
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+
+def train_global(bin_infos: Dict[str, Dict], model_type: str, compare_per_bin: bool) -> Dict:
+    """
+    Train the pooled model on each bin's latest GLOBAL_TRAINING_READINGS
+    readings (runs in a worker process)
+
+    Returns:
+        GlobalForecaster.train metrics (or {'error': ...})
+    """
+    db = SessionLocal()
+    try:
+        readings_by_bin = load_reading_frames(db, limit=GLOBAL_TRAINING_READINGS)
+    finally:
+        db.close()
+
+    bins = [
+        (bin_id, readings, bin_infos[bin_id])
+        for bin_id, readings in readings_by_bin.items()
+        if bin_id in bin_infos and len(readings) >= MIN_READINGS
+    ]
+    return GlobalForecaster(model_type).train(bins, compare_per_bin)
+
+
+def submit_global_training_job(db: Session, bin_infos: Dict[str, Dict], model_type: str,
+                               compare_per_bin: bool = True) -> TrainingJob:
+    """
+    Create a job training the pooled global model and start it in the background
+
+    Args:
+        db: Database session
+        bin_infos: Bin metadata dictionaries keyed by bin_id
+        model_type: gbm or forest
+        compare_per_bin: Keep a bin's own saved model where it beats the pooled one
+
+    Returns:
+        The queued TrainingJob; its summary holds the holdout metrics once completed
+    """
+    job = TrainingJob(
+        job_id=uuid.uuid4().hex,
+        status=TrainingJobStatus.QUEUED,
+        model_types=[f'{GLOBAL_MODEL_ID}_{model_type}'],
+        strategy='recursive',
+        total_bins=len(bin_infos),
+        completed_bins=0,
+        failed_bins=0
+    )
+    own_job(job)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    threading.Thread(
+        target=_run_global_job, args=(job.job_id, bin_infos, model_type, compare_per_bin), daemon=True
+    ).start()
+    return job
+
+
+def _run_global_job(job_id: str, bin_infos: Dict[str, Dict], model_type: str, compare_per_bin: bool):
+    """Coordinator thread: train the pooled model in the pool and record its metrics"""
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        job.status = TrainingJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        try:
+            metrics = get_executor().submit(train_global, bin_infos, model_type, compare_per_bin).result()
+        except BrokenProcessPool:
+            reset_executor()
+            metrics = {'error': 'Training worker crashed'}
+        if 'error' in metrics:
+            db.rollback()
+            _fail_job(db, job_id, metrics['error'])
+            return
+
+        job.summary = {'model_type': model_type, **metrics}
+        job.completed_bins = metrics['bins']
+        job.failed_bins = job.total_bins - metrics['bins']
+        # Forecasts made with the previous global model are no longer served
+        forecast_store.invalidate(db, model_type='global')
+        job.status = TrainingJobStatus.COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        forecast_scheduler.request_refresh()
+    except Exception as e:
+        db.rollback()
+        _fail_job(db, job_id, str(e))
+    finally:
+        db.close()
+
+
+def _record_results(db: Session, job: TrainingJob, results: Dict[str, Dict]):
+    """Persist one shard's per-bin results and advance the job's progress"""
+    now = datetime.utcnow()
+    rows = []
+    for bin_id, metrics in results.items():
+        error = metrics.get('error') if isinstance(metrics, dict) else None
+        rows.append({
+            'job_id': job.job_id,
+            'bin_id': bin_id,
+            'metrics': None if error else metrics,
+            'error': error,
+            'trained_at': now
+        })
+    db.execute(insert(TrainingResult), rows)
+
+    # Precomputed forecasts of retrained bins are replaced on the next scheduler cycle
+    trained = [row['bin_id'] for row in rows if not row['error']]
+    if trained:
+        forecast_store.invalidate(db, trained)
+
+    failed = len(rows) - len(trained)
+    job.completed_bins += len(trained)
+    job.failed_bins += failed
+    db.commit()
+    if trained:
+        forecast_scheduler.request_refresh(trained)
+
+
+def job_status(job: TrainingJob) -> Dict:
+    """Status and progress of a training job"""
+    done = job.completed_bins + job.failed_bins
+    return {
+        'job_id': job.job_id,
+        'status': job.status.value if job.status else None,
+        'model_types': job.model_types,
+        'strategy': job.strategy,
+        'total_bins': job.total_bins,
+        'completed_bins': job.completed_bins,
+        'failed_bins': job.failed_bins,
+        'progress_percent': round(100 * done / job.total_bins, 1) if job.total_bins else 100.0,
+        'summary': job.summary,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def get_job(db: Session, job_id: str) -> Optional[TrainingJob]:
+    return db.query(TrainingJob).filter(TrainingJob.job_id == job_id).first()
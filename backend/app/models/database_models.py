@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, func
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, JSON, Index, func
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
 from datetime import datetime
@@ -53,6 +53,8 @@ class Bin(Base):
     # Relationships
     readings = relationship("BinReading", back_populates="bin")
     collections = relationship("Collection", back_populates="bin")
+    latest_state = relationship("BinLatestState", back_populates="bin", uselist=False)
+    regression_state = relationship("BinRegressionState", back_populates="bin", uselist=False)
 
 class BinReading(Base):
     __tablename__ = "bin_readings"
@@ -67,6 +69,40 @@ class BinReading(Base):
     
     # Relationship
     bin = relationship("Bin", back_populates="readings")
+    
+    # A bin's latest readings (forecasting lookback windows) without scanning its history
+    __table_args__ = (Index('ix_bin_readings_bin_id_timestamp', 'bin_id', 'timestamp'),)
+
+class BinLatestState(Base):
+    """Newest reading per bin, upserted on ingest so reads avoid scanning bin_readings"""
+    __tablename__ = "bin_latest_state"
+    
+    bin_id = Column(String, ForeignKey("bins.bin_id"), primary_key=True)
+    reading_timestamp = Column(DateTime, index=True)
+    fill_level_percent = Column(Float, index=True)
+    weight_kg = Column(Float, nullable=True)
+    temperature_c = Column(Float, nullable=True)
+    battery_percent = Column(Float, nullable=True)
+    
+    # Relationship
+    bin = relationship("Bin", back_populates="latest_state")
+
+class BinRegressionState(Base):
+    """Exponentially decayed least-squares sums of fill level over time, updated on ingest"""
+    __tablename__ = "bin_regression_state"
+    
+    bin_id = Column(String, ForeignKey("bins.bin_id"), primary_key=True)
+    # x is hours relative to the anchor, which tracks the newest reading
+    anchor_timestamp = Column(DateTime)
+    last_fill_level = Column(Float)
+    reading_count = Column(Integer, default=0)
+    weight_sum = Column(Float, default=0.0)
+    sum_x = Column(Float, default=0.0)
+    sum_y = Column(Float, default=0.0)
+    sum_xy = Column(Float, default=0.0)
+    sum_xx = Column(Float, default=0.0)
+    
+    bin = relationship("Bin", back_populates="regression_state")
 
 class Vehicle(Base):
     __tablename__ = "vehicles"
@@ -151,3 +187,101 @@ class Complaint(Base):
     resolution_hours = Column(Float, nullable=True)
     citizen_rating = Column(Integer, nullable=True)
     resolved_at = Column(DateTime, nullable=True)
+
+class TrainingJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class TrainingJob(Base):
+    __tablename__ = "training_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True)
+    status = Column(Enum(TrainingJobStatus), default=TrainingJobStatus.QUEUED)
+    model_types = Column(JSON)
+    strategy = Column(String)
+    total_bins = Column(Integer)
+    completed_bins = Column(Integer, default=0)
+    failed_bins = Column(Integer, default=0)
+    summary = Column(JSON, nullable=True)  # Holdout metrics of a global model job, once completed
+    error = Column(String, nullable=True)
+    owner = Column(String, nullable=True)  # Process running the job's coordinator thread
+    heartbeat_at = Column(DateTime, nullable=True)  # Last sign of life from the owner
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationship
+    results = relationship("TrainingResult", back_populates="job")
+
+class TrainingResult(Base):
+    __tablename__ = "training_results"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("training_jobs.job_id"), index=True)
+    bin_id = Column(String, ForeignKey("bins.bin_id"))
+    metrics = Column(JSON, nullable=True)  # Per-model metrics from train_models
+    error = Column(String, nullable=True)
+    trained_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    job = relationship("TrainingJob", back_populates="results")
+
+class BacktestJob(Base):
+    """Walk-forward backtest over many bins; status values shared with training jobs"""
+    __tablename__ = "backtest_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, unique=True, index=True)
+    status = Column(Enum(TrainingJobStatus), default=TrainingJobStatus.QUEUED)
+    model_types = Column(JSON)
+    strategy = Column(String)
+    horizons = Column(JSON)  # Hours ahead evaluated
+    folds = Column(Integer)  # Forecast origins per bin
+    total_bins = Column(Integer)
+    completed_bins = Column(Integer, default=0)
+    failed_bins = Column(Integer, default=0)
+    summary = Column(JSON, nullable=True)  # Per-horizon errors pooled over bins, once completed
+    error = Column(String, nullable=True)
+    owner = Column(String, nullable=True)  # Process running the job's coordinator thread
+    heartbeat_at = Column(DateTime, nullable=True)  # Last sign of life from the owner
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationship
+    results = relationship("BacktestResult", back_populates="job")
+
+class BacktestResult(Base):
+    __tablename__ = "backtest_results"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("backtest_jobs.job_id"), index=True)
+    bin_id = Column(String, ForeignKey("bins.bin_id"))
+    metrics = Column(JSON, nullable=True)  # Per-model, per-horizon errors from backtest_bin
+    error = Column(String, nullable=True)
+    evaluated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    job = relationship("BacktestJob", back_populates="results")
+
+class BinForecast(Base):
+    """Latest precomputed forecast per bin and model, refreshed by the forecast scheduler"""
+    __tablename__ = "bin_forecasts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bin_id = Column(String, ForeignKey("bins.bin_id"))
+    model_type = Column(String)
+    strategy = Column(String)
+    current_fill_level = Column(Float)
+    current_time = Column(DateTime)  # Latest reading the forecast starts from
+    hourly_forecast = Column(JSON)  # Fill levels for each following hour
+    hours_until_full = Column(Integer, nullable=True)
+    predicted_full_time = Column(DateTime, nullable=True)
+    generated_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        Index('ix_bin_forecasts_bin_model', 'bin_id', 'model_type', 'strategy', unique=True),
+    )
@@ -23,6 +23,10 @@ class ComplaintTypeEnum(str, Enum):
     LITTERING = "littering"
     REQUEST_NEW_BIN = "request_new_bin"
 
+class RouteStrategyEnum(str, Enum):
+    NEAREST_NEIGHBOR = "nearest_neighbor"
+    LOCAL_SEARCH = "local_search"
+
 class ComplaintStatusEnum(str, Enum):
     OPEN = "open"
     IN_PROGRESS = "in_progress"
@@ -69,6 +73,17 @@ class BinReadingResponse(BinReadingCreate):
     class Config:
         from_attributes = True
 
+class BulkReadingResult(BaseModel):
+    index: int
+    bin_id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BulkReadingResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: list[BulkReadingResult]
+
 # Vehicle Schemas
 class VehicleBase(BaseModel):
     vehicle_id: str
@@ -152,7 +167,38 @@ class RouteOptimization(BaseModel):
     total_distance_km: float
     estimated_duration_minutes: float
     optimized_sequence: list[dict]
+    strategy: Optional[RouteStrategyEnum] = None
+    initial_distance_km: Optional[float] = None
 
 class RouteOptimizationRequest(BaseModel):
     vehicle_id: str
     threshold: float = 80.0
+    strategy: RouteStrategyEnum = RouteStrategyEnum.NEAREST_NEIGHBOR
+    time_limit_seconds: float = Field(2.0, gt=0, le=60)
+
+class Depot(BaseModel):
+    latitude: float
+    longitude: float
+
+class FleetRouteRequest(BaseModel):
+    threshold: float = 80.0
+    depots: list[Depot] = []
+    vehicle_ids: Optional[list[str]] = None
+    shift_minutes: float = Field(480.0, gt=0)
+    time_limit_seconds: int = Field(10, ge=1, le=120)
+
+class VehicleRoute(BaseModel):
+    vehicle_id: str
+    depot: Depot
+    bins_to_collect: list[str]
+    total_distance_km: float
+    estimated_duration_minutes: float
+    load_kg: float
+    capacity_kg: float
+    optimized_sequence: list[dict]
+
+class FleetRoutePlan(BaseModel):
+    routes: list[VehicleRoute]
+    unassigned_bins: list[str]
+    total_distance_km: float
+    solver_status: str
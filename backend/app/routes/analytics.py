@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, desc
-from app.models.database_models import Bin, BinReading, Collection, Complaint
+from app.models.database_models import Bin, BinReading, BinLatestState, Collection, Complaint
 from app.utils.database import get_db
 from datetime import datetime, timedelta
-from geopy.distance import geodesic
+from app.utils.spatial_index import bin_index
 
 router = APIRouter()
 
@@ -29,19 +29,13 @@ def get_dashboard_stats(area_name: str = None, db: Session = Depends(get_db)):
             "average_fill_level": 0
         }
 
-    # Latest readings subquery
-    from sqlalchemy.sql import func as sql_func
-    subquery = db.query(
-        BinReading.bin_id,
-        sql_func.max(BinReading.timestamp).label('max_timestamp')
-    ).filter(BinReading.bin_id.in_(bin_ids)).group_by(BinReading.bin_id).subquery()
+    # Latest state of the filtered bins
+    latest_state = db.query(BinLatestState).filter(BinLatestState.bin_id.in_(bin_ids))
     
     # Bins needing collection (>80% full)
-    high_fill_count = db.query(func.count(BinReading.id)).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
-    ).filter(BinReading.fill_level_percent >= 80).scalar() or 0
+    high_fill_count = latest_state.filter(
+        BinLatestState.fill_level_percent >= 80
+    ).with_entities(func.count(BinLatestState.bin_id)).scalar() or 0
     
     # Total waste collected today
     today = datetime.utcnow().date()
@@ -62,10 +56,8 @@ def get_dashboard_stats(area_name: str = None, db: Session = Depends(get_db)):
     active_complaints = complaint_query.scalar() or 0
     
     # Average fill level
-    avg_fill = db.query(func.avg(BinReading.fill_level_percent)).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
+    avg_fill = latest_state.with_entities(
+        func.avg(BinLatestState.fill_level_percent)
     ).scalar() or 0
     
     return {
@@ -116,27 +108,20 @@ def get_alerts(area_name: str = None, db: Session = Depends(get_db)):
     if not bin_ids:
         return []
 
-    # Get latest readings for filtered bins
-    from sqlalchemy.sql import func as sql_func
-    subquery = db.query(
-        BinReading.bin_id,
-        sql_func.max(BinReading.timestamp).label('max_timestamp')
-    ).filter(BinReading.bin_id.in_(bin_ids)).group_by(BinReading.bin_id).subquery()
-    
-    critical_readings = db.query(BinReading).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
-    ).filter(BinReading.fill_level_percent >= 85).all()
+    # Get latest state for filtered bins
+    critical_states = db.query(BinLatestState).filter(
+        BinLatestState.bin_id.in_(bin_ids),
+        BinLatestState.fill_level_percent >= 85
+    ).all()
     
     alerts = []
-    for r in critical_readings:
+    for s in critical_states:
         alerts.append({
-            "id": f"alert-{r.bin_id}-{int(r.timestamp.timestamp())}",
+            "id": f"alert-{s.bin_id}-{int(s.reading_timestamp.timestamp())}",
             "type": "critical",
-            "bin_id": r.bin_id,
-            "message": f"Critical fill level: {round(r.fill_level_percent)}%",
-            "timestamp": r.timestamp,
+            "bin_id": s.bin_id,
+            "message": f"Critical fill level: {round(s.fill_level_percent)}%",
+            "timestamp": s.reading_timestamp,
             "severity": "high"
         })
         
@@ -145,34 +130,15 @@ def get_alerts(area_name: str = None, db: Session = Depends(get_db)):
 @router.get("/map/bins")
 def get_bins_for_map(area_name: str = None, db: Session = Depends(get_db)):
     """Get all bins with current fill levels for map visualization, optionally filtered by area"""
-    query = db.query(Bin)
+    query = db.query(Bin).options(joinedload(Bin.latest_state))
     if area_name:
         query = query.filter(Bin.area_name == area_name)
     
     bins = query.all()
-    bin_ids = [b.bin_id for b in bins]
-
-    if not bin_ids:
-        return []
-    
-    # Get latest readings
-    from sqlalchemy.sql import func as sql_func
-    subquery = db.query(
-        BinReading.bin_id,
-        sql_func.max(BinReading.timestamp).label('max_timestamp')
-    ).filter(BinReading.bin_id.in_(bin_ids)).group_by(BinReading.bin_id).subquery()
-    
-    latest_readings = db.query(BinReading).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
-    ).all()
-    
-    readings_dict = {r.bin_id: r for r in latest_readings}
     
     result = []
     for bin in bins:
-        reading = readings_dict.get(bin.bin_id)
+        reading = bin.latest_state
         result.append({
             "bin_id": bin.bin_id,
             "latitude": bin.latitude,
@@ -194,14 +160,9 @@ def get_area_analytics(
     db: Session = Depends(get_db)
 ):
     """Get waste analytics for a specific geographic area"""
-    all_bins = db.query(Bin).all()
-    user_coords = (lat, lng)
-    
     # Filter bins by distance
-    area_bin_ids = []
-    for b in all_bins:
-        if geodesic(user_coords, (b.latitude, b.longitude)).km <= radius_km:
-            area_bin_ids.append(b.bin_id)
+    bin_index.ensure_built(db)
+    area_bin_ids = [bin_id for bin_id, _ in bin_index.query_radius(lat, lng, radius_km)]
             
     if not area_bin_ids:
         return {
@@ -211,16 +172,9 @@ def get_area_analytics(
             "trends": []
         }
         
-    # Latest readings for area bins
-    subquery = db.query(
-        BinReading.bin_id,
-        func.max(BinReading.timestamp).label('max_timestamp')
-    ).filter(BinReading.bin_id.in_(area_bin_ids)).group_by(BinReading.bin_id).subquery()
-    
-    avg_fill = db.query(func.avg(BinReading.fill_level_percent)).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
+    # Latest state for area bins
+    avg_fill = db.query(func.avg(BinLatestState.fill_level_percent)).filter(
+        BinLatestState.bin_id.in_(area_bin_ids)
     ).scalar() or 0
     
     # Weekly waste (sum collections)
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, contains_eager
 from sqlalchemy import desc
-from app.models.database_models import Bin, BinReading, BinType, BinStatus
-from app.models.schemas import BinCreate, BinResponse, BinReadingCreate, BinReadingResponse
+from app.models.database_models import Bin, BinReading, BinLatestState, BinRegressionState, BinType, BinStatus
+from app.models.schemas import (
+    BinCreate, BinResponse, BinReadingCreate, BinReadingResponse, BulkReadingResponse
+)
 from app.utils.database import get_db
+from app.utils.reading_ingest import (
+    ReadingIngestor, DEFAULT_CHUNK_SIZE, FULL_ALERT_THRESHOLD, get_alert_users, notify_bin_full
+)
+from app.utils.latest_state import upsert_latest_state
+from app.utils.regression_state import update_regression_state
+from app.utils.spatial_index import bin_index
 from app.middleware.auth import get_optional_user
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime, timedelta
-from geopy.distance import geodesic
 from pydantic import BaseModel
 import random
 import math
+import codecs
 
 router = APIRouter()
 
@@ -26,6 +35,8 @@ class SeedRequest(BaseModel):
 def seed_bins_nearby(data: SeedRequest, db: Session = Depends(get_db)):
     """Seed test bins within a radius around a location"""
     # Clear existing bins, readings, and collections
+    db.query(BinLatestState).delete()
+    db.query(BinRegressionState).delete()
     db.query(BinReading).delete()
     from app.models.database_models import Collection
     db.query(Collection).delete()
@@ -66,9 +77,10 @@ def seed_bins_nearby(data: SeedRequest, db: Session = Depends(get_db)):
 
     # Also seed some random fill-level readings
     db.flush()
+    seeded_readings = []
     for i in range(1, data.count + 1):
         fill = random.uniform(5, 95)
-        reading = BinReading(
+        reading = dict(
             bin_id=f"BIN_{i}",
             fill_level_percent=round(fill, 1),
             weight_kg=round(random.uniform(1, 50), 1),
@@ -76,9 +88,13 @@ def seed_bins_nearby(data: SeedRequest, db: Session = Depends(get_db)):
             battery_percent=round(random.uniform(50, 100), 1),
             timestamp=datetime.utcnow()
         )
-        db.add(reading)
+        db.add(BinReading(**reading))
+        seeded_readings.append(reading)
 
+    upsert_latest_state(db, seeded_readings)
+    update_regression_state(db, seeded_readings)
     db.commit()
+    bin_index.invalidate()
     return {"message": f"Created {len(created_bins)} bins", "bins": created_bins}
 
 
@@ -91,7 +107,7 @@ def get_all_bins(
     user: Optional[Dict] = Depends(get_optional_user)
 ):
     """Get all bins with their current status, optionally filtered by area"""
-    query = db.query(Bin)
+    query = db.query(Bin).options(joinedload(Bin.latest_state))
     if area_name:
         query = query.filter(Bin.area_name == area_name)
         
@@ -99,29 +115,66 @@ def get_all_bins(
     
     # Enrich with current fill level
     for bin in bins:
-        latest_reading = db.query(BinReading).filter(
-            BinReading.bin_id == bin.bin_id
-        ).order_by(desc(BinReading.timestamp)).first()
-        
-        if latest_reading:
-            bin.current_fill_level = latest_reading.fill_level_percent
+        if bin.latest_state:
+            bin.current_fill_level = bin.latest_state.fill_level_percent
         
     return bins
 
+@router.get("/nearby", response_model=List[Dict])
+def get_nearby_bins(
+    lat: float,
+    lng: float,
+    radius_km: float = 5.0,
+    db: Session = Depends(get_db)
+):
+    """Get bins within a radius, sorted by distance"""
+    bin_index.ensure_built(db)
+    distances = dict(bin_index.query_radius(lat, lng, radius_km))
+    if not distances:
+        return []
+    
+    bins = db.query(Bin).options(joinedload(Bin.latest_state)).filter(
+        Bin.bin_id.in_(distances.keys())
+    ).all()
+    nearby_bins = []
+    
+    for bin in bins:
+        distance = distances[bin.bin_id]
+        
+        fill_level = bin.latest_state.fill_level_percent if bin.latest_state else 0
+        
+        # Determine status
+        status = "Empty"
+        if fill_level > 80:
+            status = "Full"
+        elif fill_level > 40:
+            status = "Partially Filled"
+        
+        nearby_bins.append({
+            "bin_id": bin.bin_id,
+            "latitude": bin.latitude,
+            "longitude": bin.longitude,
+            "distance_km": round(distance, 2),
+            "fill_level": fill_level,
+            "status": status,
+            "bin_type": bin.bin_type.value,
+            "zone": bin.zone
+        })
+        
+    # Sort by distance
+    nearby_bins.sort(key=lambda x: x["distance_km"])
+    
+    return nearby_bins
+
 @router.get("/{bin_id}", response_model=BinResponse)
 def get_bin(bin_id: str, db: Session = Depends(get_db)):
     """Get specific bin details"""
-    bin = db.query(Bin).filter(Bin.bin_id == bin_id).first()
+    bin = db.query(Bin).options(joinedload(Bin.latest_state)).filter(Bin.bin_id == bin_id).first()
     if not bin:
         raise HTTPException(status_code=404, detail="Bin not found")
     
-    # Get latest reading
-    latest_reading = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id
-    ).order_by(desc(BinReading.timestamp)).first()
-    
-    if latest_reading:
-        bin.current_fill_level = latest_reading.fill_level_percent
+    if bin.latest_state:
+        bin.current_fill_level = bin.latest_state.fill_level_percent
     
     return bin
 
@@ -132,6 +185,7 @@ def create_bin(bin: BinCreate, db: Session = Depends(get_db)):
     db.add(db_bin)
     db.commit()
     db.refresh(db_bin)
+    bin_index.register_bin(db_bin)
     return db_bin
 
 @router.get("/{bin_id}/readings", response_model=List[BinReadingResponse])
@@ -156,9 +210,6 @@ def create_bin_reading(
     db: Session = Depends(get_db)
 ):
     """Add a new sensor reading and notify if full"""
-    from app.utils.twilio_service import twilio_service
-    from app.models.database_models import User, UserRole
-
     # Verify bin exists
     bin = db.query(Bin).filter(Bin.bin_id == bin_id).first()
     if not bin:
@@ -166,105 +217,80 @@ def create_bin_reading(
     
     db_reading = BinReading(**reading.dict())
     db.add(db_reading)
+    db.flush()
+    state_row = {
+        'bin_id': db_reading.bin_id,
+        'timestamp': db_reading.timestamp,
+        'fill_level_percent': db_reading.fill_level_percent,
+        'weight_kg': db_reading.weight_kg,
+        'temperature_c': db_reading.temperature_c,
+        'battery_percent': db_reading.battery_percent
+    }
+    upsert_latest_state(db, [state_row])
+    update_regression_state(db, [state_row])
     
     # Check for overflow alert
-    if db_reading.fill_level_percent >= 90.0:
+    if db_reading.fill_level_percent >= FULL_ALERT_THRESHOLD:
         # Notify admins and workers in this area
-        alert_users = db.query(User).filter(
-            (User.role.in_([UserRole.ADMIN, UserRole.WORKER])) & 
-            (User.is_phone_verified == True)
-        ).all()
-        
-        # Filter by area if available
-        if bin.area_name:
-            area_users = [u for u in alert_users if u.area == bin.area_name or u.role == UserRole.ADMIN]
-            if area_users:
-                alert_users = area_users
-
-        for user in alert_users:
-            if user.phone:
-                twilio_service.notify_bin_full(
-                    user.phone, 
-                    bin.bin_id, 
-                    bin.area_name or "Unknown Area"
-                )
+        notify_bin_full(get_alert_users(db), bin.bin_id, bin.area_name)
 
     db.commit()
     db.refresh(db_reading)
     return db_reading
 
-@router.get("/alerts/high-fill", response_model=List[BinResponse])
-def get_high_fill_bins(threshold: float = 80.0, db: Session = Depends(get_db)):
-    """Get bins above fill threshold"""
-    # Get latest reading for each bin
-    from sqlalchemy.sql import func
-    
-    subquery = db.query(
-        BinReading.bin_id,
-        func.max(BinReading.timestamp).label('max_timestamp')
-    ).group_by(BinReading.bin_id).subquery()
-    
-    high_fill_readings = db.query(BinReading).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
-    ).filter(BinReading.fill_level_percent >= threshold).all()
-    
-    bin_ids = [r.bin_id for r in high_fill_readings]
-    bins = db.query(Bin).filter(Bin.bin_id.in_(bin_ids)).all()
-    
-    # Enrich with current fill level
-    for bin in bins:
-        reading = next((r for r in high_fill_readings if r.bin_id == bin.bin_id), None)
-        if reading:
-            bin.current_fill_level = reading.fill_level_percent
+@router.post("/readings/bulk", response_model=BulkReadingResponse)
+def create_bin_readings_bulk(
+    readings: List[Any],
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """
+    Ingest a JSON array of sensor readings in batched commits
     
-    return bins
+    Each reading is validated independently; the response reports
+    accepted/rejected status per array index.
+    """
+    ingestor = ReadingIngestor(db, chunk_size)
+    ingestor.add_many(readings)
+    return ingestor.summary()
 
-@router.get("/nearby", response_model=List[Dict])
-def get_nearby_bins(
-    lat: float,
-    lng: float,
-    radius_km: float = 5.0,
+@router.post("/readings/bulk/ndjson", response_model=BulkReadingResponse)
+async def create_bin_readings_ndjson(
+    request: Request,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
     db: Session = Depends(get_db)
 ):
-    """Get bins within a radius, sorted by distance"""
-    bins = db.query(Bin).all()
-    nearby_bins = []
+    """
+    Ingest a newline-delimited JSON stream of sensor readings
     
-    user_coords = (lat, lng)
+    The body is consumed incrementally and written chunk by chunk, so
+    buffered lines and pending rows stay bounded by chunk_size. The
+    per-line results in the response still grow with the stream length.
+    """
+    ingestor = ReadingIngestor(db, chunk_size)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    lines = []
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *complete, buffer = buffer.split("\n")
+        lines.extend(complete)
+        if len(lines) >= chunk_size:
+            await run_in_threadpool(ingestor.add_lines, lines)
+            lines = []
+    lines.append(buffer + decoder.decode(b"", final=True))
+    await run_in_threadpool(ingestor.add_lines, lines)
+    return await run_in_threadpool(ingestor.summary)
+
+@router.get("/alerts/high-fill", response_model=List[BinResponse])
+def get_high_fill_bins(threshold: float = 80.0, db: Session = Depends(get_db)):
+    """Get bins above fill threshold"""
+    bins = db.query(Bin).join(Bin.latest_state).options(
+        contains_eager(Bin.latest_state)
+    ).filter(BinLatestState.fill_level_percent >= threshold).order_by(Bin.id).all()
     
+    # Enrich with current fill level
     for bin in bins:
-        bin_coords = (bin.latitude, bin.longitude)
-        distance = geodesic(user_coords, bin_coords).km
-        
-        if distance <= radius_km:
-            # Get latest reading
-            latest_reading = db.query(BinReading).filter(
-                BinReading.bin_id == bin.bin_id
-            ).order_by(desc(BinReading.timestamp)).first()
-            
-            fill_level = latest_reading.fill_level_percent if latest_reading else 0
-            
-            # Determine status
-            status = "Empty"
-            if fill_level > 80:
-                status = "Full"
-            elif fill_level > 40:
-                status = "Partially Filled"
-            
-            nearby_bins.append({
-                "bin_id": bin.bin_id,
-                "latitude": bin.latitude,
-                "longitude": bin.longitude,
-                "distance_km": round(distance, 2),
-                "fill_level": fill_level,
-                "status": status,
-                "bin_type": bin.bin_type.value,
-                "zone": bin.zone
-            })
-            
-    # Sort by distance
-    nearby_bins.sort(key=lambda x: x["distance_km"])
+        bin.current_fill_level = bin.latest_state.fill_level_percent
     
-    return nearby_bins
+    return bins
@@ -32,22 +32,17 @@ def get_complaints(
 @router.post("/", response_model=ComplaintResponse)
 def create_complaint(complaint: ComplaintCreate, db: Session = Depends(get_db)):
     """Create a new citizen complaint with auto-linking to nearest bin"""
-    from geopy.distance import geodesic
-    from app.models.database_models import Bin
+    from app.utils.spatial_index import bin_index
 
     complaint_data = complaint.dict()
     complaint_id = f"CMP_{uuid.uuid4().hex[:8].upper()}"
     
     # Auto-link to nearest bin if bin_id is not provided
     if not complaint_data.get("bin_id"):
-        bins = db.query(Bin).all()
-        if bins:
-            user_loc = (complaint_data["latitude"], complaint_data["longitude"])
-            closest_bin = min(
-                bins, 
-                key=lambda b: geodesic(user_loc, (b.latitude, b.longitude)).km
-            )
-            complaint_data["bin_id"] = closest_bin.bin_id
+        bin_index.ensure_built(db)
+        nearest = bin_index.nearest(complaint_data["latitude"], complaint_data["longitude"], k=1)
+        if nearest:
+            complaint_data["bin_id"] = nearest[0][0]
 
     db_complaint = Complaint(
         complaint_id=complaint_id,
@@ -5,17 +5,28 @@ Endpoints for ML-based fill-level prediction and model management
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
 
-from app.models.database_models import Bin, BinReading
+from app.models.database_models import Bin, BinLatestState, BacktestJob, BacktestResult, TrainingJob, TrainingResult
 from app.utils.database import get_db
-from app.ml.fill_level_forecaster import FillLevelForecaster, ModelComparator
-from app.middleware.auth import get_current_user, require_role
+from app.ml.fill_level_forecaster import MODEL_TYPES, FillLevelForecaster, ModelComparator
+from app.ml.batch_forecaster import forecast_bins
+from app.ml.global_forecaster import GlobalForecaster, GLOBAL_MODEL_TYPES, DEFAULT_GLOBAL_MODEL_TYPE
+from app.ml.model_registry import model_registry
+from app.ml.training_jobs import submit_training_job, submit_global_training_job, job_status, get_job
+from app.ml.backtesting import (
+    BACKTEST_FOLDS, BACKTEST_MODEL_TYPES, backtest_job_status, get_backtest_job, submit_backtest_job
+)
+from app.ml.reading_loader import load_reading_frame
+from app.ml.forecast_store import forecast_store, forecast_scheduler
+from app.middleware.auth import get_current_user, get_optional_user, require_role
 
 router = APIRouter()
 
+# Models trained and compared by /compare-models
+COMPARED_MODEL_TYPES = ['linear', 'tree', 'forest', 'arima']
+
 
 def get_bin_info(bin: Bin) -> dict:
     """Convert Bin object to dictionary for feature engineering"""
@@ -29,69 +40,298 @@ def get_bin_info(bin: Bin) -> dict:
     }
 
 
-@router.post("/train")
+def run_prediction(bin_id: str, readings: List, bin_info: dict, hours_ahead: int,
+                   model_type: str, strategy: str) -> dict:
+    """Forecast one bin with its own models or the pooled global model"""
+    if model_type != 'global':
+        return FillLevelForecaster(bin_id).predict(readings, bin_info, hours_ahead, model_type, strategy)
+    
+    if strategy == 'direct':
+        return {'error': 'The global model only supports the recursive strategy'}
+    global_model = GlobalForecaster.load()
+    if global_model is None:
+        return {'error': 'Global model not trained'}
+    return global_model.predict(bin_id, readings, bin_info, hours_ahead)
+
+
+def prediction_lookback(bin_id: str, model_type: str, strategy: str) -> Optional[int]:
+    """
+    Latest readings run_prediction needs for the bin, as recorded when its
+    model was trained (None: models trained before lookbacks were recorded,
+    which are given the full history)
+    """
+    if model_type == 'global':
+        global_model = GlobalForecaster.load()
+        return global_model.bin_lookback(bin_id) if global_model is not None else None
+    model_key = f'{model_type}_direct' if strategy == 'direct' and model_type != 'arima' else model_type
+    return FillLevelForecaster(bin_id).lookback(model_key)
+
+
+@router.post("/train", status_code=202)
 def train_models(
     bin_ids: Optional[List[str]] = Query(None),
     model_types: List[str] = Query(['linear', 'tree', 'forest']),
+    strategy: str = Query('recursive', regex='^(recursive|direct)$'),
+    resample: Optional[bool] = Query(None),
+    tune: bool = Query(False),
     db: Session = Depends(get_db),
     user: Dict = Depends(require_role("admin"))  # Admin only
 ):
     """
-    Train ML models for specified bins
+    Start a background job training ML models for specified bins
+    
+    Bins are sharded across a pool of worker processes; poll
+    /train/jobs/{job_id} for progress and /train/jobs/{job_id}/results
+    for per-bin metrics.
     
     Args:
         bin_ids: List of bin IDs to train (if None, train all bins)
         model_types: List of model types to train (linear, tree, forest, arima)
+        strategy: recursive (one-step models) or direct (multi-horizon models)
+        resample: Resample readings onto an hourly grid before feature
+            engineering (omitted: keep each model's current setting)
+        tune: Search tree and forest hyperparameters with time-series
+            cross-validation first; the chosen ones are saved per bin and
+            reused by later retrains until the next search
     
     Returns:
-        Training results with metrics for each bin and model
+        The queued job's id and status
     """
+    unknown = sorted(set(model_types) - set(MODEL_TYPES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown model types: {', '.join(unknown)}")
+    
     # Get bins to train
+    query = db.query(Bin)
     if bin_ids:
-        bins = db.query(Bin).filter(Bin.bin_id.in_(bin_ids)).all()
-    else:
-        bins = db.query(Bin).limit(10).all()  # Limit to 10 for performance
+        query = query.filter(Bin.bin_id.in_(bin_ids))
+    bins = query.all()
     
     if not bins:
         raise HTTPException(status_code=404, detail="No bins found")
     
-    results = {}
+    job = submit_training_job(
+        db, {bin.bin_id: get_bin_info(bin) for bin in bins}, model_types, strategy, resample, tune
+    )
+    return job_status(job)
+
+
+@router.get("/train/jobs")
+def list_training_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """List recent training jobs, newest first"""
+    jobs = db.query(TrainingJob).order_by(TrainingJob.created_at.desc()).limit(limit).all()
+    return {'count': len(jobs), 'jobs': [job_status(job) for job in jobs]}
+
+
+@router.get("/train/jobs/{job_id}")
+def get_training_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """Status and progress of a training job"""
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job_status(job)
+
+
+@router.get("/train/jobs/{job_id}/results")
+def get_training_results(
+    job_id: str,
+    errors_only: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """
+    Per-bin results of a training job, in completion order
+    
+    Args:
+        job_id: Training job identifier
+        errors_only: Only return bins that failed to train
+        skip: Results to skip
+        limit: Maximum results to return
     
-    for bin in bins:
-        # Get historical readings (at least 30 days recommended)
-        readings = db.query(BinReading).filter(
-            BinReading.bin_id == bin.bin_id
-        ).order_by(BinReading.timestamp.asc()).all()
-        
-        if len(readings) < 20:
-            results[bin.bin_id] = {'error': 'Insufficient data (need at least 20 readings)'}
-            continue
-        
-        # Create forecaster
-        forecaster = FillLevelForecaster(bin.bin_id)
-        
-        # Get bin info
-        bin_info = get_bin_info(bin)
-        
-        # Train models
-        try:
-            metrics = forecaster.train_models(readings, bin_info, model_types)
-            results[bin.bin_id] = metrics
-        except Exception as e:
-            results[bin.bin_id] = {'error': str(e)}
+    Returns:
+        Metrics or error for each bin
+    """
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    
+    query = db.query(TrainingResult).filter(TrainingResult.job_id == job_id)
+    if errors_only:
+        query = query.filter(TrainingResult.error.isnot(None))
+    results = query.order_by(TrainingResult.id).offset(skip).limit(limit).all()
     
     return {
-        'trained_bins': len([r for r in results.values() if 'error' not in r]),
-        'total_bins': len(bins),
-        'results': results
+        **job_status(job),
+        'results': {
+            result.bin_id: {'error': result.error} if result.error else result.metrics
+            for result in results
+        }
     }
 
 
+@router.post("/backtest", status_code=202)
+def backtest_models(
+    bin_ids: Optional[List[str]] = Query(None),
+    model_types: List[str] = Query(['linear', 'tree', 'forest']),
+    strategy: str = Query('recursive', regex='^(recursive|direct)$'),
+    horizons: Optional[List[int]] = Query(None),
+    folds: int = Query(BACKTEST_FOLDS, ge=1, le=50),
+    resample: Optional[bool] = Query(None),
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """
+    Start a background walk-forward backtest for specified bins
+    
+    At each of up to `folds` forecast origins per bin, every model type is
+    fitted on the readings up to the origin and scored on the fill levels
+    that followed, at each horizon. Saved models are not touched. Poll
+    /backtest/jobs/{job_id} for progress and, once completed, per-horizon
+    MAE/RMSE pooled over bins; /backtest/jobs/{job_id}/results has each bin's.
+    
+    Args:
+        bin_ids: List of bin IDs to backtest (if None, all bins)
+        model_types: Model types to evaluate (linear, tree, forest, arima)
+        strategy: recursive (one-step models) or direct (multi-horizon models)
+        horizons: Hours ahead to score, 1-168 (default 1, 6, 12, 24, 48, 168)
+        folds: Maximum forecast origins per bin
+        resample: Resample readings onto an hourly grid before feature
+            engineering (omitted: the setting saved with each bin's first model type)
+    
+    Returns:
+        The queued job's id and status
+    """
+    unknown = sorted(set(model_types) - set(BACKTEST_MODEL_TYPES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown model types: {', '.join(unknown)}")
+    if horizons and not all(1 <= h <= 168 for h in horizons):
+        raise HTTPException(status_code=400, detail="Horizons must be between 1 and 168 hours")
+    
+    query = db.query(Bin)
+    if bin_ids:
+        query = query.filter(Bin.bin_id.in_(bin_ids))
+    bins = query.all()
+    
+    if not bins:
+        raise HTTPException(status_code=404, detail="No bins found")
+    
+    job = submit_backtest_job(
+        db, {bin.bin_id: get_bin_info(bin) for bin in bins}, model_types, strategy, horizons, folds, resample
+    )
+    return backtest_job_status(job)
+
+
+@router.get("/backtest/jobs")
+def list_backtest_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """List recent backtest jobs, newest first"""
+    jobs = db.query(BacktestJob).order_by(BacktestJob.created_at.desc()).limit(limit).all()
+    return {'count': len(jobs), 'jobs': [backtest_job_status(job) for job in jobs]}
+
+
+@router.get("/backtest/jobs/{job_id}")
+def get_backtest(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """Status and progress of a backtest job, with per-horizon errors once completed"""
+    job = get_backtest_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return backtest_job_status(job)
+
+
+@router.get("/backtest/jobs/{job_id}/results")
+def get_backtest_results(
+    job_id: str,
+    errors_only: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """
+    Per-bin results of a backtest job, in completion order
+    
+    Args:
+        job_id: Backtest job identifier
+        errors_only: Only return bins that could not be backtested
+        skip: Results to skip
+        limit: Maximum results to return
+    
+    Returns:
+        Per-model, per-horizon errors or error for each bin
+    """
+    job = get_backtest_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    
+    query = db.query(BacktestResult).filter(BacktestResult.job_id == job_id)
+    if errors_only:
+        query = query.filter(BacktestResult.error.isnot(None))
+    results = query.order_by(BacktestResult.id).offset(skip).limit(limit).all()
+    
+    return {
+        **backtest_job_status(job),
+        'results': {
+            result.bin_id: {'error': result.error} if result.error else result.metrics
+            for result in results
+        }
+    }
+
+
+@router.post("/train-global", status_code=202)
+def train_global_model(
+    model_type: str = Query(DEFAULT_GLOBAL_MODEL_TYPE, regex=f"^({'|'.join(GLOBAL_MODEL_TYPES)})$"),
+    compare_per_bin: bool = Query(True),
+    db: Session = Depends(get_db),
+    user: Dict = Depends(require_role("admin"))  # Admin only
+):
+    """
+    Start a background job training one pooled model across all bins
+    
+    Trains on each bin's latest readings in the training worker pool; poll
+    /train/jobs/{job_id}, whose summary holds the metrics once completed.
+    The model trained is served for model_type=global from then on.
+    
+    Args:
+        model_type: gbm (gradient boosting) or forest
+        compare_per_bin: Keep a bin's own saved model where it beats the
+            pooled model on that bin's holdout
+    
+    Returns:
+        The queued job's id and status
+    """
+    bins = db.query(Bin).all()
+    if not bins:
+        raise HTTPException(status_code=404, detail="No bins found")
+    
+    job = submit_global_training_job(
+        db, {bin.bin_id: get_bin_info(bin) for bin in bins}, model_type, compare_per_bin
+    )
+    return job_status(job)
+
+
 @router.get("/predict/{bin_id}")
 def predict_fill_level(
     bin_id: str,
     hours_ahead: int = Query(24, ge=1, le=168),  # 1 hour to 7 days
-    model_type: str = Query('forest', regex='^(linear|tree|forest|arima)$'),
+    model_type: str = Query('forest', regex='^(linear|tree|forest|arima|global)$'),
+    strategy: str = Query('recursive', regex='^(recursive|direct)$'),
     db: Session = Depends(get_db)
 ):
     """
@@ -100,7 +340,9 @@ def predict_fill_level(
     Args:
         bin_id: Bin identifier
         hours_ahead: Hours to predict ahead (1-168)
-        model_type: Model to use (linear, tree, forest, arima)
+        model_type: Model to use (linear, tree, forest, arima, or global for
+            the pooled model)
+        strategy: recursive or direct multi-horizon forecasting
     
     Returns:
         Predictions with hourly breakdown
@@ -110,10 +352,13 @@ def predict_fill_level(
     if not bin:
         raise HTTPException(status_code=404, detail="Bin not found")
     
-    # Get historical readings
-    readings = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id
-    ).order_by(BinReading.timestamp.asc()).all()
+    # Served from the precomputed forecasts while fresh
+    precomputed = forecast_store.get(db, [bin_id], model_type, strategy, hours_ahead)
+    if bin_id in precomputed:
+        return precomputed[bin_id]
+    
+    # Get the readings the model needs, however long the bin's history
+    readings = load_reading_frame(db, bin_id, limit=prediction_lookback(bin_id, model_type, strategy))
     
     if len(readings) < 20:
         raise HTTPException(
@@ -121,20 +366,19 @@ def predict_fill_level(
             detail="Insufficient data for prediction (need at least 20 readings)"
         )
     
-    # Create forecaster
-    forecaster = FillLevelForecaster(bin_id)
-    
     # Get bin info
     bin_info = get_bin_info(bin)
     
     # Make prediction
     try:
-        prediction = forecaster.predict(readings, bin_info, hours_ahead, model_type)
+        prediction = run_prediction(bin_id, readings, bin_info, hours_ahead, model_type, strategy)
         
         if 'error' in prediction:
             raise HTTPException(status_code=400, detail=prediction['error'])
         
         return prediction
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -142,51 +386,54 @@ def predict_fill_level(
 @router.get("/compare-models/{bin_id}")
 def compare_models(
     bin_id: str,
-    db: Session = Depends(get_db)
+    refresh: bool = Query(False),
+    db: Session = Depends(get_db),
+    user: Optional[Dict] = Depends(get_optional_user)
 ):
     """
     Compare performance of all models for a bin
     
+    Served from the metrics saved when the models were trained; with
+    refresh (admin only), all models are also retrained in a background
+    job and the comparison updates once it completes.
+    
     Args:
         bin_id: Bin identifier
+        refresh: Schedule retraining of linear, tree, forest and ARIMA
     
     Returns:
-        Comparison of RMSE, MAE, R² for each model
+        Comparison of RMSE, MAE, R² for each model, with when and on which
+        readings each was trained; empty all_metrics with a message if
+        none are trained yet
     """
+    if refresh:
+        if user is None:
+            raise HTTPException(status_code=401, detail="Authentication required to retrain models")
+        if user.get("role") != "admin":
+            raise HTTPException(status_code=403, detail="Insufficient permissions. Required role: admin")
+    
     # Get bin
     bin = db.query(Bin).filter(Bin.bin_id == bin_id).first()
     if not bin:
         raise HTTPException(status_code=404, detail="Bin not found")
     
-    # Get historical readings
-    readings = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id
-    ).order_by(BinReading.timestamp.asc()).all()
+    saved = FillLevelForecaster(bin_id).load_metrics()
+    metrics = {model_type: saved[model_type] for model_type in COMPARED_MODEL_TYPES if model_type in saved}
     
-    if len(readings) < 20:
-        raise HTTPException(
-            status_code=400, 
-            detail="Insufficient data for model comparison"
-        )
+    if metrics:
+        comparison = ModelComparator.compare_models(metrics)
+    else:
+        comparison = {
+            'all_metrics': {},
+            'recommended_model': None,
+            'message': 'No trained models for this bin yet; train them to compare'
+        }
     
-    # Create forecaster and train all models
-    forecaster = FillLevelForecaster(bin_id)
-    bin_info = get_bin_info(bin)
+    if refresh:
+        job = submit_training_job(db, {bin_id: get_bin_info(bin)}, COMPARED_MODEL_TYPES)
+        comparison['refresh_job'] = job_status(job)
     
-    try:
-        # Train all available models
-        metrics = forecaster.train_models(
-            readings, 
-            bin_info, 
-            model_types=['linear', 'tree', 'forest', 'arima']
-        )
-        
-        # Compare models
-        comparison = ModelComparator.compare_models(metrics)
-        
-        return comparison
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return comparison
 
 
 @router.get("/feature-importance/{bin_id}")
@@ -229,8 +476,9 @@ def get_feature_importance(
 def get_batch_predictions(
     threshold: float = Query(70.0, ge=0, le=100),
     hours_ahead: int = Query(24, ge=1, le=168),
-    model_type: str = Query('forest', regex='^(linear|tree|forest|arima)$'),
-    limit: int = Query(20, ge=1, le=50),
+    model_type: str = Query('forest', regex='^(linear|tree|forest|arima|global)$'),
+    strategy: str = Query('recursive', regex='^(recursive|direct)$'),
+    limit: int = Query(20, ge=1, le=5000),
     db: Session = Depends(get_db)
 ):
     """
@@ -240,54 +488,30 @@ def get_batch_predictions(
         threshold: Only predict for bins above this fill level
         hours_ahead: Hours to predict ahead
         model_type: Model to use
+        strategy: recursive or direct multi-horizon forecasting
         limit: Maximum number of bins to predict
     
     Returns:
         Predictions for all bins above threshold
     """
     # Get bins with latest readings above threshold
-    subquery = db.query(
-        BinReading.bin_id,
-        func.max(BinReading.timestamp).label('max_timestamp')
-    ).group_by(BinReading.bin_id).subquery()
-    
-    high_fill_readings = db.query(BinReading).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
-    ).filter(BinReading.fill_level_percent >= threshold).limit(limit).all()
-    
-    if not high_fill_readings:
+    bins = db.query(Bin).join(Bin.latest_state).filter(
+        BinLatestState.fill_level_percent >= threshold
+    ).order_by(Bin.id).limit(limit).all()
+    
+    if not bins:
         return {
             'count': 0,
             'predictions': []
         }
     
-    bin_ids = [r.bin_id for r in high_fill_readings]
-    bins = db.query(Bin).filter(Bin.bin_id.in_(bin_ids)).all()
-    
-    predictions = []
-    
-    for bin in bins:
-        # Get historical readings
-        readings = db.query(BinReading).filter(
-            BinReading.bin_id == bin.bin_id
-        ).order_by(BinReading.timestamp.asc()).all()
-        
-        if len(readings) < 20:
-            continue
-        
-        # Create forecaster
-        forecaster = FillLevelForecaster(bin.bin_id)
-        bin_info = get_bin_info(bin)
-        
-        try:
-            prediction = forecaster.predict(readings, bin_info, hours_ahead, model_type)
-            
-            if 'error' not in prediction:
-                predictions.append(prediction)
-        except:
-            continue
+    # Fresh precomputed forecasts; the rest in one reading query and one
+    # model call per step per distinct model
+    precomputed = forecast_store.get(db, [bin.bin_id for bin in bins], model_type, strategy, hours_ahead)
+    predictions = list(precomputed.values())
+    remaining = {bin.bin_id: get_bin_info(bin) for bin in bins if bin.bin_id not in precomputed}
+    if remaining:
+        predictions += forecast_bins(db, remaining, hours_ahead, model_type, strategy)
     
     # Sort by hours until full
     predictions.sort(key=lambda x: x.get('hours_until_full') or 999)
@@ -303,7 +527,8 @@ def get_historical_vs_predicted(
     bin_id: str,
     days_back: int = Query(7, ge=1, le=30),
     hours_ahead: int = Query(24, ge=1, le=168),
-    model_type: str = Query('forest', regex='^(linear|tree|forest|arima)$'),
+    model_type: str = Query('forest', regex='^(linear|tree|forest|arima|global)$'),
+    strategy: str = Query('recursive', regex='^(recursive|direct)$'),
     db: Session = Depends(get_db)
 ):
     """
@@ -314,6 +539,7 @@ def get_historical_vs_predicted(
         days_back: Days of historical data to include
         hours_ahead: Hours to predict ahead
         model_type: Model to use
+        strategy: recursive or direct multi-horizon forecasting
     
     Returns:
         Historical readings + predicted values
@@ -323,12 +549,17 @@ def get_historical_vs_predicted(
     if not bin:
         raise HTTPException(status_code=404, detail="Bin not found")
     
-    # Get historical readings
+    # A fresh precomputed forecast needs only the historical window. Otherwise
+    # the window doubles as the prediction's history when it covers the
+    # model's lookback; if not, load the lookback, which covers the window
+    precomputed = forecast_store.get(db, [bin_id], model_type, strategy, hours_ahead).get(bin_id)
     cutoff_time = datetime.utcnow() - timedelta(days=days_back)
-    readings = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id,
-        BinReading.timestamp >= cutoff_time
-    ).order_by(BinReading.timestamp.asc()).all()
+    readings = all_readings = load_reading_frame(db, bin_id, since=cutoff_time)
+    if precomputed is None:
+        lookback = prediction_lookback(bin_id, model_type, strategy)
+        if lookback is None or len(readings) < lookback:
+            all_readings = load_reading_frame(db, bin_id, limit=lookback)
+            readings = all_readings[all_readings['timestamp'] >= cutoff_time]
     
     if len(readings) < 10:
         raise HTTPException(
@@ -336,18 +567,11 @@ def get_historical_vs_predicted(
             detail="Insufficient historical data"
         )
     
-    # Get all readings for training
-    all_readings = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id
-    ).order_by(BinReading.timestamp.asc()).all()
-    
-    # Create forecaster
-    forecaster = FillLevelForecaster(bin_id)
     bin_info = get_bin_info(bin)
     
     try:
         # Make prediction
-        prediction = forecaster.predict(all_readings, bin_info, hours_ahead, model_type)
+        prediction = precomputed or run_prediction(bin_id, all_readings, bin_info, hours_ahead, model_type, strategy)
         
         if 'error' in prediction:
             raise HTTPException(status_code=400, detail=prediction['error'])
@@ -355,11 +579,13 @@ def get_historical_vs_predicted(
         # Format historical data
         historical = [
             {
-                'timestamp': r.timestamp,
-                'fill_level_percent': r.fill_level_percent,
+                'timestamp': timestamp,
+                'fill_level_percent': fill_level,
                 'type': 'actual'
             }
-            for r in readings
+            for timestamp, fill_level in zip(
+                readings['timestamp'].dt.to_pydatetime(), readings['fill_level_percent'].tolist()
+            )
         ]
         
         # Format predicted data
@@ -375,6 +601,7 @@ def get_historical_vs_predicted(
         return {
             'bin_id': bin_id,
             'model_type': model_type,
+            'strategy': strategy,
             'historical': historical,
             'predicted': predicted,
             'current_fill_level': prediction.get('current_fill_level'),
@@ -383,3 +610,27 @@ def get_historical_vs_predicted(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/forecast-store/stats")
+def get_forecast_store_stats(db: Session = Depends(get_db)):
+    """
+    Monitoring metrics for the precomputed forecasts
+    
+    Returns:
+        Scheduler cycle counts and durations, refresh lag (age of the oldest
+        stored forecast), stored forecast count and served/live counters
+    """
+    return forecast_scheduler.stats(db)
+
+
+@router.get("/model-registry/stats")
+def get_model_registry_stats():
+    """
+    Monitoring counters for the in-process model cache
+    
+    Returns:
+        Entry count and approximate size against their limits, plus
+        hit/miss/eviction/invalidation counters and total load time
+    """
+    return model_registry.stats()
@@ -1,36 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.models.database_models import Bin, BinReading
+from sqlalchemy.orm import Session, joinedload
+from app.models.database_models import Bin, BinReading, BinLatestState, Vehicle
 from app.utils.database import get_db
-from app.ml.predictor import predict_fill_level
+from app.ml.predictor import (
+    predict_fill_level, predict_from_regression_state,
+    load_reading_windows, predict_fill_levels_batch
+)
 from app.ml.route_optimizer import optimize_collection_route
+from app.ml.fleet_planner import plan_fleet_routes
 from typing import List, Dict
 from datetime import datetime
-from app.models.schemas import FillLevelPrediction, RouteOptimization, RouteOptimizationRequest
+from app.models.schemas import (
+    FillLevelPrediction, RouteOptimization, RouteOptimizationRequest,
+    FleetRouteRequest, FleetRoutePlan
+)
 
 router = APIRouter()
 
+def _predict_bin(db: Session, bin: Bin, hours_ahead: int, not_enough_detail: str):
+    """
+    Predict from the bin's running regression state; bins without one yet,
+    or whose state holds fewer than 5 readings (e.g. one written before the
+    state table was seeded), use their raw readings
+    """
+    state = bin.regression_state
+    if state is not None and (state.reading_count or 0) >= 5:
+        return predict_from_regression_state(state, hours_ahead)
+    
+    readings = db.query(BinReading).filter(
+        BinReading.bin_id == bin.bin_id
+    ).order_by(BinReading.timestamp.desc()).limit(100).all()
+    
+    if len(readings) < 5:
+        raise HTTPException(status_code=400, detail=not_enough_detail)
+    
+    return predict_fill_level(readings, hours_ahead)
+
 @router.get("/fill-level/{bin_id}", response_model=FillLevelPrediction)
 def predict_bin_fill_level(bin_id: str, hours_ahead: int = 24, db: Session = Depends(get_db)):
     """Predict when a bin will be full"""
     
     # Get bin
-    bin = db.query(Bin).filter(Bin.bin_id == bin_id).first()
+    bin = db.query(Bin).options(joinedload(Bin.regression_state)).filter(Bin.bin_id == bin_id).first()
     if not bin:
         raise HTTPException(status_code=404, detail="Bin not found")
     
-    # Get historical readings
-    readings = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id
-    ).order_by(BinReading.timestamp.desc()).limit(100).all()
-    
-    if len(readings) < 5:
-        raise HTTPException(status_code=400, detail="Not enough data for prediction")
-    
-    # Make prediction
-    prediction = predict_fill_level(readings, hours_ahead)
-    
-    return prediction
+    return _predict_bin(db, bin, hours_ahead, "Not enough data for prediction")
 
 @router.post("/route-optimization", response_model=RouteOptimization)
 def optimize_route(
@@ -43,62 +58,82 @@ def optimize_route(
     threshold = request.threshold
     
     # Get bins needing collection
-    from sqlalchemy.sql import func
-    
-    subquery = db.query(
-        BinReading.bin_id,
-        func.max(BinReading.timestamp).label('max_timestamp')
-    ).group_by(BinReading.bin_id).subquery()
+    bins = db.query(Bin).join(Bin.latest_state).filter(
+        BinLatestState.fill_level_percent >= threshold
+    ).all()
     
-    high_fill_readings = db.query(BinReading).join(
-        subquery,
-        (BinReading.bin_id == subquery.c.bin_id) &
-        (BinReading.timestamp == subquery.c.max_timestamp)
-    ).filter(BinReading.fill_level_percent >= threshold).all()
-    
-    if not high_fill_readings:
+    if not bins:
         return {
             "vehicle_id": vehicle_id,
             "bins_to_collect": [],
             "total_distance_km": 0,
             "estimated_duration_minutes": 0,
-            "optimized_sequence": []
+            "optimized_sequence": [],
+            "strategy": request.strategy,
+            "initial_distance_km": 0
         }
     
-    bin_ids = [r.bin_id for r in high_fill_readings]
-    bins = db.query(Bin).filter(Bin.bin_id.in_(bin_ids)).all()
-    
     # Optimize route
-    optimized_route = optimize_collection_route(vehicle_id, bins)
+    optimized_route = optimize_collection_route(
+        vehicle_id, bins,
+        strategy=request.strategy.value,
+        time_limit_seconds=request.time_limit_seconds
+    )
     
     return optimized_route
 
+@router.post("/fleet-routes", response_model=FleetRoutePlan)
+def optimize_fleet_routes(
+    request: FleetRouteRequest,
+    db: Session = Depends(get_db)
+):
+    """Plan capacity-constrained routes for all available vehicles"""
+    
+    vehicle_query = db.query(Vehicle).filter(Vehicle.status == "available")
+    if request.vehicle_ids:
+        vehicle_query = vehicle_query.filter(Vehicle.vehicle_id.in_(request.vehicle_ids))
+    vehicles = vehicle_query.order_by(Vehicle.id).all()
+    
+    if not vehicles:
+        raise HTTPException(status_code=404, detail="No available vehicles")
+    
+    # Bins needing collection, with their current fill level
+    rows = db.query(Bin, BinLatestState.fill_level_percent).join(Bin.latest_state).filter(
+        BinLatestState.fill_level_percent >= request.threshold
+    ).order_by(Bin.id).all()
+    
+    bins = [bin for bin, _ in rows]
+    fill_levels = {bin.bin_id: fill for bin, fill in rows}
+    depots = [(depot.latitude, depot.longitude) for depot in request.depots]
+    
+    return plan_fleet_routes(
+        vehicles, bins, fill_levels,
+        depots=depots,
+        shift_minutes=request.shift_minutes,
+        time_limit_seconds=request.time_limit_seconds
+    )
+
 @router.get("/all-bins")
 def predict_all_bins(area_name: str = None, threshold: float = 70.0, db: Session = Depends(get_db)):
     """Get predictions for all bins above threshold, optionally filtered by area"""
     
-    # Get bins
-    bin_query = db.query(Bin)
-    if area_name:
-        bin_query = bin_query.filter(Bin.area_name == area_name)
-    
-    bins = bin_query.all()
-    
-    predictions = []
-    for bin in bins:
-        readings = db.query(BinReading).filter(
-            BinReading.bin_id == bin.bin_id
-        ).order_by(BinReading.timestamp.desc()).limit(50).all()
-        
-        if len(readings) >= 5:
-            try:
-                prediction = predict_fill_level(readings, hours_ahead=24)
-                if prediction['predicted_fill_level'] >= threshold:
-                    predictions.append(prediction)
-            except:
-                continue
-    
-    return sorted(predictions, key=lambda x: x.get('hours_until_full', 999))
+    # Latest 50 readings of every bin in one query
+    windows = load_reading_windows(
+        db, window=50, bin_filter=(Bin.area_name == area_name) if area_name else None
+    )
+    
+    predictions = [
+        prediction for prediction in predict_fill_levels_batch(
+            windows['bin_ids'], windows['offsets'], windows['timestamps'],
+            windows['fill_levels'], hours_ahead=24, min_readings=5
+        )
+        if prediction['predicted_fill_level'] >= threshold
+    ]
+    
+    return sorted(
+        predictions,
+        key=lambda x: x['hours_until_full'] if x['hours_until_full'] is not None else 999
+    )
 
 @router.post("/bin-fill")
 def predict_specific_bin_fill(
@@ -112,16 +147,8 @@ def predict_specific_bin_fill(
     if not bin_id:
         raise HTTPException(status_code=400, detail="bin_id is required")
         
-    bin = db.query(Bin).filter(Bin.bin_id == bin_id).first()
+    bin = db.query(Bin).options(joinedload(Bin.regression_state)).filter(Bin.bin_id == bin_id).first()
     if not bin:
         raise HTTPException(status_code=404, detail="Bin not found")
-        
-    readings = db.query(BinReading).filter(
-        BinReading.bin_id == bin_id
-    ).order_by(BinReading.timestamp.desc()).limit(100).all()
     
-    if len(readings) < 5:
-        raise HTTPException(status_code=400, detail="Not enough data")
-        
-    prediction = predict_fill_level(readings, hours_ahead)
-    return prediction
+    return _predict_bin(db, bin, hours_ahead, "Not enough data")
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from app.models.database_models import Vehicle, GPSLog
 from app.models.schemas import VehicleCreate, VehicleResponse
 from app.utils.database import get_db
@@ -11,17 +11,29 @@ router = APIRouter()
 @router.get("/", response_model=List[VehicleResponse])
 def get_vehicles(db: Session = Depends(get_db)):
     """Get all vehicles"""
-    vehicles = db.query(Vehicle).all()
+    # Rank GPS logs per vehicle so the latest position joins in the same query
+    ranked_gps = db.query(
+        GPSLog.vehicle_id,
+        GPSLog.latitude,
+        GPSLog.longitude,
+        func.row_number().over(
+            partition_by=GPSLog.vehicle_id,
+            order_by=(desc(GPSLog.timestamp), desc(GPSLog.id))
+        ).label('rn')
+    ).subquery()
+    
+    rows = db.query(Vehicle, ranked_gps.c.latitude, ranked_gps.c.longitude).outerjoin(
+        ranked_gps,
+        (ranked_gps.c.vehicle_id == Vehicle.vehicle_id) & (ranked_gps.c.rn == 1)
+    ).all()
     
     # Enrich with latest GPS position
-    for vehicle in vehicles:
-        latest_gps = db.query(GPSLog).filter(
-            GPSLog.vehicle_id == vehicle.vehicle_id
-        ).order_by(desc(GPSLog.timestamp)).first()
-        
-        if latest_gps:
-            vehicle.current_latitude = latest_gps.latitude
-            vehicle.current_longitude = latest_gps.longitude
+    vehicles = []
+    for vehicle, latitude, longitude in rows:
+        if latitude is not None:
+            vehicle.current_latitude = latitude
+            vehicle.current_longitude = longitude
+        vehicles.append(vehicle)
     
     return vehicles
 
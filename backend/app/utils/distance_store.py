@@ -0,0 +1,252 @@
+"""
+Persistent pairwise distance store for bins
+In-memory index over a memory-mapped lower-triangle file, extended incrementally
+"""
+
+import json
+import os
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.distance import distance_matrix, distances_from
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml', 'distance_cache')
+INITIAL_CAPACITY = 256
+# Rows computed per vectorized call when many bins are new or stale
+ROW_BLOCK = 1024
+# Coordinates closer than this (degrees, ~1 cm) count as unchanged
+COORD_TOLERANCE = 1e-7
+
+
+def triangle_size(rows):
+    """Entries in the first `rows` rows of a packed lower triangle (diagonal included)"""
+    return rows * (rows + 1) // 2
+
+
+class DistanceMatrixStore:
+    """
+    Bin-to-bin distances (km, float32) addressed by slot
+
+    Each bin_id owns a slot; a new bin costs one O(n) row of distances and
+    a bin whose coordinates changed has its row and column recomputed.
+    Distances are symmetric, so only the lower triangle (row >= column) is
+    stored, packed row after row: row i starts at i * (i + 1) / 2. Adding a
+    bin appends one contiguous row, and growing the capacity only extends
+    the file, since existing rows never move. The triangle lives in
+    matrix.dat (np.memmap, capacity rows, doubled on demand) and the slot
+    layout in index.json, so the cache survives restarts.
+
+    Writes are serialised with a lock inside one process; the files are not
+    meant to be shared by several writer processes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._capacity = 0
+        self._loaded = False
+        self._slots = {}
+        self._bin_ids = []
+
+    # ---- storage -------------------------------------------------------
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.cache_dir, 'matrix.dat')
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, 'index.json')
+
+    def _reset(self, capacity: int) -> None:
+        self._slots = {}  # bin_id -> slot
+        self._bin_ids = []
+        self._lats = np.empty(0, dtype=np.float64)
+        self._lons = np.empty(0, dtype=np.float64)
+        self._matrix = self._open_matrix(capacity, create=True)
+
+    def _open_matrix(self, capacity: int, create: bool) -> np.ndarray:
+        self._capacity = capacity
+        if self.cache_dir is None:
+            return np.zeros(triangle_size(capacity), dtype=np.float32)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        mode = 'w+' if create else 'r+'
+        return np.memmap(self._matrix_path, dtype=np.float32, mode=mode, shape=(triangle_size(capacity),))
+
+    def _load(self) -> None:
+        """Restore slots and matrix from disk; start empty if they disagree"""
+        self._loaded = True
+        if self.cache_dir is None or not os.path.exists(self._index_path):
+            self._reset(INITIAL_CAPACITY)
+            return
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+            capacity = int(index['capacity'])
+            # Also rejects square matrices written before the triangle layout
+            expected_bytes = triangle_size(capacity) * np.dtype(np.float32).itemsize
+            if os.path.getsize(self._matrix_path) != expected_bytes:
+                raise ValueError("matrix file size does not match index")
+            matrix = self._open_matrix(capacity, create=False)
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset(INITIAL_CAPACITY)
+            return
+
+        self._matrix = matrix
+        self._bin_ids = [bin_id for bin_id, _, _ in index['bins']]
+        self._slots = {bin_id: slot for slot, bin_id in enumerate(self._bin_ids)}
+        self._lats = np.array([lat for _, lat, _ in index['bins']], dtype=np.float64)
+        self._lons = np.array([lon for _, _, lon in index['bins']], dtype=np.float64)
+
+    def _save_index(self) -> None:
+        if self.cache_dir is None:
+            return
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        index = {
+            'capacity': self._capacity,
+            'bins': [
+                [bin_id, float(lat), float(lon)]
+                for bin_id, lat, lon in zip(self._bin_ids, self._lats, self._lons)
+            ]
+        }
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(index))
+        os.replace(tmp_path, self._index_path)
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._capacity
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        if not isinstance(self._matrix, np.memmap):
+            old = self._matrix
+            self._matrix = self._open_matrix(capacity, create=True)
+            self._matrix[:len(old)] = old
+            return
+
+        # Existing rows keep their offsets: extend the file (zero-filled) in place
+        self._matrix.flush()
+        del self._matrix
+        with open(self._matrix_path, 'r+b') as f:
+            f.truncate(triangle_size(capacity) * np.dtype(np.float32).itemsize)
+        self._matrix = self._open_matrix(capacity, create=False)
+
+    def _write_distances(self, slot: int, distances: np.ndarray, column: bool) -> None:
+        """
+        Store one bin's distances to every slot: its row, and with column
+        the part of its column below the diagonal, held in later rows
+        """
+        start = triangle_size(slot)
+        self._matrix[start:start + slot + 1] = distances[:slot + 1]
+        below = np.arange(slot + 1, len(distances))
+        if column and len(below):
+            self._matrix[triangle_size(below) + slot] = distances[slot + 1:]
+
+    # ---- public API ----------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._bin_ids)
+
+    def sync(self, points: Iterable[Tuple[str, float, float]]) -> np.ndarray:
+        """
+        Make sure every (bin_id, lat, lon) has an up-to-date row
+
+        Returns:
+            Slot index per point, in input order
+        """
+        points = list(points)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            stale = []
+            new_points = []
+            first_new = len(self._bin_ids)
+            for bin_id, lat, lon in points:
+                slot = self._slots.get(bin_id)
+                if slot is None:
+                    self._slots[bin_id] = len(self._bin_ids) + len(new_points)
+                    new_points.append((bin_id, lat, lon))
+                elif slot >= len(self._bin_ids):
+                    continue  # repeated new bin
+                elif not (abs(self._lats[slot] - lat) <= COORD_TOLERANCE
+                          and abs(self._lons[slot] - lon) <= COORD_TOLERANCE):
+                    # Coordinates moved: the cached row and column are invalid
+                    self._lats[slot], self._lons[slot] = lat, lon
+                    stale.append(slot)
+
+            if new_points:
+                self._grow(first_new + len(new_points))
+                self._bin_ids.extend(bin_id for bin_id, _, _ in new_points)
+                self._lats = np.concatenate([self._lats, [lat for _, lat, _ in new_points]])
+                self._lons = np.concatenate([self._lons, [lon for _, _, lon in new_points]])
+                stale.extend(range(first_new, len(self._bin_ids)))
+
+            if stale:
+                for start in range(0, len(stale), ROW_BLOCK):
+                    block = np.array(stale[start:start + ROW_BLOCK])
+                    rows = distance_matrix(self._lats[block], self._lons[block], self._lats, self._lons)
+                    # New bins' columns are covered by the rows of the bins added after them
+                    for slot, distances in zip(block, rows):
+                        self._write_distances(int(slot), distances, column=slot < first_new)
+                self._save_index()
+
+            return np.array([self._slots[bin_id] for bin_id, _, _ in points], dtype=np.int64)
+
+    def submatrix(self, points: Sequence[Tuple[str, float, float]]) -> np.ndarray:
+        """Distance matrix (km, float64) between the given bins, in input order"""
+        slots = self.sync(points)
+        rows = np.maximum.outer(slots, slots)
+        cols = np.minimum.outer(slots, slots)
+        with self._lock:
+            return np.asarray(self._matrix[triangle_size(rows) + cols], dtype=np.float64)
+
+    def matrix_with_depots(self, depots: Sequence[Tuple[float, float]], bins: Sequence) -> np.ndarray:
+        """
+        Full routing matrix with depot nodes first, then bins
+
+        Bin-to-bin distances come from the store; depot rows are O(n) and
+        computed on the fly since depots are not bins.
+        """
+        num_depots = len(depots)
+        bin_lats = np.array([bin.latitude for bin in bins], dtype=np.float64)
+        bin_lons = np.array([bin.longitude for bin in bins], dtype=np.float64)
+        all_lats = np.concatenate([[lat for lat, _ in depots], bin_lats])
+        all_lons = np.concatenate([[lon for _, lon in depots], bin_lons])
+
+        matrix = np.empty((len(all_lats), len(all_lats)), dtype=np.float64)
+        for i, (lat, lon) in enumerate(depots):
+            row = distances_from(lat, lon, all_lats, all_lons)
+            matrix[i, :] = row
+            matrix[:, i] = row
+        matrix[num_depots:, num_depots:] = self.submatrix([
+            (bin.bin_id, lat, lon) for bin, lat, lon in zip(bins, bin_lats, bin_lons)
+        ])
+        return matrix
+
+    def invalidate(self, bin_ids: Optional[List[str]] = None) -> None:
+        """Drop cached rows for some bins (next use recomputes them), or everything"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if bin_ids is None:
+                self._reset(INITIAL_CAPACITY)
+                self._save_index()
+                return
+            for bin_id in bin_ids:
+                slot = self._slots.get(bin_id)
+                if slot is not None:
+                    # NaN coordinates never match, forcing a recompute
+                    self._lats[slot] = self._lons[slot] = np.nan
+            self._save_index()
+
+
+# Process-wide store shared by the route planners
+distance_store = DistanceMatrixStore()
@@ -0,0 +1,113 @@
+"""
+Maintenance of the bin_latest_state table
+Keeps one row per bin with its newest reading so read paths stay O(bins)
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.database_models import BinLatestState, BinReading
+
+STATE_COLUMNS = ['fill_level_percent', 'weight_kg', 'temperature_c', 'battery_percent']
+
+
+def upsert_latest_state(db: Session, readings: List[Dict]) -> None:
+    """
+    Upsert the latest-state rows for a batch of readings
+
+    Args:
+        db: Session; the caller commits
+        readings: Reading dicts with bin_id, timestamp and the sensor columns
+    """
+    # Keep only the newest reading per bin so one statement never touches a row twice
+    newest = {}
+    for reading in readings:
+        current = newest.get(reading['bin_id'])
+        if current is None or reading['timestamp'] >= current['timestamp']:
+            newest[reading['bin_id']] = reading
+
+    if not newest:
+        return
+
+    rows = [
+        {
+            'bin_id': bin_id,
+            'reading_timestamp': reading['timestamp'],
+            **{col: reading.get(col) for col in STATE_COLUMNS}
+        }
+        for bin_id, reading in newest.items()
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        _merge_latest_state(db, rows)
+        return
+
+    stmt = dialect_insert(BinLatestState)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BinLatestState.bin_id],
+        set_={
+            'reading_timestamp': stmt.excluded.reading_timestamp,
+            **{col: stmt.excluded[col] for col in STATE_COLUMNS}
+        },
+        # Late-arriving readings must not overwrite a newer state
+        where=stmt.excluded.reading_timestamp >= BinLatestState.reading_timestamp
+    )
+    db.execute(stmt, rows)
+
+
+def _merge_latest_state(db: Session, rows: List[Dict]) -> None:
+    """Portable fallback for dialects without ON CONFLICT support"""
+    existing = {
+        state.bin_id: state
+        for state in db.query(BinLatestState).filter(
+            BinLatestState.bin_id.in_([row['bin_id'] for row in rows])
+        )
+    }
+    for row in rows:
+        state = existing.get(row['bin_id'])
+        if state is None:
+            db.add(BinLatestState(**row))
+        elif row['reading_timestamp'] >= state.reading_timestamp:
+            for key, value in row.items():
+                setattr(state, key, value)
+
+
+def backfill_latest_state(db: Session) -> int:
+    """
+    Rebuild bin_latest_state from bin_readings in one set-based statement
+
+    Returns:
+        Number of bins with a latest state
+    """
+    ranked = select(
+        BinReading.bin_id,
+        BinReading.timestamp,
+        *[getattr(BinReading, col) for col in STATE_COLUMNS],
+        func.row_number().over(
+            partition_by=BinReading.bin_id,
+            order_by=(BinReading.timestamp.desc(), BinReading.id.desc())
+        ).label('rn')
+    ).subquery()
+
+    latest = select(
+        ranked.c.bin_id,
+        ranked.c.timestamp,
+        *[ranked.c[col] for col in STATE_COLUMNS]
+    ).where(ranked.c.rn == 1)
+
+    db.query(BinLatestState).delete()
+    db.execute(
+        insert(BinLatestState).from_select(
+            ['bin_id', 'reading_timestamp', *STATE_COLUMNS], latest
+        )
+    )
+    db.commit()
+
+    return db.query(func.count(BinLatestState.bin_id)).scalar()
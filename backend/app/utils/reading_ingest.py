@@ -0,0 +1,169 @@
+"""
+Bulk ingestion of bin sensor readings
+Validates, resolves bins set-wise and inserts readings in chunked batches
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Bin, BinReading, User, UserRole
+from app.models.schemas import BinReadingCreate
+from app.utils.latest_state import upsert_latest_state
+from app.utils.regression_state import update_regression_state
+
+DEFAULT_CHUNK_SIZE = 1000
+FULL_ALERT_THRESHOLD = 90.0
+
+
+def get_alert_users(db: Session) -> List[User]:
+    """Get admins and workers with a verified phone number"""
+    return db.query(User).filter(
+        (User.role.in_([UserRole.ADMIN, UserRole.WORKER])) &
+        (User.is_phone_verified == True)
+    ).all()
+
+
+def notify_bin_full(alert_users: List[User], bin_id: str, area_name: Optional[str]):
+    """Send a full-bin SMS to the users responsible for the bin's area"""
+    from app.utils.twilio_service import twilio_service
+
+    # Filter by area if available
+    if area_name:
+        area_users = [u for u in alert_users if u.area == area_name or u.role == UserRole.ADMIN]
+        if area_users:
+            alert_users = area_users
+
+    for user in alert_users:
+        if user.phone:
+            twilio_service.notify_bin_full(
+                user.phone,
+                bin_id,
+                area_name or "Unknown Area"
+            )
+
+
+class ReadingIngestor:
+    """
+    Accumulates raw reading payloads and writes them in chunks
+
+    Each payload is validated against BinReadingCreate, bins are resolved
+    with one IN query per chunk (cached for the rest of the request) and
+    accepted rows are inserted with a single executemany per chunk, followed
+    by one bin_latest_state upsert and a bin_regression_state update.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.results = []
+        self.accepted = 0
+        self.rejected = 0
+        self._bin_areas = {}  # bin_id -> area_name for bins that exist
+        self._missing_bins = set()
+        self._alert_users = None
+        self._pending = []
+
+    def add(self, payload) -> None:
+        """Validate one payload and queue it for insertion"""
+        result = {'index': len(self.results), 'bin_id': None, 'status': 'pending', 'error': None}
+        self.results.append(result)
+
+        if isinstance(payload, dict):
+            result['bin_id'] = payload.get('bin_id')
+        try:
+            if not isinstance(payload, dict):
+                raise ValueError('Reading must be a JSON object')
+            reading = BinReadingCreate(**payload)
+        except ValidationError as e:
+            self._reject(result, '; '.join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            return
+        except ValueError as e:
+            self._reject(result, str(e))
+            return
+
+        self._pending.append((result, reading))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def add_line(self, line: str) -> None:
+        """Queue one NDJSON line, skipping blank lines"""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            result = {'index': len(self.results), 'bin_id': None, 'status': 'pending', 'error': None}
+            self.results.append(result)
+            self._reject(result, 'Invalid JSON')
+            return
+        self.add(payload)
+
+    def add_many(self, payloads: Iterable) -> None:
+        for payload in payloads:
+            self.add(payload)
+
+    def add_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.add_line(line)
+
+    def flush(self) -> None:
+        """Insert the queued chunk and commit it"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+
+        # Resolve unseen bins in one set-based query
+        unseen = {reading.bin_id for _, reading in pending}
+        unseen -= self._bin_areas.keys() | self._missing_bins
+        if unseen:
+            found = self.db.query(Bin.bin_id, Bin.area_name).filter(Bin.bin_id.in_(unseen)).all()
+            self._bin_areas.update(found)
+            self._missing_bins.update(unseen - self._bin_areas.keys())
+
+        rows = []
+        full_bins = {}
+        for result, reading in pending:
+            if reading.bin_id not in self._bin_areas:
+                self._reject(result, 'Bin not found')
+                continue
+            row = reading.dict()
+            row['timestamp'] = datetime.utcnow()
+            rows.append(row)
+            result['status'] = 'accepted'
+            self.accepted += 1
+            if reading.fill_level_percent >= FULL_ALERT_THRESHOLD:
+                full_bins[reading.bin_id] = self._bin_areas[reading.bin_id]
+
+        if rows:
+            self.db.execute(insert(BinReading), rows)
+            upsert_latest_state(self.db, rows)
+            update_regression_state(self.db, rows)
+        self.db.commit()
+
+        if full_bins:
+            if self._alert_users is None:
+                self._alert_users = get_alert_users(self.db)
+            for bin_id, area_name in full_bins.items():
+                notify_bin_full(self._alert_users, bin_id, area_name)
+
+    def summary(self) -> Dict:
+        """Flush remaining readings and return per-row statuses"""
+        self.flush()
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'results': self.results
+        }
+
+    def _reject(self, result: Dict, error: str) -> None:
+        result['status'] = 'rejected'
+        result['error'] = error
+        self.rejected += 1
@@ -0,0 +1,181 @@
+"""
+Maintenance of the bin_regression_state table
+Running least-squares sums per bin so fill-level predictions are O(1)
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.database_models import BinReading, BinRegressionState
+
+# Effective number of readings in the fit; the per-request fit used the last 100
+DECAY_WINDOW = 100
+DECAY = 1.0 - 1.0 / DECAY_WINDOW
+SUM_COLUMNS = ['weight_sum', 'sum_x', 'sum_y', 'sum_xy', 'sum_xx']
+STATE_COLUMNS = ['bin_id', 'anchor_timestamp', 'last_fill_level', 'reading_count'] + SUM_COLUMNS
+
+
+def new_regression_state(bin_id: str) -> BinRegressionState:
+    return BinRegressionState(
+        bin_id=bin_id, reading_count=0, **{col: 0.0 for col in SUM_COLUMNS}
+    )
+
+
+def fold_reading(state: BinRegressionState, timestamp, fill_level: float) -> None:
+    """
+    Add one reading to a state: decay the existing sums, then add the point
+
+    A reading at or after the anchor moves the anchor to it (shifting the
+    sums so x stays relative to the newest reading); a late reading is added
+    at its negative offset without moving the anchor.
+    """
+    if state.anchor_timestamp is None:
+        state.anchor_timestamp = timestamp
+
+    hours = (timestamp - state.anchor_timestamp).total_seconds() / 3600
+    if hours >= 0:
+        # x_i -> x_i - hours for every point already in the sums
+        w, sx, sy = state.weight_sum, state.sum_x, state.sum_y
+        state.sum_xx = state.sum_xx - 2 * hours * sx + hours * hours * w
+        state.sum_xy = state.sum_xy - hours * sy
+        state.sum_x = sx - hours * w
+        state.anchor_timestamp = timestamp
+        state.last_fill_level = fill_level
+        x = 0.0
+    else:
+        x = hours
+
+    state.weight_sum = state.weight_sum * DECAY + 1.0
+    state.sum_x = state.sum_x * DECAY + x
+    state.sum_y = state.sum_y * DECAY + fill_level
+    state.sum_xy = state.sum_xy * DECAY + x * fill_level
+    state.sum_xx = state.sum_xx * DECAY + x * x
+    state.reading_count = (state.reading_count or 0) + 1
+
+
+def replay_readings(db: Session, bin_ids: Optional[List[str]] = None,
+                    batch_size: int = 10000) -> Dict[str, BinRegressionState]:
+    """
+    Build fresh regression states by folding bin_readings in time order
+
+    Args:
+        bin_ids: Bins to replay (default: every bin with readings)
+
+    Returns:
+        New, unsaved states keyed by bin_id
+    """
+    query = db.query(
+        BinReading.bin_id, BinReading.timestamp, BinReading.fill_level_percent
+    ).filter(
+        BinReading.timestamp.isnot(None), BinReading.fill_level_percent.isnot(None)
+    )
+    if bin_ids is not None:
+        query = query.filter(BinReading.bin_id.in_(bin_ids))
+
+    states = {}
+    rows = query.order_by(BinReading.bin_id, BinReading.timestamp, BinReading.id).yield_per(batch_size)
+    for bin_id, timestamp, fill_level in rows:
+        state = states.get(bin_id)
+        if state is None:
+            state = states[bin_id] = new_regression_state(bin_id)
+        fold_reading(state, timestamp, fill_level)
+    return states
+
+
+def update_regression_state(db: Session, readings: List[Dict]) -> None:
+    """
+    Fold a batch of readings into their bins' regression state
+
+    A bin without a state yet (its readings predate the table, or it is
+    new) gets one seeded from its whole history, so predictions do not
+    restart from a single point. The batch must already be written to
+    bin_readings (added to the session is enough); it is part of that
+    history and is not folded a second time.
+
+    Args:
+        db: Session; the caller commits
+        readings: Reading dicts with bin_id, timestamp and fill_level_percent
+    """
+    by_bin = defaultdict(list)
+    for reading in readings:
+        by_bin[reading['bin_id']].append(reading)
+    if not by_bin:
+        return
+
+    existing = set(db.execute(
+        select(BinRegressionState.bin_id).where(BinRegressionState.bin_id.in_(list(by_bin)))
+    ).scalars())
+    unseeded = [bin_id for bin_id in by_bin if bin_id not in existing]
+    seeded = _seed_states(db, unseeded) if unseeded else set()
+
+    # Row locks (where supported) keep concurrent ingests from losing updates
+    states = {
+        state.bin_id: state
+        for state in db.query(BinRegressionState).filter(
+            BinRegressionState.bin_id.in_(list(by_bin))
+        ).with_for_update().populate_existing()
+    }
+
+    for bin_id, bin_readings in by_bin.items():
+        state = states.get(bin_id)
+        # A state this call seeded already holds the batch
+        if state is None or bin_id in seeded:
+            continue
+        for reading in sorted(bin_readings, key=lambda r: r['timestamp']):
+            fold_reading(state, reading['timestamp'], reading['fill_level_percent'])
+
+    # The session does not autoflush; make new states visible to later calls
+    db.flush()
+
+
+def _seed_states(db: Session, bin_ids: List[str]) -> Set[str]:
+    """
+    Insert states replayed from history for bins that have none
+
+    Concurrent first ingests of a bin may both get here; the insert skips
+    a state another transaction created meanwhile (ON CONFLICT DO NOTHING),
+    and that bin's batch is then folded into the winner's state as usual.
+
+    Returns:
+        Bins whose state this call inserted
+    """
+    db.flush()
+    rows = [
+        {col: getattr(state, col) for col in STATE_COLUMNS}
+        for state in replay_readings(db, bin_ids).values()
+    ]
+    if not rows:
+        return set()
+
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        db.execute(insert(BinRegressionState), rows)
+        return {row['bin_id'] for row in rows}
+
+    stmt = dialect_insert(BinRegressionState).on_conflict_do_nothing(
+        index_elements=[BinRegressionState.bin_id]
+    ).returning(BinRegressionState.bin_id)
+    return set(db.execute(stmt, rows).scalars())
+
+
+def backfill_regression_state(db: Session, batch_size: int = 10000) -> int:
+    """
+    Rebuild bin_regression_state by replaying bin_readings in time order
+
+    Returns:
+        Number of bins with a regression state
+    """
+    db.query(BinRegressionState).delete()
+
+    states = replay_readings(db, batch_size=batch_size)
+    db.add_all(states.values())
+    db.commit()
+
+    return db.query(func.count(BinRegressionState.bin_id)).scalar()
@@ -0,0 +1,198 @@
+"""
+In-process spatial index over bin locations
+Uniform lat/lon grid supporting radius and k-nearest queries
+"""
+
+import math
+import threading
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Bin
+from app.utils.distance import distances_from
+
+KM_PER_DEGREE_LAT = 111.0
+# Lower bound on km per degree used when deciding whether a ring search can stop
+MIN_KM_PER_DEGREE = 110.5
+
+
+class BinSpatialIndex:
+    """
+    Uniform grid of bin coordinates keyed by (row, col) cell
+
+    Cells are square in degrees; radius queries only visit the cells that
+    overlap the query's bounding box and compute exact distances for the
+    bins inside them.
+    """
+
+    def __init__(self, cell_size_km: float = 1.0):
+        self.cell_deg = cell_size_km / KM_PER_DEGREE_LAT
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells = defaultdict(dict)  # (row, col) -> {bin_id: (lat, lon)}
+            self._locations = {}  # bin_id -> (lat, lon)
+            self._signature = None
+            self.built = False
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def build(self, bins: Iterable[Tuple[str, float, float]], signature=None) -> None:
+        """Rebuild the index from (bin_id, latitude, longitude) tuples"""
+        with self._lock:
+            self.clear()
+            for bin_id, lat, lon in bins:
+                self._insert(bin_id, lat, lon)
+            self._signature = signature
+            self.built = True
+
+    def add(self, bin_id: str, lat: float, lon: float) -> None:
+        """Insert or move a single bin"""
+        with self._lock:
+            self._remove(bin_id)
+            self._insert(bin_id, lat, lon)
+
+    def remove(self, bin_id: str) -> None:
+        with self._lock:
+            self._remove(bin_id)
+
+    def _insert(self, bin_id: str, lat: float, lon: float) -> None:
+        if lat is None or lon is None:
+            return
+        self._cells[self._cell(lat, lon)][bin_id] = (lat, lon)
+        self._locations[bin_id] = (lat, lon)
+
+    def _remove(self, bin_id: str) -> None:
+        location = self._locations.pop(bin_id, None)
+        if location is None:
+            return
+        cell = self._cell(*location)
+        self._cells[cell].pop(bin_id, None)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, Tuple[float, float]]]:
+        dlat = radius_km / MIN_KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        dlon = radius_km / (MIN_KM_PER_DEGREE * cos_lat)
+
+        row_min, col_min = self._cell(lat - dlat, lon - dlon)
+        row_max, col_max = self._cell(lat + dlat, lon + dlon)
+
+        candidates = []
+        box_cells = (row_max - row_min + 1) * (col_max - col_min + 1)
+        if box_cells > len(self._cells):
+            # Huge radius: cheaper to walk the occupied cells than the box
+            for (row, col), members in self._cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    candidates.extend(members.items())
+        else:
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    members = self._cells.get((row, col))
+                    if members:
+                        candidates.extend(members.items())
+        return candidates
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        Find bins within radius_km of a point
+
+        Returns:
+            List of (bin_id, distance_km) sorted by distance
+        """
+        with self._lock:
+            candidates = self._candidates(lat, lon, radius_km)
+
+        if not candidates:
+            return []
+
+        bin_ids, locations = zip(*candidates)
+        coords = np.array(locations, dtype=np.float64)
+        distances = distances_from(lat, lon, coords[:, 0], coords[:, 1])
+
+        inside = np.flatnonzero(distances <= radius_km)
+        inside = inside[np.argsort(distances[inside], kind='stable')]
+        return [(bin_ids[i], float(distances[i])) for i in inside]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[str, float]]:
+        """
+        Find the k nearest bins by expanding square rings of cells
+
+        Returns:
+            List of (bin_id, distance_km) sorted by distance
+        """
+        with self._lock:
+            if not self._cells:
+                return []
+
+            center_row, center_col = self._cell(lat, lon)
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            max_ring = max(
+                abs(center_row - min(rows)), abs(center_row - max(rows)),
+                abs(center_col - min(cols)), abs(center_col - max(cols))
+            )
+
+            found = []
+            for ring in range(max_ring + 1):
+                for row in range(center_row - ring, center_row + ring + 1):
+                    for col in range(center_col - ring, center_col + ring + 1):
+                        # Only the border of the square is new in this ring
+                        if ring and abs(row - center_row) != ring and abs(col - center_col) != ring:
+                            continue
+                        members = self._cells.get((row, col))
+                        if members:
+                            coords = np.array(list(members.values()), dtype=np.float64)
+                            distances = distances_from(lat, lon, coords[:, 0], coords[:, 1])
+                            found.extend(zip(members.keys(), distances.tolist()))
+
+                if len(found) >= k:
+                    found.sort(key=lambda x: x[1])
+                    # Anything outside the searched square is at least `ring` cells away
+                    edge_lat = min(abs(lat) + (ring + 1) * self.cell_deg, 89.9)
+                    bound_km = ring * self.cell_deg * MIN_KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+                    if found[k - 1][1] <= bound_km:
+                        break
+
+            found.sort(key=lambda x: x[1])
+            return found[:k]
+
+    def ensure_built(self, db: Session) -> None:
+        """
+        Build the index on first use, and rebuild when bins were added or
+        removed outside this process (detected by bin count / max id)
+        """
+        signature = tuple(db.query(func.count(Bin.id), func.max(Bin.id)).one())
+        with self._lock:
+            if self.built and signature == self._signature:
+                return
+            rows = db.query(Bin.bin_id, Bin.latitude, Bin.longitude).all()
+            self.build(rows, signature)
+
+    def register_bin(self, bin: Bin) -> None:
+        """Keep the index in sync after a bin was committed in this process"""
+        with self._lock:
+            if not self.built:
+                return
+            self.add(bin.bin_id, bin.latitude, bin.longitude)
+            count, max_id = self._signature or (0, None)
+            self._signature = (count + 1, max(max_id or 0, bin.id))
+
+    def invalidate(self) -> None:
+        """Force a rebuild on next use (e.g. after bulk deletes)"""
+        self.clear()
+
+
+# Process-wide index shared by the routes
+bin_index = BinSpatialIndex()
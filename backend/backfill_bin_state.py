@@ -0,0 +1,35 @@
+"""
+Rebuild derived per-bin state tables from bin_readings
+Run once after upgrading, or whenever readings were written outside the API
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.database import SessionLocal, engine, Base
+from app.utils.latest_state import backfill_latest_state
+from app.utils.regression_state import backfill_regression_state
+
+
+def backfill():
+    # Make sure newly added state tables exist
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        print("Rebuilding bin_latest_state...")
+        count = backfill_latest_state(db)
+        print(f"✓ Latest state rebuilt for {count} bins")
+        print("Rebuilding bin_regression_state...")
+        count = backfill_regression_state(db)
+        print(f"✓ Regression state rebuilt for {count} bins")
+    except Exception as e:
+        print(f"Error rebuilding bin state: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill()
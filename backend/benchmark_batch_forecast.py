@@ -0,0 +1,129 @@
+"""
+Equivalence check and benchmark: cross-bin batch forecasting vs the
+per-bin query + FillLevelForecaster.predict loop previously behind
+/api/forecasting/predictions-batch
+Runs against a throwaway SQLite database and model directory
+
+Usage: python benchmark_batch_forecast.py [bins] [hours_ahead]
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+os.environ["FORECAST_MODEL_DIR"] = os.path.join(_tmp_dir, 'models')
+
+import numpy as np
+from sqlalchemy import insert, text
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading, BinType
+from app.ml.batch_forecaster import BATCH_WINDOW, forecast_bins
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.routes.forecasting import get_bin_info
+
+# Fewer readings than the batch window, so both paths see the same history
+READINGS_PER_BIN = BATCH_WINDOW - 10
+TRAINED_FORESTS = 10
+
+
+def populate(db, bin_count: int):
+    db.execute(insert(Bin), [
+        {
+            "bin_id": f"BIN_{i:05d}", "latitude": 17.385, "longitude": 78.4867,
+            "capacity_liters": 240, "bin_type": BinType.RESIDENTIAL,
+            "sensor_type": "ultrasonic", "zone": "North", "ward": 1 + i % 20
+        }
+        for i in range(bin_count)
+    ])
+
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(bin_count):
+        fill = random.uniform(0, 40)
+        phase = random.uniform(0, 24)
+        for h in range(READINGS_PER_BIN):
+            fill += max(0.0, 0.6 + 0.5 * math.sin(2 * math.pi * (h - phase) / 24) + random.gauss(0, 0.2))
+            if fill >= 95:
+                fill = random.uniform(0, 5)
+            rows.append({
+                "bin_id": f"BIN_{i:05d}", "timestamp": start + timedelta(hours=h),
+                "fill_level_percent": round(fill, 1), "weight_kg": round(fill * 0.7, 1),
+                "temperature_c": round(28 + 4 * math.sin(2 * math.pi * (h - 14) / 24), 1),
+                "battery_percent": 90.0
+            })
+    for chunk in range(0, len(rows), 50000):
+        db.execute(insert(BinReading), rows[chunk:chunk + 50000])
+    db.execute(text("CREATE INDEX ix_bench_readings_bin_time ON bin_readings (bin_id, timestamp)"))
+    db.commit()
+
+
+def per_bin_forecasts(db, bins, hours_ahead: int, model_type: str) -> dict:
+    """The old endpoint body: one history query and one predict() per bin"""
+    predictions = {}
+    for bin in bins:
+        readings = db.query(BinReading).filter(
+            BinReading.bin_id == bin.bin_id
+        ).order_by(BinReading.timestamp.asc()).all()
+        prediction = FillLevelForecaster(bin.bin_id).predict(
+            readings, get_bin_info(bin), hours_ahead, model_type
+        )
+        if 'error' not in prediction:
+            predictions[bin.bin_id] = prediction
+    return predictions
+
+
+def hourly(prediction: dict) -> np.ndarray:
+    return np.array([p['predicted_fill_level'] for p in prediction['hourly_predictions']])
+
+
+def run_benchmark(bin_count: int = 300, hours_ahead: int = 24):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    populate(db, bin_count)
+    bins = db.query(Bin).order_by(Bin.id).all()
+
+    start = time.perf_counter()
+    for i, bin in enumerate(bins):
+        readings = db.query(BinReading).filter(BinReading.bin_id == bin.bin_id).all()
+        model_types = ['linear', 'forest'] if i < TRAINED_FORESTS else ['linear']
+        FillLevelForecaster(bin.bin_id).train_models(readings, get_bin_info(bin), model_types)
+    print(f"trained {bin_count} linear and {TRAINED_FORESTS} forest models in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'model':<8} {'bins':>5} {'per-bin loop':>13} {'batch':>10} {'speedup':>8} {'max |diff|':>11}")
+    for model_type, subset in [('linear', bins), ('forest', bins[:TRAINED_FORESTS])]:
+        start = time.perf_counter()
+        expected = per_bin_forecasts(db, subset, hours_ahead, model_type)
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = forecast_bins(db, {b.bin_id: get_bin_info(b) for b in subset}, hours_ahead, model_type)
+        batch_s = time.perf_counter() - start
+
+        assert sorted(p['bin_id'] for p in actual) == sorted(expected), "different bins forecast"
+        diff = max(np.max(np.abs(hourly(p) - hourly(expected[p['bin_id']]))) for p in actual)
+        print(f"{model_type:<8} {len(subset):>5} {loop_s:>11.2f} s {batch_s:>8.2f} s "
+              f"{loop_s / batch_s:>7.1f}x {diff:>11.2e}")
+        # Both paths round to 2 decimals; allow one rounding step of drift
+        assert diff <= 0.011, f"{model_type}: forecasts differ by {diff}"
+        for p in actual:
+            assert p['hours_until_full'] == expected[p['bin_id']]['hours_until_full']
+
+    print("✓ batch forecasts match the per-bin endpoint")
+    db.close()
+
+
+if __name__ == "__main__":
+    random.seed(14)
+    run_benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    )
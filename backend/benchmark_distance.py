@@ -0,0 +1,66 @@
+"""
+Accuracy and speed check for the vectorized haversine kernel
+Compares app.utils.distance against geopy's geodesic, one pair at a time
+
+Usage: python benchmark_distance.py [matrix_size]
+"""
+
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.utils.distance import distance_matrix, distances_from
+
+CENTER_LAT, CENTER_LON = 17.3850, 78.4867
+MAX_RELATIVE_ERROR = 0.006
+
+
+def random_points(count: int, spread_deg: float) -> tuple:
+    lats = np.array([CENTER_LAT + random.uniform(-spread_deg, spread_deg) for _ in range(count)])
+    lons = np.array([CENTER_LON + random.uniform(-spread_deg, spread_deg) for _ in range(count)])
+    return lats, lons
+
+
+def check_accuracy():
+    """Haversine must stay within 0.6% of geodesic from city to continental scale"""
+    print(f"{'spread':>10}{'max abs err km':>18}{'max rel err':>14}")
+    for spread in [0.05, 0.5, 5.0, 30.0]:
+        lats, lons = random_points(200, spread)
+        fast = distance_matrix(lats, lons)
+        exact = distance_matrix(lats, lons, accurate=True)
+
+        off_diagonal = ~np.eye(len(lats), dtype=bool)
+        abs_err = np.abs(fast - exact)[off_diagonal]
+        rel_err = abs_err / exact[off_diagonal]
+        print(f"{spread:>9}°{abs_err.max():>18.5f}{rel_err.max():>14.5f}")
+        assert rel_err.max() < MAX_RELATIVE_ERROR
+
+        origin_fast = distances_from(lats[0], lons[0], lats, lons)
+        assert np.allclose(origin_fast, fast[0])
+
+
+def run_benchmark(size: int = 500):
+    lats, lons = random_points(size, 0.1)
+
+    start = time.perf_counter()
+    distance_matrix(lats, lons)
+    fast_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    distance_matrix(lats, lons, accurate=True)
+    loop_elapsed = time.perf_counter() - start
+
+    print(f"\n{size}x{size} matrix")
+    print(f"  geopy geodesic loop: {loop_elapsed * 1000:>10.1f} ms")
+    print(f"  numpy haversine:     {fast_elapsed * 1000:>10.1f} ms")
+    print(f"  speedup:             {loop_elapsed / fast_elapsed:>10.0f}x")
+
+
+if __name__ == "__main__":
+    check_accuracy()
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
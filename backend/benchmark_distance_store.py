@@ -0,0 +1,86 @@
+"""
+Benchmark: persistent distance-matrix store vs rebuilding the matrix per request
+Also checks incremental extension, coordinate invalidation and reload from disk
+
+Usage: python benchmark_distance_store.py [bins]
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.utils.distance import distance_matrix
+from app.utils.distance_store import DistanceMatrixStore
+
+CENTER_LAT, CENTER_LON = 17.3850, 78.4867
+# Stored as float32 km
+TOLERANCE_KM = 1e-4
+
+
+def make_points(count: int, spread_deg: float = 0.3) -> list:
+    return [
+        (f"BIN_{i:06d}",
+         CENTER_LAT + random.uniform(-spread_deg, spread_deg),
+         CENTER_LON + random.uniform(-spread_deg, spread_deg))
+        for i in range(count)
+    ]
+
+
+def expected(points: list) -> np.ndarray:
+    lats = np.array([p[1] for p in points])
+    lons = np.array([p[2] for p in points])
+    return distance_matrix(lats, lons)
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def run_benchmark(count: int = 5000):
+    cache_dir = tempfile.mkdtemp()
+    points = make_points(count)
+    store = DistanceMatrixStore(cache_dir)
+
+    cold_ms, _ = timed(lambda: store.sync(points))
+    print(f"cold build of {count} bins:            {cold_ms:>9.1f} ms")
+    matrix_mb = os.path.getsize(os.path.join(cache_dir, 'matrix.dat')) / 2**20
+    print(f"matrix file (lower triangle):         {matrix_mb:>9.1f} MB")
+
+    # A typical route request: a few hundred high-fill bins out of the fleet
+    request = random.sample(points, 300)
+    rebuild_ms, fresh = timed(lambda: expected(request))
+    cached_ms, cached = timed(lambda: store.submatrix(request))
+    assert np.allclose(cached, fresh, atol=TOLERANCE_KM)
+    print(f"300-bin request, rebuild matrix:      {rebuild_ms:>9.2f} ms")
+    print(f"300-bin request, cached submatrix:    {cached_ms:>9.2f} ms")
+
+    new_bin = (f"BIN_{count:06d}", CENTER_LAT, CENTER_LON)
+    full_ms, _ = timed(lambda: expected(points + [new_bin]))
+    extend_ms, _ = timed(lambda: store.sync([new_bin]))
+    print(f"add one bin, full rebuild:            {full_ms:>9.1f} ms")
+    print(f"add one bin, incremental row:         {extend_ms:>9.2f} ms")
+
+    # Moving a bin must refresh its row and column
+    moved = (request[0][0], request[0][1] + 0.01, request[0][2])
+    request = [moved] + request[1:]
+    assert np.allclose(store.submatrix(request), expected(request), atol=TOLERANCE_KM)
+
+    # A fresh store reads everything back from the memory-mapped file
+    reloaded = DistanceMatrixStore(cache_dir)
+    reload_ms, cached = timed(lambda: reloaded.submatrix(request))
+    assert len(reloaded) == count + 1
+    assert np.allclose(cached, expected(request), atol=TOLERANCE_KM)
+    print(f"reload from disk + 300-bin request:   {reload_ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
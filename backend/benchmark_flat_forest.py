@@ -0,0 +1,94 @@
+"""
+Benchmark: per-bin random forests saved as sklearn pickles vs as flat,
+memory-mapped FlatForest arrays
+Reports file size, cold load time and process-private (anonymous) memory
+held by the loaded models, and single-row / batch prediction time; files go
+to a throwaway directory. Linux only (reads /proc/self/smaps_rollup).
+
+Usage: python benchmark_flat_forest.py [bins]
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import numpy as np
+
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.flat_forest import flatten_model
+from app.ml.model_registry import dump_artifact
+
+FEATURES = 20
+TRAIN_ROWS = 700
+BATCH_ROWS = 5000
+
+
+def fit_forest(seed: int):
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 100, (TRAIN_ROWS, FEATURES))
+    y = X[:, 0] * 0.6 + X[:, 1] * 0.3 + rng.normal(0, 2, TRAIN_ROWS)
+    # The forecaster's own forest settings
+    return FillLevelForecaster._new_model('forest').set_params(random_state=seed).fit(X, y)
+
+
+def anonymous_bytes() -> int:
+    # Memory-mapped model files are file-backed pages, shared between processes
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Anonymous:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def load_all(paths: list, mmap_mode) -> tuple:
+    before = anonymous_bytes()
+    start = time.perf_counter()
+    models = [joblib.load(path, mmap_mode=mmap_mode) for path in paths]
+    elapsed = time.perf_counter() - start
+    return models, elapsed, anonymous_bytes() - before
+
+
+def time_predict(model, X: np.ndarray, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(X)
+    return (time.perf_counter() - start) / repeats
+
+
+def run_benchmark(bin_count: int):
+    tmp_dir = tempfile.mkdtemp()
+    pickled, flat = [], []
+    for i in range(bin_count):
+        forest = fit_forest(i)
+        pickled.append(os.path.join(tmp_dir, f'BIN_{i:04d}_forest.joblib'))
+        flat.append(os.path.join(tmp_dir, f'BIN_{i:04d}_forest_flat.joblib'))
+        joblib.dump(forest, pickled[-1])
+        dump_artifact(flatten_model(forest), flat[-1])
+
+    sklearn_models, sklearn_s, sklearn_private = load_all(pickled, None)
+    flat_models, flat_s, flat_private = load_all(flat, 'r')
+
+    X_row = np.random.default_rng(0).uniform(0, 100, (1, FEATURES))
+    X_batch = np.random.default_rng(1).uniform(0, 100, (BATCH_ROWS, FEATURES))
+    for sk, fl in zip(sklearn_models, flat_models):
+        assert np.array_equal(sk.predict(X_batch), fl.predict(X_batch)), "flat predictions differ"
+
+    size = lambda paths: sum(os.path.getsize(p) for p in paths) / 2**20
+    print(f"{bin_count} per-bin forests of {sklearn_models[0].n_estimators} trees")
+    print(f"{'':<22} {'sklearn':>10} {'flat mmap':>10}")
+    print(f"{'files (MB)':<22} {size(pickled):>10.1f} {size(flat):>10.1f}")
+    print(f"{'cold load (ms)':<22} {sklearn_s * 1000:>10.1f} {flat_s * 1000:>10.1f}")
+    print(f"{'private memory (MB)':<22} {sklearn_private / 2**20:>10.2f} {flat_private / 2**20:>10.2f}")
+    print(f"{'1-row predict (ms)':<22} {time_predict(sklearn_models[0], X_row, 50) * 1000:>10.2f} "
+          f"{time_predict(flat_models[0], X_row, 50) * 1000:>10.2f}")
+    print(f"{f'{BATCH_ROWS}-row predict (ms)':<22} {time_predict(sklearn_models[0], X_batch, 5) * 1000:>10.1f} "
+          f"{time_predict(flat_models[0], X_batch, 5) * 1000:>10.1f}")
+    print("✓ flat predictions identical to sklearn for every bin")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
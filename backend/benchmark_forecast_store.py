@@ -0,0 +1,124 @@
+"""
+Benchmark: forecasting reads served from the precomputed bin_forecasts
+table vs computed live
+Runs one full scheduler cycle, then times /predict and /predictions-batch
+both ways and checks they return the same forecasts; runs against a
+throwaway SQLite database and model directory
+
+Usage: python benchmark_forecast_store.py [bins]
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+os.environ["FORECAST_MODEL_DIR"] = os.path.join(_tmp_dir, 'models')
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import main
+from app.utils.database import SessionLocal
+from app.utils.latest_state import backfill_latest_state
+from app.models.database_models import Bin, BinForecast, BinReading, BinType
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.forecast_store import ForecastScheduler, forecast_store
+from app.ml.reading_loader import load_reading_frames
+from app.routes.forecasting import get_bin_info
+
+READINGS_PER_BIN = 200
+MODEL_TYPE = 'linear'
+PREDICT_CALLS = 50
+
+
+def populate(db, bin_count: int):
+    db.execute(insert(Bin), [
+        {
+            "bin_id": f"BIN_{i:05d}", "latitude": 17.385, "longitude": 78.4867,
+            "capacity_liters": 240, "bin_type": BinType.RESIDENTIAL,
+            "sensor_type": "ultrasonic", "zone": "North", "ward": 1 + i % 20
+        }
+        for i in range(bin_count)
+    ])
+
+    end = datetime.utcnow()
+    rows = []
+    for i in range(bin_count):
+        fill = random.uniform(0, 40)
+        phase = random.uniform(0, 24)
+        for h in range(READINGS_PER_BIN):
+            fill += max(0.0, 0.6 + 0.5 * math.sin(2 * math.pi * (h - phase) / 24) + random.gauss(0, 0.2))
+            if fill >= 95:
+                fill = random.uniform(0, 5)
+            rows.append({
+                "bin_id": f"BIN_{i:05d}", "timestamp": end - timedelta(hours=READINGS_PER_BIN - h),
+                "fill_level_percent": round(fill, 1), "weight_kg": round(fill * 0.7, 1),
+                "temperature_c": round(28 + 4 * math.sin(2 * math.pi * (h - 14) / 24), 1),
+                "battery_percent": 90.0
+            })
+    for chunk in range(0, len(rows), 50000):
+        db.execute(insert(BinReading), rows[chunk:chunk + 50000])
+    db.commit()
+    backfill_latest_state(db)
+
+    bins = {bin.bin_id: get_bin_info(bin) for bin in db.query(Bin).all()}
+    for bin_id, readings in load_reading_frames(db).items():
+        FillLevelForecaster(bin_id).train_models(readings, bins[bin_id], [MODEL_TYPE])
+
+
+def hourly(predictions: list) -> dict:
+    return {p['bin_id']: [h['predicted_fill_level'] for h in p['hourly_predictions']] for p in predictions}
+
+
+def time_reads(client, bin_ids: list) -> tuple:
+    start = time.perf_counter()
+    single = [
+        client.get(f"/api/forecasting/predict/{bin_id}?model_type={MODEL_TYPE}").json()
+        for bin_id in bin_ids[:PREDICT_CALLS]
+    ]
+    predict_ms = (time.perf_counter() - start) * 1000 / PREDICT_CALLS
+
+    start = time.perf_counter()
+    batch = client.get(
+        f"/api/forecasting/predictions-batch?threshold=0&limit={len(bin_ids)}&model_type={MODEL_TYPE}"
+    ).json()['predictions']
+    batch_ms = (time.perf_counter() - start) * 1000
+    return single, batch, predict_ms, batch_ms
+
+
+def run_benchmark(bin_count: int):
+    main.Base.metadata.create_all(bind=main.engine)
+    db = SessionLocal()
+    populate(db, bin_count)
+    bin_ids = [bin_id for bin_id, in db.query(Bin.bin_id).order_by(Bin.id)]
+    client = TestClient(main.app)
+
+    live_single, live_batch, live_predict_ms, live_batch_ms = time_reads(client, bin_ids)
+
+    scheduler = ForecastScheduler(forecast_store, models=[(MODEL_TYPE, 'recursive')])
+    written = scheduler.run_cycle(full=True)
+    print(f"{bin_count} bins: full refresh cycle wrote {written} forecasts in {scheduler.last_cycle_seconds:.2f} s")
+
+    served_single, served_batch, served_predict_ms, served_batch_ms = time_reads(client, bin_ids)
+    assert all('generated_at' in p for p in served_single + served_batch), "forecasts not served from the table"
+    assert hourly(served_single) == hourly(live_single), "served /predict forecasts differ from live ones"
+    assert hourly(served_batch) == hourly(live_batch), "served batch forecasts differ from live ones"
+
+    print(f"{'endpoint':<28} {'live ms':>9} {'served ms':>10}")
+    print(f"{'/predict (per call)':<28} {live_predict_ms:>9.1f} {served_predict_ms:>10.1f}")
+    print(f"{f'/predictions-batch ({bin_count})':<28} {live_batch_ms:>9.1f} {served_batch_ms:>10.1f}")
+    print(f"✓ served forecasts match live ones; {db.query(BinForecast).count()} rows stored")
+    db.close()
+
+
+if __name__ == "__main__":
+    random.seed(22)
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
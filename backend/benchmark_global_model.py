@@ -0,0 +1,111 @@
+"""
+Benchmark: one pooled forecasting model vs per-bin models
+Seeds a throwaway database with seed_database.py, trains per-bin models and
+the global model (gbm and forest) into a temp model directory, and compares
+training time, model bytes and holdout MAE of recursive forecasts from
+each bin's 80% split point
+
+Usage: python benchmark_global_model.py
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+os.environ["FORECAST_MODEL_DIR"] = os.path.join(_tmp_dir, 'models')
+os.environ["FORECAST_SCHEDULER"] = "0"
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading
+from app.ml.batch_forecaster import forecast_bins
+from app.ml.fill_level_forecaster import FillLevelForecaster, MODEL_DIR
+from app.ml.global_forecaster import DEFAULT_GLOBAL_MODEL_TYPE, GlobalForecaster
+from app.routes.forecasting import get_bin_info
+import seed_database
+
+
+def model_files(prefix: str) -> list:
+    return [name for name in os.listdir(MODEL_DIR) if name.startswith(prefix)]
+
+
+def model_bytes(prefix: str) -> int:
+    return sum(os.path.getsize(os.path.join(MODEL_DIR, name)) for name in model_files(prefix))
+
+
+def run_benchmark():
+    Base.metadata.create_all(bind=engine)
+    random.seed(15)
+    seed_database.seed_database()
+
+    db = SessionLocal()
+    bins = []
+    for bin in db.query(Bin).order_by(Bin.id).all():
+        readings = db.query(BinReading).filter(
+            BinReading.bin_id == bin.bin_id
+        ).order_by(BinReading.timestamp.asc()).all()
+        bins.append((bin.bin_id, readings, get_bin_info(bin)))
+
+    start = time.perf_counter()
+    for bin_id, readings, bin_info in bins:
+        FillLevelForecaster(bin_id).train_models(readings, bin_info, ['linear', 'tree', 'forest'])
+    per_bin_s = time.perf_counter() - start
+    per_bin_bytes = model_bytes('BIN_')
+    per_bin_files = len(model_files('BIN_'))
+
+    print(f"\n{len(bins)} bins, {sum(len(r) for _, r, _ in bins)} readings")
+    print(f"{'approach':<28} {'train':>8} {'model bytes':>12} {'files':>6} {'holdout MAE':>12}")
+    print(f"{'per-bin linear/tree/forest':<28} {per_bin_s:>7.1f}s {per_bin_bytes:>12,} {per_bin_files:>6}")
+
+    for model_type in ['gbm', 'forest']:
+        global_model = GlobalForecaster(model_type)
+        metrics = global_model.train(bins)
+        print(f"{'global ' + model_type:<28} {metrics['train_seconds']:>7.1f}s {model_bytes('global_' + model_type):>12,} "
+              f"{len(model_files('global_' + model_type)):>6} "
+              f"{metrics['holdout_mae']:>12.2f}")
+        print(f"{'  + ' + str(metrics['fallback_bins']) + ' per-bin fallbacks':<28} {'':>8} {'':>12} {'':>6} "
+              f"{metrics['holdout_mae_with_fallback']:>12.2f}")
+
+    scored = global_model.holdout_maes.values()
+    for model_type in ['linear', 'tree', 'forest']:
+        mae = np.mean([maes[model_type] for maes in scored if model_type in maes])
+        print(f"{'per-bin ' + model_type + ' only':<28} {'':>8} {'':>12} {'':>6} {mae:>12.2f}")
+
+    # The type trained last is served, even when it is not the default
+    global_model = GlobalForecaster.load()
+    assert global_model.model_type == 'forest' != DEFAULT_GLOBAL_MODEL_TYPE
+    import main
+    response = TestClient(main.app).get(f'/api/forecasting/predict/{bins[0][0]}?model_type=global')
+    assert response.status_code == 200 and response.json()['model_type'] == 'global', response.json()
+    print("✓ /predict?model_type=global serves the global forest trained last")
+
+    # Bins without a model of their own (here a fallback bin, whose files are
+    # removed) are forecast by the pooled model
+    new_bin_id, readings, bin_info = next(
+        b for b in bins if b[0] in global_model.fallback_bins
+    )
+    for name in os.listdir(MODEL_DIR):
+        if name.startswith(f'{new_bin_id}_'):
+            os.remove(os.path.join(MODEL_DIR, name))
+    prediction = global_model.predict(new_bin_id, readings, bin_info, 24)
+    assert 'error' not in prediction and len(prediction['hourly_predictions']) == 24
+
+    batch = forecast_bins(db, {bin_id: info for bin_id, _, info in bins}, 24, 'global')
+    assert len(batch) == len(bins)
+    single = {p['timestamp']: p['predicted_fill_level'] for p in prediction['hourly_predictions']}
+    batched = next(p for p in batch if p['bin_id'] == new_bin_id)
+    assert all(abs(single[p['timestamp']] - p['predicted_fill_level']) < 0.011 for p in batched['hourly_predictions'])
+    print("✓ global model forecasts bins without per-bin models, batched and single")
+    db.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,94 @@
+"""
+Benchmark: tree and forest hyperparameters searched per bin vs the defaults
+Trains bins with different fill behaviour with the default configuration,
+then with tune=True, and compares cross-validated and holdout MAE, search
+time and the fits the successive-halving pruning saved over scoring every
+candidate on every fold; a final retrain without tune checks the searched
+configuration is reused.
+Trains into a throwaway model directory, never the real one.
+
+Usage: python benchmark_hyperparameter_search.py [readings_per_bin]
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["FORECAST_MODEL_DIR"] = _tmp_dir
+
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.model_registry import model_registry
+
+BIN_INFO = {
+    'bin_type': 'residential', 'capacity_liters': 240, 'zone': 'North',
+    'ward': 1, 'latitude': 17.385, 'longitude': 78.4867
+}
+MODEL_TYPES = ['tree', 'forest']
+
+
+def fill_step(behaviour: str, h: int) -> float:
+    if behaviour == 'steady':
+        return random.uniform(0.8, 1.2)
+    if behaviour == 'daily':
+        return max(0.0, 1.0 + 1.5 * math.sin(2 * math.pi * h / 24) + random.gauss(0, 0.3))
+    if behaviour == 'noisy':
+        return max(0.0, random.gauss(1.0, 2.5))
+    # bursty: quiet, with occasional large dumps
+    return random.uniform(8, 20) if random.random() < 0.05 else random.uniform(0, 0.3)
+
+
+def make_readings(bin_id: str, behaviour: str, count: int) -> list:
+    start = datetime(2026, 1, 1)
+    fill = 10.0
+    readings = []
+    for h in range(count):
+        fill = fill + fill_step(behaviour, h) if fill < 95 else random.uniform(0, 5)
+        readings.append(SimpleNamespace(
+            bin_id=bin_id, timestamp=start + timedelta(hours=h),
+            fill_level_percent=min(fill, 100.0), weight_kg=fill * 0.7,
+            temperature_c=28 + 4 * math.sin(2 * math.pi * (h - 14) / 24), battery_percent=90.0
+        ))
+    return readings
+
+
+def run_benchmark(count: int):
+    print(f"{'bin':<8} {'model':<7} {'CV current':>10} {'CV chosen':>10} {'default MAE':>12} {'tuned MAE':>10} "
+          f"{'search s':>9} {'fits':>5} {'full CV':>8}  chosen")
+    for behaviour in ['steady', 'daily', 'noisy', 'bursty']:
+        bin_id = f'BIN_{behaviour.upper()}'
+        readings = make_readings(bin_id, behaviour, count)
+
+        default = FillLevelForecaster(bin_id).train_models(readings, BIN_INFO, MODEL_TYPES)
+        start = time.perf_counter()
+        tuned = FillLevelForecaster(bin_id).train_models(readings, BIN_INFO, MODEL_TYPES, tune=True)
+        elapsed = time.perf_counter() - start
+
+        model_registry.invalidate()
+        retrained = FillLevelForecaster(bin_id).train_models(readings, BIN_INFO, MODEL_TYPES)
+
+        for model_type in MODEL_TYPES:
+            tuning = tuned[model_type]['tuning']
+            chosen = tuned[model_type]['hyperparameters']
+            assert retrained[model_type]['hyperparameters'] == chosen, "retrain did not reuse the search"
+            assert retrained[model_type]['mae'] == tuned[model_type]['mae'], "retrain differs from tuned model"
+            current = tuning['current_cv_mae']
+            print(f"{behaviour:<8} {model_type:<7} {current if current is not None else 'pruned':>10} "
+                  f"{tuning['cv_mae']:>10} {default[model_type]['mae']:>12.2f} "
+                  f"{tuned[model_type]['mae']:>10.2f} {elapsed:>9.1f} {tuning['fits']:>5} "
+                  f"{tuning['candidates'] * tuning['folds']:>8}  {chosen}")
+    print("✓ retrains without tune reuse each bin's searched hyperparameters")
+
+
+if __name__ == "__main__":
+    random.seed(25)
+    warnings.filterwarnings('ignore')
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1500)
@@ -0,0 +1,84 @@
+"""
+Throughput benchmark: single-row reading endpoint vs bulk ingestion
+Runs against a throwaway SQLite database, never the real one
+
+Usage: python benchmark_ingest.py [readings] [bins]
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading, BinType
+from app.models.schemas import BinReadingCreate
+from app.routes.bins import create_bin_reading
+from app.utils.reading_ingest import ReadingIngestor
+
+
+def make_payloads(count: int, bin_ids: list) -> list:
+    # Stay below the alert threshold so SMS fan-out is not measured
+    return [
+        {
+            "bin_id": random.choice(bin_ids),
+            "fill_level_percent": round(random.uniform(0, 85), 1),
+            "weight_kg": round(random.uniform(1, 50), 1),
+            "temperature_c": round(random.uniform(20, 40), 1),
+            "battery_percent": round(random.uniform(50, 100), 1)
+        }
+        for _ in range(count)
+    ]
+
+
+def run_benchmark(count: int = 5000, bin_count: int = 500):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    bin_ids = [f"BIN_{i:05d}" for i in range(bin_count)]
+    for bin_id in bin_ids:
+        db.add(Bin(
+            bin_id=bin_id, latitude=17.385, longitude=78.4867, capacity_liters=240,
+            bin_type=BinType.RESIDENTIAL, sensor_type="ultrasonic", zone="North", ward=1
+        ))
+    db.commit()
+
+    payloads = make_payloads(count, bin_ids)
+
+    # Single-row path: one request per reading
+    start = time.perf_counter()
+    for payload in payloads:
+        create_bin_reading(payload["bin_id"], BinReadingCreate(**payload), db)
+    single_elapsed = time.perf_counter() - start
+    db.query(BinReading).delete()
+    db.commit()
+
+    print(f"{count} readings across {bin_count} bins")
+    print(f"{'path':<24}{'seconds':>10}{'readings/sec':>16}")
+    print(f"{'single-row':<24}{single_elapsed:>10.3f}{count / single_elapsed:>16.0f}")
+
+    for chunk_size in [100, 1000, 5000]:
+        start = time.perf_counter()
+        ingestor = ReadingIngestor(db, chunk_size)
+        ingestor.add_many(payloads)
+        summary = ingestor.summary()
+        elapsed = time.perf_counter() - start
+        assert summary["accepted"] == count
+        db.query(BinReading).delete()
+        db.commit()
+        label = f"bulk (chunk={chunk_size})"
+        print(f"{label:<24}{elapsed:>10.3f}{count / elapsed:>16.0f}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    bins = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    run_benchmark(count, bins)
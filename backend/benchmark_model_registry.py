@@ -0,0 +1,102 @@
+"""
+Benchmark: per-request joblib loads vs the shared model registry
+Trains models for one synthetic bin into a temp directory, then times
+repeated predictions and checks LRU eviction and mtime invalidation
+
+Usage: python benchmark_model_registry.py [requests]
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.model_registry import ModelRegistry, model_registry
+
+BIN_INFO = {
+    'bin_type': 'residential', 'capacity_liters': 240, 'zone': 'North',
+    'ward': 1, 'latitude': 17.385, 'longitude': 78.4867
+}
+
+
+def make_readings(count: int = 300) -> list:
+    start = datetime(2026, 1, 1)
+    fill = 10.0
+    readings = []
+    for h in range(count):
+        fill = fill + random.uniform(0.5, 3) if fill < 95 else random.uniform(0, 10)
+        readings.append(SimpleNamespace(
+            bin_id='BIN_BENCH', timestamp=start + timedelta(hours=h),
+            fill_level_percent=fill, weight_kg=fill * 0.7, temperature_c=28.0, battery_percent=90.0
+        ))
+    return readings
+
+
+def forecaster(model_dir: str) -> FillLevelForecaster:
+    f = FillLevelForecaster('BIN_BENCH')
+    f.model_dir = model_dir
+    return f
+
+
+def run_benchmark(requests: int = 20):
+    model_dir = tempfile.mkdtemp()
+    readings = make_readings()
+    forecaster(model_dir).train_models(readings, BIN_INFO)
+    forest_path = os.path.join(model_dir, 'BIN_BENCH_forest.joblib')
+
+    # What every request paid before: deserialize the models from disk
+    start = time.perf_counter()
+    for _ in range(requests):
+        for model_type in ['linear', 'tree', 'forest', 'forest_features']:
+            joblib.load(os.path.join(model_dir, f'BIN_BENCH_{model_type}.joblib'))
+    uncached_ms = (time.perf_counter() - start) / requests * 1000
+
+    model_registry.invalidate()
+    start = time.perf_counter()
+    for _ in range(requests):
+        forecaster(model_dir)._load_models(['forest'])
+    cached_ms = (time.perf_counter() - start) / requests * 1000
+
+    print(f"model load per request, joblib.load: {uncached_ms:>8.2f} ms")
+    print(f"model load per request, registry:    {cached_ms:>8.3f} ms")
+    print(f"registry stats: {model_registry.stats()}")
+
+    # Predictions are unchanged when served from the cache
+    fresh = forecaster(model_dir)
+    fresh.models['forest'] = joblib.load(forest_path)
+    fresh.feature_columns = joblib.load(os.path.join(model_dir, 'BIN_BENCH_forest_features.joblib'))
+    expected = fresh.predict(readings, BIN_INFO, 6, 'forest')['hourly_predictions']
+    assert forecaster(model_dir).predict(readings, BIN_INFO, 6, 'forest')['hourly_predictions'] == expected
+
+    # Retraining rewrites the file; a stale cached object must not be served
+    before = model_registry.get('BIN_BENCH', 'forest', forest_path)
+    time.sleep(0.01)
+    joblib.dump(joblib.load(forest_path), forest_path)
+    assert model_registry.get('BIN_BENCH', 'forest', forest_path) is not before
+    print("✓ rewritten model file reloaded")
+
+    # Count and size bounds
+    registry = ModelRegistry(max_entries=2, max_bytes=10 ** 9)
+    for model_type in ['linear', 'tree', 'forest']:
+        registry.get('BIN_BENCH', model_type, os.path.join(model_dir, f'BIN_BENCH_{model_type}.joblib'))
+    assert registry.stats()['entries'] == 2 and registry.evictions == 1
+
+    forest_size = os.path.getsize(forest_path)
+    registry = ModelRegistry(max_entries=10, max_bytes=forest_size + 1)
+    registry.get('BIN_BENCH', 'forest', forest_path)
+    registry.get('BIN_BENCH', 'tree', os.path.join(model_dir, 'BIN_BENCH_tree.joblib'))
+    assert registry.stats()['approx_bytes'] <= forest_size + 1 and registry.evictions == 1
+    print("✓ LRU eviction by count and size")
+
+
+if __name__ == "__main__":
+    random.seed(5)
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,120 @@
+"""
+Benchmark: prediction on a bin's full reading history vs on the lookback
+window recorded when its model was trained
+Reports load + predict time and peak memory as the history grows, and the
+largest difference between the two forecasts; runs against a throwaway
+SQLite database and model directory
+
+Usage: python benchmark_prediction_lookback.py [readings_per_bin ...]
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+os.environ["FORECAST_MODEL_DIR"] = os.path.join(_tmp_dir, 'models')
+
+import numpy as np
+from sqlalchemy import insert
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading, BinType
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.reading_loader import load_reading_frame
+
+BIN_INFO = {
+    'bin_type': 'residential', 'capacity_liters': 240, 'zone': 'North',
+    'ward': 1, 'latitude': 17.385, 'longitude': 78.4867
+}
+MODELS = [('linear', 'recursive'), ('forest', 'recursive'), ('arima', 'recursive'), ('forest', 'direct')]
+TRAIN_READINGS = 2000
+
+
+def populate(db, sizes: list):
+    end = datetime(2026, 1, 1)
+    for i, count in enumerate(sizes):
+        bin_id = f"BIN_{i:03d}"
+        db.execute(insert(Bin), [{
+            "bin_id": bin_id, "latitude": 17.385, "longitude": 78.4867,
+            "capacity_liters": 240, "bin_type": BinType.RESIDENTIAL,
+            "sensor_type": "ultrasonic", "zone": "North", "ward": 1
+        }])
+        fill = 0.0
+        rows = []
+        for h in range(count):
+            fill = fill + random.uniform(0.2, 2.0) if fill < 95 else random.uniform(0, 5)
+            rows.append({
+                "bin_id": bin_id, "timestamp": end - timedelta(hours=count - h),
+                # Occasional sensor glitches exercise outlier removal
+                "fill_level_percent": 250.0 if h % 211 == 0 else round(fill, 1),
+                "weight_kg": round(fill * 0.7, 1),
+                "temperature_c": round(28 + 4 * math.sin(h / 24), 1),
+                "battery_percent": 90.0
+            })
+        for chunk in range(0, len(rows), 50000):
+            db.execute(insert(BinReading), rows[chunk:chunk + 50000])
+    db.commit()
+
+
+def hourly(prediction: dict) -> np.ndarray:
+    return np.array([p['predicted_fill_level'] for p in prediction['hourly_predictions']])
+
+
+def measure(db, bin_id: str, model_type: str, strategy: str, limit, repeats: int = 3):
+    def run():
+        readings = load_reading_frame(db, bin_id, limit=limit)
+        return FillLevelForecaster(bin_id).predict(readings, BIN_INFO, 48, model_type, strategy)
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        prediction = run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return prediction, min(times), peak
+
+
+def run_benchmark(sizes: list):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    populate(db, sizes)
+
+    print(f"{'readings':>9} {'model':<15} {'lookback':>8} {'full ms':>8} {'window ms':>10} "
+          f"{'full MB':>8} {'window MB':>10} {'max |diff|':>11}")
+    for i, count in enumerate(sizes):
+        bin_id = f"BIN_{i:03d}"
+        recent = load_reading_frame(db, bin_id, limit=TRAIN_READINGS)
+        forecaster = FillLevelForecaster(bin_id)
+        forecaster.train_models(recent, BIN_INFO, ['linear', 'forest', 'arima'])
+        forecaster.train_models(recent, BIN_INFO, ['forest'], 'direct')
+
+        for model_type, strategy in MODELS:
+            key = f'{model_type}_direct' if strategy == 'direct' else model_type
+            lookback = forecaster.lookback(key)
+            full, full_s, full_peak = measure(db, bin_id, model_type, strategy, None)
+            window, window_s, window_peak = measure(db, bin_id, model_type, strategy, lookback)
+            diff = np.max(np.abs(hourly(full) - hourly(window)))
+            print(f"{count:>9} {key:<15} {lookback:>8} {full_s * 1000:>8.1f} {window_s * 1000:>10.1f} "
+                  f"{full_peak / 2**20:>8.2f} {window_peak / 2**20:>10.2f} {diff:>11.2e}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    random.seed(21)
+    warnings.filterwarnings('ignore')
+    run_benchmark([int(n) for n in sys.argv[1:]] or [2000, 20000, 100000])
@@ -0,0 +1,119 @@
+"""
+Benchmark: ORM BinReading objects + row-by-row dict building vs the
+column-only reading loader feeding DataPreprocessor.clean_readings
+Reports time and peak memory per 10k readings and checks both paths clean
+to the same DataFrame; runs against a throwaway SQLite database
+
+Usage: python benchmark_reading_loader.py [readings_per_bin ...]
+"""
+
+import sys
+import os
+import math
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+
+import pandas as pd
+from sqlalchemy import insert, text
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading, BinType
+from app.ml.data_preprocessor import DataPreprocessor
+from app.ml.reading_loader import load_reading_frame
+
+
+def populate(db, sizes: list):
+    start = datetime(2025, 1, 1)
+    for i, count in enumerate(sizes):
+        bin_id = f"BIN_{i:03d}"
+        db.execute(insert(Bin), [{
+            "bin_id": bin_id, "latitude": 17.385, "longitude": 78.4867,
+            "capacity_liters": 240, "bin_type": BinType.RESIDENTIAL,
+            "sensor_type": "ultrasonic", "zone": "North", "ward": 1
+        }])
+        fill = 0.0
+        rows = []
+        for h in range(count):
+            fill = fill + random.uniform(0.2, 2.0) if fill < 95 else random.uniform(0, 5)
+            rows.append({
+                "bin_id": bin_id, "timestamp": start + timedelta(minutes=30 * h),
+                "fill_level_percent": round(fill, 1), "weight_kg": round(fill * 0.7, 1),
+                "temperature_c": round(28 + 4 * math.sin(h / 24), 1),
+                # Occasional sensor dropouts exercise the gap filling
+                "battery_percent": None if h % 97 == 0 else 90.0
+            })
+        for chunk in range(0, len(rows), 50000):
+            db.execute(insert(BinReading), rows[chunk:chunk + 50000])
+    db.execute(text("CREATE INDEX ix_bench_readings_bin_time ON bin_readings (bin_id, timestamp)"))
+    db.commit()
+
+
+def orm_path(db, bin_id: str) -> pd.DataFrame:
+    """The previous path: hydrated BinReading objects, then a list of dicts"""
+    readings = db.query(BinReading).filter(
+        BinReading.bin_id == bin_id
+    ).order_by(BinReading.timestamp.asc()).all()
+    data = []
+    for reading in readings:
+        data.append({
+            'timestamp': reading.timestamp,
+            'fill_level_percent': reading.fill_level_percent,
+            'weight_kg': reading.weight_kg,
+            'temperature_c': reading.temperature_c,
+            'battery_percent': reading.battery_percent
+        })
+    return DataPreprocessor().clean_readings(pd.DataFrame(data))
+
+
+def loader_path(db, bin_id: str) -> pd.DataFrame:
+    return DataPreprocessor().clean_readings(load_reading_frame(db, bin_id))
+
+
+def measure(fn, db, bin_id: str, repeats: int = 3):
+    times = []
+    for _ in range(repeats):
+        db.expunge_all()
+        start = time.perf_counter()
+        result = fn(db, bin_id)
+        times.append(time.perf_counter() - start)
+
+    db.expunge_all()
+    tracemalloc.start()
+    fn(db, bin_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(times), peak
+
+
+def run_benchmark(sizes: list):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    populate(db, sizes)
+
+    print(f"{'readings':>9} {'path':<8} {'ms/10k':>8} {'peak MB/10k':>12}")
+    for i, count in enumerate(sizes):
+        bin_id = f"BIN_{i:03d}"
+        expected, orm_s, orm_peak = measure(orm_path, db, bin_id)
+        actual, loader_s, loader_peak = measure(loader_path, db, bin_id)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+        per_10k = 10000 / count
+        print(f"{count:>9} {'ORM':<8} {orm_s * 1000 * per_10k:>8.1f} {orm_peak / 2**20 * per_10k:>12.2f}")
+        print(f"{'':>9} {'loader':<8} {loader_s * 1000 * per_10k:>8.1f} {loader_peak / 2**20 * per_10k:>12.2f}"
+              f"   ({orm_s / loader_s:.1f}x faster, {orm_peak / loader_peak:.1f}x less memory)")
+
+    print("✓ both paths clean to the same DataFrame")
+    db.close()
+
+
+if __name__ == "__main__":
+    random.seed(19)
+    run_benchmark([int(n) for n in sys.argv[1:]] or [2000, 10000, 50000])
@@ -0,0 +1,57 @@
+"""
+Benchmark: nearest-neighbour tour vs 2-opt / Or-opt local search
+Synthetic bins scattered around the city centre, depot at the centre
+
+Usage: python benchmark_route_improvement.py [time_limit_seconds]
+"""
+
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.ml.route_optimizer import improve_tour, nearest_neighbor_tour, tour_length
+from app.utils.distance import distance_matrix
+
+CENTER_LAT, CENTER_LON = 17.3850, 78.4867
+
+
+def make_instance(count: int, spread_deg: float = 0.15) -> np.ndarray:
+    lats = [CENTER_LAT] + [CENTER_LAT + random.uniform(-spread_deg, spread_deg) for _ in range(count)]
+    lons = [CENTER_LON] + [CENTER_LON + random.uniform(-spread_deg, spread_deg) for _ in range(count)]
+    return distance_matrix(np.array(lats), np.array(lons))
+
+
+def check_tour(tour: np.ndarray, count: int):
+    assert tour[0] == 0 and tour[-1] == 0
+    assert sorted(tour[1:-1].tolist()) == list(range(1, count + 1))
+
+
+def run_benchmark(time_limit: float = 5.0):
+    print(f"{'bins':>6}{'greedy km':>12}{'improved km':>14}{'saving':>9}{'search s':>10}")
+
+    for count in [50, 200, 1000]:
+        matrix = make_instance(count)
+
+        greedy = nearest_neighbor_tour(matrix)
+        greedy_km = tour_length(matrix, greedy)
+
+        start = time.perf_counter()
+        improved = improve_tour(matrix, greedy, time_limit_seconds=time_limit)
+        elapsed = time.perf_counter() - start
+
+        check_tour(improved, count)
+        improved_km = tour_length(matrix, improved)
+        assert improved_km <= greedy_km + 1e-9
+
+        saving = (greedy_km - improved_km) / greedy_km * 100
+        print(f"{count:>6}{greedy_km:>12.1f}{improved_km:>14.1f}{saving:>8.1f}%{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
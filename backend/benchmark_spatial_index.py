@@ -0,0 +1,90 @@
+"""
+Benchmark: grid spatial index vs full-table geodesic scan (the previous
+per-bin geopy loop in the routes)
+Covers the nearby-bins radius query and nearest-bin complaint linking
+
+Usage: python benchmark_spatial_index.py [queries]
+"""
+
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geopy.distance import geodesic
+
+from app.utils.spatial_index import BinSpatialIndex
+
+CENTER_LAT, CENTER_LON = 17.3850, 78.4867
+
+
+def make_bins(count: int, spread_deg: float = 0.3) -> list:
+    return [
+        (f"BIN_{i:06d}",
+         CENTER_LAT + random.uniform(-spread_deg, spread_deg),
+         CENTER_LON + random.uniform(-spread_deg, spread_deg))
+        for i in range(count)
+    ]
+
+
+def scan_radius(bins: list, lat: float, lon: float, radius_km: float) -> list:
+    hits = []
+    for bin_id, b_lat, b_lon in bins:
+        distance = geodesic((lat, lon), (b_lat, b_lon)).km
+        if distance <= radius_km:
+            hits.append((bin_id, distance))
+    hits.sort(key=lambda x: x[1])
+    return hits
+
+
+def scan_nearest(bins: list, lat: float, lon: float) -> tuple:
+    return min(
+        ((bin_id, geodesic((lat, lon), (b_lat, b_lon)).km) for bin_id, b_lat, b_lon in bins),
+        key=lambda x: x[1]
+    )
+
+
+def timed(fn, queries: list) -> tuple:
+    start = time.perf_counter()
+    results = [fn(*q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def run_benchmark(query_count: int = 20):
+    print(f"{'bins':>8}{'build ms':>10}{'scan radius ms':>16}{'grid radius ms':>16}"
+          f"{'scan nearest ms':>17}{'grid nearest ms':>17}")
+
+    for count in [1000, 10000, 100000]:
+        bins = make_bins(count)
+
+        start = time.perf_counter()
+        index = BinSpatialIndex()
+        index.build(bins)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        points = [
+            (CENTER_LAT + random.uniform(-0.2, 0.2), CENTER_LON + random.uniform(-0.2, 0.2))
+            for _ in range(query_count)
+        ]
+        # The full scan is slow at 100k; a handful of queries is enough to time it
+        scan_points = points[:max(2, query_count // (count // 1000))]
+
+        scan_r, expected = timed(lambda lat, lon: scan_radius(bins, lat, lon, 2.0), scan_points)
+        grid_r, actual = timed(lambda lat, lon: index.query_radius(lat, lon, 2.0), points)
+        # The index uses haversine; allow bins within 0.5% of the radius edge to differ
+        for scan_hits, grid_hits in zip(expected, actual):
+            scan_core = {b for b, d in scan_hits if d < 2.0 * 0.995}
+            assert scan_core <= {b for b, _ in grid_hits}
+
+        scan_n, expected = timed(lambda lat, lon: scan_nearest(bins, lat, lon), scan_points)
+        grid_n, actual = timed(lambda lat, lon: index.nearest(lat, lon, k=1)[0], points)
+        for scan_hit, grid_hit in zip(expected, actual):
+            assert abs(scan_hit[1] - grid_hit[1]) <= scan_hit[1] * 0.005 + 1e-9
+
+        print(f"{count:>8}{build_ms:>10.1f}{scan_r:>16.2f}{grid_r:>16.2f}{scan_n:>17.2f}{grid_n:>17.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
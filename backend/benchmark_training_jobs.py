@@ -0,0 +1,75 @@
+"""
+Benchmark: sequential per-bin training (the old /train loop) vs a
+background training job sharded across the process pool
+Runs against a throwaway database seeded by seed_database.py
+
+Usage: python benchmark_training_jobs.py [workers]
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Pool workers re-import this module; they must see the parent's database
+if "BENCHMARK_TMP_DIR" not in os.environ:
+    os.environ["BENCHMARK_TMP_DIR"] = tempfile.mkdtemp()
+_tmp_dir = os.environ["BENCHMARK_TMP_DIR"]
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'benchmark.db')}"
+os.environ["FORECAST_MODEL_DIR"] = os.path.join(_tmp_dir, 'models')
+if len(sys.argv) > 1:
+    os.environ["TRAINING_WORKERS"] = sys.argv[1]
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading, TrainingJobStatus
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.training_jobs import TRAINING_WORKERS, get_job, submit_training_job
+from app.routes.forecasting import get_bin_info
+import seed_database
+
+MODEL_TYPES = ['linear', 'tree', 'forest']
+
+
+def run_benchmark():
+    Base.metadata.create_all(bind=engine)
+    random.seed(16)
+    seed_database.seed_database()
+
+    db = SessionLocal()
+    bins = db.query(Bin).order_by(Bin.id).all()
+
+    start = time.perf_counter()
+    for bin in bins:
+        readings = db.query(BinReading).filter(
+            BinReading.bin_id == bin.bin_id
+        ).order_by(BinReading.timestamp.asc()).all()
+        FillLevelForecaster(bin.bin_id).train_models(readings, get_bin_info(bin), MODEL_TYPES)
+    sequential_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    job = submit_training_job(db, {bin.bin_id: get_bin_info(bin) for bin in bins}, MODEL_TYPES)
+    submit_s = time.perf_counter() - start
+    while True:
+        db.expire_all()
+        job = get_job(db, job.job_id)
+        if job.status in (TrainingJobStatus.COMPLETED, TrainingJobStatus.FAILED):
+            break
+        time.sleep(0.2)
+    job_s = time.perf_counter() - start
+
+    assert job.status == TrainingJobStatus.COMPLETED, job.error
+    assert job.completed_bins == len(bins), f"{job.failed_bins} bins failed"
+
+    print(f"\n{len(bins)} bins, models {MODEL_TYPES}, {os.cpu_count()} cores, {TRAINING_WORKERS} workers")
+    print(f"sequential loop:        {sequential_s:>7.1f} s")
+    print(f"training job:           {job_s:>7.1f} s  ({sequential_s / job_s:.1f}x, "
+          f"job id returned in {submit_s * 1000:.0f} ms)")
+    db.close()
+
+
+if __name__ == "__main__":
+    # Required for spawn-started pool workers, which re-import this module
+    run_benchmark()
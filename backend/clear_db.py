@@ -10,6 +10,8 @@ def clear_database():
     db = SessionLocal()
     try:
         # Delete all records from all tables in correct order
+        db.execute(text("DELETE FROM bin_latest_state"))
+        db.execute(text("DELETE FROM bin_regression_state"))
         db.execute(text("DELETE FROM bin_readings"))
         db.execute(text("DELETE FROM collections"))
         db.execute(text("DELETE FROM gps_logs"))
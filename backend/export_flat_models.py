@@ -0,0 +1,62 @@
+"""
+Convert saved tree and forest models to the flat, memory-mappable format
+Per-bin models saved before flat_forest existed are sklearn pickles; they
+still load and serve, but are not shared across processes. Each one is
+flattened, checked to predict identically on random inputs, and replaced
+in place. The pooled global model stays a pickle.
+
+Usage: python export_flat_models.py [model_dir]
+"""
+
+import sys
+import os
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from app.ml.fill_level_forecaster import MODEL_DIR
+from app.ml.flat_forest import flatten_model
+from app.ml.global_forecaster import GLOBAL_MODEL_ID
+from app.ml.model_registry import dump_artifact
+
+TREE_SUFFIXES = ('_tree.joblib', '_forest.joblib', '_tree_direct.joblib', '_forest_direct.joblib')
+CHECK_ROWS = 256
+
+
+def export_models(model_dir: str):
+    converted = skipped = 0
+    before = after = 0
+    for name in sorted(os.listdir(model_dir)):
+        if not name.endswith(TREE_SUFFIXES) or name.startswith(f'{GLOBAL_MODEL_ID}_'):
+            continue
+        path = os.path.join(model_dir, name)
+        model = joblib.load(path)
+        if not isinstance(model, (DecisionTreeRegressor, RandomForestRegressor)):
+            skipped += 1
+            continue
+
+        flat = flatten_model(model)
+        X = np.random.default_rng(0).uniform(-10, 110, (CHECK_ROWS, model.n_features_in_))
+        if not np.array_equal(model.predict(X), flat.predict(X)):
+            print(f"✗ {name}: flattened model predicts differently, left unchanged")
+            continue
+
+        size = os.path.getsize(path)
+        dump_artifact(flat, path)
+        before += size
+        after += os.path.getsize(path)
+        converted += 1
+
+    print(f"✓ converted {converted} models ({skipped} already flat) in {model_dir}: "
+          f"{before / 2**20:.1f} MB -> {after / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    # Check inputs are plain arrays; models fitted on DataFrames warn about names
+    warnings.filterwarnings('ignore')
+    export_models(sys.argv[1] if len(sys.argv) > 1 else MODEL_DIR)
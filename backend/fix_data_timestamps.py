@@ -1,5 +1,7 @@
 from app.utils.database import SessionLocal
 from app.models.database_models import BinReading
+from app.utils.latest_state import backfill_latest_state
+from app.utils.regression_state import backfill_regression_state
 from datetime import datetime, timedelta
 import random
 
@@ -25,6 +27,8 @@ def fix_data():
             reading.timestamp = new_ts
             
         db.commit()
+        backfill_latest_state(db)
+        backfill_regression_state(db)
         print("Success! Data updated.")
         
     finally:
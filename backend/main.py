@@ -1,10 +1,30 @@
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import bins, vehicles, collections, complaints, analytics, predictions, forecasting, auth, webhooks
+from sqlalchemy import inspect, text
 from app.utils.database import engine, Base
+from app.models.database_models import BinReading
+from app.ml.forecast_store import forecast_scheduler
+from app.ml.training_jobs import job_heartbeat
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+# create_all skips indexes added to tables that already exist
+for index in BinReading.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+# ...and columns
+ADDED_COLUMNS = {
+    'training_jobs': [('summary', 'JSON'), ('owner', 'VARCHAR'), ('heartbeat_at', 'TIMESTAMP')],
+    'backtest_jobs': [('owner', 'VARCHAR'), ('heartbeat_at', 'TIMESTAMP')]
+}
+for table, columns in ADDED_COLUMNS.items():
+    existing = {column['name'] for column in inspect(engine).get_columns(table)}
+    with engine.begin() as connection:
+        for name, column_type in columns:
+            if name not in existing:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
 
 app = FastAPI(
     title="Smart Waste Management API",
@@ -32,6 +52,26 @@ app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"]
 app.include_router(predictions.router, prefix="/api/predictions", tags=["Predictions"])
 app.include_router(forecasting.router, prefix="/api/forecasting", tags=["Forecasting"])
 
+@app.on_event("startup")
+def start_job_heartbeat():
+    # Keeps this process's training and backtest jobs alive, and fails jobs
+    # whose process stopped (heartbeat stale), whichever instance ran them
+    job_heartbeat.start()
+
+@app.on_event("startup")
+def start_forecast_scheduler():
+    # Precomputed forecasts; set FORECAST_SCHEDULER=0 on all but one instance
+    if os.getenv("FORECAST_SCHEDULER", "1") == "1":
+        forecast_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_forecast_scheduler():
+    forecast_scheduler.stop()
+
+@app.on_event("shutdown")
+def stop_job_heartbeat():
+    job_heartbeat.stop()
+
 @app.get("/")
 def read_root():
     return {
@@ -0,0 +1,80 @@
+"""
+Walk-forward backtest of the per-bin forecasters from the command line
+Runs the same engine as POST /api/forecasting/backtest on the configured
+database (DATABASE_URL), with bins sharded across worker processes, and
+prints per-horizon MAE / RMSE pooled over bins. Saved models are not touched.
+
+Usage:
+    python run_backtest.py [--bins BIN_001 BIN_002] [--models linear forest]
+                           [--strategy recursive|direct] [--horizons 1 6 24]
+                           [--folds 8] [--workers 4] [--resample | --no-resample]
+                           [--json results.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml import training_jobs
+from app.ml.backtesting import BACKTEST_FOLDS, BACKTEST_MODEL_TYPES, format_table, run_backtest, summarize
+from app.ml.fill_level_forecaster import DIRECT_HORIZONS
+from app.models.database_models import Bin
+from app.routes.forecasting import get_bin_info
+from app.utils.database import SessionLocal
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the fill-level forecasters")
+    parser.add_argument('--bins', nargs='+', help="Bin IDs (default: all bins)")
+    parser.add_argument('--models', nargs='+', default=['linear', 'tree', 'forest'], choices=BACKTEST_MODEL_TYPES)
+    parser.add_argument('--strategy', default='recursive', choices=['recursive', 'direct'])
+    parser.add_argument('--horizons', nargs='+', type=int, default=DIRECT_HORIZONS, help="Hours ahead to score")
+    parser.add_argument('--folds', type=int, default=BACKTEST_FOLDS, help="Forecast origins per bin")
+    parser.add_argument('--workers', type=int, default=training_jobs.TRAINING_WORKERS)
+    parser.add_argument('--resample', action=argparse.BooleanOptionalAction, default=None,
+                        help="Resample onto the hourly grid (default: each bin's saved setting)")
+    parser.add_argument('--json', help="Also write per-bin results and the summary to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    training_jobs.TRAINING_WORKERS = args.workers
+
+    db = SessionLocal()
+    try:
+        query = db.query(Bin)
+        if args.bins:
+            query = query.filter(Bin.bin_id.in_(args.bins))
+        bin_infos = {bin.bin_id: get_bin_info(bin) for bin in query.all()}
+    finally:
+        db.close()
+    if not bin_infos:
+        sys.exit("No bins found")
+
+    start = time.perf_counter()
+    results = {}
+    for shard in run_backtest(bin_infos, args.models, args.strategy, args.horizons, args.folds, args.resample):
+        results.update(shard)
+        print(f"\r{len(results)}/{len(bin_infos)} bins", end='', flush=True)
+    print(f" in {time.perf_counter() - start:.1f} s")
+
+    failed = {bin_id: r['error'] for bin_id, r in results.items() if 'error' in r}
+    summary = summarize(r for r in results.values() if 'error' not in r)
+    if summary['models']:
+        print(format_table(summary))
+    print(f"{len(results) - len(failed)} bins backtested, {len(failed)} skipped")
+    for bin_id, error in list(failed.items())[:10]:
+        print(f"  {bin_id}: {error}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.utils.database import SessionLocal
 from app.models.database_models import Bin, BinReading, Vehicle, Collection, Complaint
 from app.models.database_models import BinType, BinStatus, ComplaintType, ComplaintStatus
+from app.utils.latest_state import backfill_latest_state
+from app.utils.regression_state import backfill_regression_state
 from datetime import datetime, timedelta
 import random
 
@@ -105,6 +107,11 @@ def seed_database():
     db.commit()
     print(f"   ✓ Created {readings_count} bin readings (30 days of data)")
     
+    state_count = backfill_latest_state(db)
+    print(f"   ✓ Built latest state for {state_count} bins")
+    state_count = backfill_regression_state(db)
+    print(f"   ✓ Built regression state for {state_count} bins")
+    
     # Create vehicles
     print("\n3. Creating vehicles...")
     vehicles_data = []
@@ -0,0 +1,100 @@
+"""
+Check that persisted ARIMA models forecast exactly as the fitted ones
+Trains into a throwaway model directory, never the real one
+
+1. The compact state (order + parameters) reproduces the statsmodels
+   results object's forecasts over the same series
+2. A model saved by train_models and reloaded from disk through the model
+   registry forecasts identically to the in-memory model that trained it
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["FORECAST_MODEL_DIR"] = _tmp_dir
+
+import joblib
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+
+from app.ml.fill_level_forecaster import (
+    ARIMA_ORDER, FillLevelForecaster, arima_forecast, arima_state
+)
+from app.ml.forecast_engine import CONTEXT_ROWS
+from app.ml.model_registry import model_registry
+
+BIN_ID = 'BIN_ARIMA'
+BIN_INFO = {
+    'bin_type': 'residential', 'capacity_liters': 240, 'zone': 'North',
+    'ward': 1, 'latitude': 17.385, 'longitude': 78.4867
+}
+
+
+def make_readings(count: int = 400) -> list:
+    start = datetime(2026, 1, 1)
+    fill = 10.0
+    readings = []
+    for h in range(count):
+        fill = fill + random.uniform(0.5, 3) if fill < 95 else random.uniform(0, 10)
+        readings.append(SimpleNamespace(
+            bin_id=BIN_ID, timestamp=start + timedelta(hours=h),
+            fill_level_percent=fill, weight_kg=fill * 0.7,
+            temperature_c=random.uniform(24, 32), battery_percent=90.0
+        ))
+    return readings
+
+
+def hourly(prediction: dict) -> np.ndarray:
+    return np.array([p['predicted_fill_level'] for p in prediction['hourly_predictions']])
+
+
+def verify_compact_state(series: np.ndarray):
+    series = series[-CONTEXT_ROWS:]
+    fitted = ARIMA(series, order=ARIMA_ORDER).fit()
+    expected = np.clip(fitted.forecast(steps=48), 0, 100)
+    actual = arima_forecast(arima_state(fitted), series, 48)
+    diff = np.max(np.abs(expected - actual))
+    assert diff < 1e-8, f"compact state forecasts differ by {diff}"
+
+    full_path = os.path.join(_tmp_dir, 'full_results.joblib')
+    joblib.dump(fitted, full_path)
+    print(f"✓ compact state matches the results object (max |diff| {diff:.1e}); "
+          f"results object {os.path.getsize(full_path):,} bytes")
+
+
+def verify_round_trip(readings: list):
+    trained = FillLevelForecaster(BIN_ID)
+    metrics = trained.train_models(readings, BIN_INFO, ['arima'])
+    assert 'error' not in metrics['arima'], metrics['arima']
+    in_memory = trained.predict(readings, BIN_INFO, 48, 'arima')
+
+    model_registry.invalidate()
+    reloaded = FillLevelForecaster(BIN_ID)
+    start = time.perf_counter()
+    from_disk = reloaded.predict(readings, BIN_INFO, 48, 'arima')
+    elapsed = time.perf_counter() - start
+
+    assert 'error' not in from_disk, from_disk
+    assert isinstance(reloaded.models['arima'], dict), "reloaded model is not the compact state"
+    assert np.array_equal(hourly(in_memory), hourly(from_disk)), "reloaded ARIMA forecasts differ"
+
+    saved = os.path.getsize(os.path.join(_tmp_dir, f'{BIN_ID}_arima.joblib'))
+    print(f"✓ saved and reloaded ARIMA forecasts identically; {saved:,} bytes on disk, "
+          f"predict from disk in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    random.seed(17)
+    warnings.filterwarnings('ignore')
+    readings = make_readings()
+    verify_compact_state(np.array([r.fill_level_percent for r in readings]))
+    verify_round_trip(readings)
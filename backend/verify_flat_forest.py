@@ -0,0 +1,118 @@
+"""
+Check that flat tree models predict exactly as the sklearn estimators
+Trains into a throwaway model directory, never the real one
+
+1. FlatForest.predict matches the estimator's predict for a tree, a forest
+   and multi-output (direct strategy) trees and forests, including NaN inputs
+2. Models saved by train_models, reloaded memory-mapped through the model
+   registry, forecast identically to the in-memory estimators that trained them
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["FORECAST_MODEL_DIR"] = _tmp_dir
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from app.ml import fill_level_forecaster
+from app.ml.fill_level_forecaster import FillLevelForecaster
+from app.ml.flat_forest import FlatForest
+from app.ml.model_registry import model_registry
+
+BIN_ID = 'BIN_FLAT'
+BIN_INFO = {
+    'bin_type': 'residential', 'capacity_liters': 240, 'zone': 'North',
+    'ward': 1, 'latitude': 17.385, 'longitude': 78.4867
+}
+
+
+def make_readings(count: int = 400) -> list:
+    start = datetime(2026, 1, 1)
+    fill = 10.0
+    readings = []
+    for h in range(count):
+        fill = fill + random.uniform(0.5, 3) if fill < 95 else random.uniform(0, 10)
+        readings.append(SimpleNamespace(
+            bin_id=BIN_ID, timestamp=start + timedelta(hours=h),
+            fill_level_percent=fill, weight_kg=fill * 0.7,
+            temperature_c=random.uniform(24, 32), battery_percent=90.0
+        ))
+    return readings
+
+
+def hourly(prediction: dict) -> np.ndarray:
+    return np.array([p['predicted_fill_level'] for p in prediction['hourly_predictions']])
+
+
+def verify_estimators():
+    rng = np.random.default_rng(23)
+    X = rng.uniform(0, 100, (2000, 12))
+    y = X[:, :3] @ rng.uniform(-1, 1, (3, 4)) + rng.normal(0, 1, (2000, 4))
+    X_test = rng.uniform(-20, 120, (5000, 12))
+    X_test[::97, 2] = np.nan
+
+    estimators = {
+        'tree': DecisionTreeRegressor(max_depth=10, random_state=0).fit(X, y[:, 0]),
+        'forest': RandomForestRegressor(n_estimators=100, max_depth=15, random_state=0).fit(X, y[:, 0]),
+        'tree (4 outputs)': DecisionTreeRegressor(max_depth=10, random_state=0).fit(X, y),
+        'forest (4 outputs)': RandomForestRegressor(n_estimators=50, max_depth=15, random_state=0).fit(X, y),
+    }
+    for name, model in estimators.items():
+        flat = FlatForest.from_estimator(model)
+        expected, actual = model.predict(X_test), flat.predict(X_test)
+        assert expected.shape == actual.shape, f"{name}: shape {actual.shape} != {expected.shape}"
+        assert np.array_equal(expected, actual), \
+            f"{name}: predictions differ by {np.nanmax(np.abs(expected - actual))}"
+        assert np.array_equal(model.feature_importances_, flat.feature_importances_)
+        print(f"✓ {name}: {flat.n_trees} trees, {len(flat.feature):,} nodes, predictions identical")
+
+
+def verify_round_trip(readings: list):
+    trained = FillLevelForecaster(BIN_ID)
+    # Keep the fitted estimators in memory to compare the saved ones against
+    fill_level_forecaster.FLAT_TREE_MODELS = False
+    metrics = trained.train_models(readings, BIN_INFO, ['tree', 'forest'])
+    trained.train_models(readings, BIN_INFO, ['forest'], 'direct')
+    assert all('error' not in m for m in metrics.values()), metrics
+    cases = [('tree', 'recursive'), ('forest', 'recursive'), ('forest', 'direct')]
+    in_memory = {case: trained.predict(readings, BIN_INFO, 48, *case) for case in cases}
+
+    fill_level_forecaster.FLAT_TREE_MODELS = True
+    trained.train_models(readings, BIN_INFO, ['tree', 'forest'])
+    trained.train_models(readings, BIN_INFO, ['forest'], 'direct')
+
+    model_registry.invalidate()
+    reloaded = FillLevelForecaster(BIN_ID)
+    for model_type, strategy in cases:
+        start = time.perf_counter()
+        from_disk = reloaded.predict(readings, BIN_INFO, 48, model_type, strategy)
+        elapsed = time.perf_counter() - start
+
+        key = f'{model_type}_direct' if strategy == 'direct' else model_type
+        model = reloaded.models[key]
+        assert 'error' not in from_disk, from_disk
+        assert isinstance(model, FlatForest), f"{key} reloaded as {type(model).__name__}"
+        assert isinstance(model.value, np.memmap), f"{key} was not memory-mapped"
+        assert np.array_equal(hourly(in_memory[(model_type, strategy)]), hourly(from_disk)), \
+            f"reloaded {key} forecasts differ"
+        print(f"✓ {key}: saved flat model reloaded memory-mapped and forecast identically "
+              f"in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    random.seed(23)
+    warnings.filterwarnings('ignore')
+    verify_estimators()
+    verify_round_trip(make_readings())
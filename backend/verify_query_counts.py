@@ -0,0 +1,94 @@
+"""
+Regression check: listing endpoints must issue a constant number of SQL
+statements regardless of how many bins/vehicles are on the page.
+Runs against a throwaway SQLite database, never the real one
+"""
+
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'query_counts.db')}"
+
+from sqlalchemy import event
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, Vehicle, GPSLog, BinType
+from app.routes.bins import get_all_bins, get_nearby_bins
+from app.routes.vehicles import get_vehicles
+from app.utils.reading_ingest import ReadingIngestor
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def measure(self, fn, *args, **kwargs):
+        self.count = 0
+        fn(*args, **kwargs)
+        return self.count
+
+
+def seed(db, count: int):
+    db.query(GPSLog).delete()
+    db.query(Vehicle).delete()
+    for i in range(count):
+        db.add(Bin(
+            bin_id=f"QC_{i:04d}", latitude=17.385 + random.uniform(-0.01, 0.01),
+            longitude=78.4867 + random.uniform(-0.01, 0.01), capacity_liters=240,
+            bin_type=BinType.RESIDENTIAL, sensor_type="ultrasonic", zone="North", ward=1
+        ))
+        db.add(Vehicle(vehicle_id=f"QV_{i:04d}", vehicle_type="Truck", capacity_kg=5000))
+    db.commit()
+
+    ingestor = ReadingIngestor(db)
+    for i in range(count):
+        for _ in range(3):
+            ingestor.add({"bin_id": f"QC_{i:04d}", "fill_level_percent": random.uniform(0, 80)})
+        for minutes in range(3):
+            db.add(GPSLog(
+                vehicle_id=f"QV_{i:04d}", timestamp=datetime.utcnow() - timedelta(minutes=minutes),
+                latitude=17.385, longitude=78.4867, speed_kmh=20, status="moving"
+            ))
+    ingestor.summary()
+    db.commit()
+
+
+def verify():
+    Base.metadata.create_all(bind=engine)
+    counter = StatementCounter()
+    results = {}
+
+    for size in [10, 100]:
+        db = SessionLocal()
+        db.query(Bin).delete()
+        seed(db, size)
+        results[size] = {
+            "get_all_bins": counter.measure(get_all_bins, limit=size, db=db, user=None),
+            "get_nearby_bins": counter.measure(get_nearby_bins, 17.385, 78.4867, 50.0, db=db),
+            "get_vehicles": counter.measure(get_vehicles, db=db),
+        }
+        db.close()
+
+    failed = False
+    for endpoint in results[10]:
+        small, large = results[10][endpoint], results[100][endpoint]
+        ok = small == large
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {endpoint}: {small} statements @10 rows, {large} @100 rows")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,131 @@
+"""
+Check the incremental regression state against the batch computations
+Runs against a throwaway SQLite database, never the real one
+
+1. State built reading by reading through the ingest path must match a
+   backfill replay of bin_readings
+2. A bin whose state is missing (readings written before the table was
+   seeded) gets its state rebuilt from history on its next reading
+3. With decay disabled, the running sums must reproduce predict_fill_level
+   fitted over all of a bin's readings, even when readings arrive late
+"""
+
+import sys
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'verify.db')}"
+
+from app.utils.database import SessionLocal, engine, Base
+from app.models.database_models import Bin, BinReading, BinRegressionState, BinType
+from app.ml.predictor import predict_fill_level, predict_from_regression_state
+from app.utils import regression_state
+from app.utils.regression_state import backfill_regression_state, update_regression_state
+
+BIN_COUNT = 20
+READINGS_PER_BIN = 80
+
+
+def populate(db) -> list:
+    start = datetime(2026, 3, 1)
+    readings = []
+    for i in range(BIN_COUNT):
+        bin_id = f"BIN_{i:03d}"
+        db.add(Bin(
+            bin_id=bin_id, latitude=17.385, longitude=78.4867, capacity_liters=240,
+            bin_type=BinType.RESIDENTIAL, sensor_type="ultrasonic", zone="North", ward=1
+        ))
+        fill, rate = random.uniform(0, 40), random.uniform(-0.5, 2.0)
+        for h in range(READINGS_PER_BIN):
+            fill = max(0.0, min(100.0, fill + rate + random.gauss(0, 1.5)))
+            readings.append({
+                "bin_id": bin_id,
+                "timestamp": start + timedelta(hours=h, minutes=random.randint(0, 50)),
+                "fill_level_percent": round(fill, 1)
+            })
+    db.commit()
+    return readings
+
+
+def close(a, b, tol=0.011) -> bool:
+    if a is None or b is None or isinstance(a, str):
+        return a == b
+    if isinstance(a, datetime):
+        return abs((a - b).total_seconds()) < 60
+    return abs(a - b) <= tol
+
+
+def verify():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    readings = populate(db)
+
+    # Ingest one reading at a time, as the API does
+    for reading in readings:
+        db.add(BinReading(**reading))
+        update_regression_state(db, [reading])
+        db.commit()
+    incremental = {
+        s.bin_id: (s.reading_count, s.anchor_timestamp, [getattr(s, c) for c in regression_state.SUM_COLUMNS])
+        for s in db.query(BinRegressionState)
+    }
+
+    backfill_regression_state(db)
+    for state in db.query(BinRegressionState):
+        count, anchor, sums = incremental[state.bin_id]
+        assert count == state.reading_count and anchor == state.anchor_timestamp
+        replayed = [getattr(state, c) for c in regression_state.SUM_COLUMNS]
+        assert all(abs(a - b) <= 1e-9 * max(1.0, abs(b)) for a, b in zip(sums, replayed))
+    print(f"✓ Incremental state matches backfill for {len(incremental)} bins")
+
+    # Drop half the states, then ingest one more reading for every bin
+    dropped = [f"BIN_{i:03d}" for i in range(0, BIN_COUNT, 2)]
+    db.query(BinRegressionState).filter(BinRegressionState.bin_id.in_(dropped)).delete()
+    db.commit()
+    extra = [
+        {"bin_id": f"BIN_{i:03d}", "timestamp": datetime(2026, 3, 5), "fill_level_percent": 50.0}
+        for i in range(BIN_COUNT)
+    ]
+    for reading in extra:
+        db.add(BinReading(**reading))
+    update_regression_state(db, extra)
+    db.commit()
+    seeded = {s.bin_id: (s.reading_count, [getattr(s, c) for c in regression_state.SUM_COLUMNS])
+              for s in db.query(BinRegressionState)}
+    backfill_regression_state(db)
+    for state in db.query(BinRegressionState):
+        count, sums = seeded[state.bin_id]
+        assert count == state.reading_count == READINGS_PER_BIN + 1, (state.bin_id, count)
+        replayed = [getattr(state, c) for c in regression_state.SUM_COLUMNS]
+        assert all(abs(a - b) <= 1e-9 * max(1.0, abs(b)) for a, b in zip(sums, replayed))
+    print(f"✓ Missing states for {len(dropped)} bins were seeded from their history")
+
+    # Without decay the sums are plain least squares over every reading, in
+    # any arrival order; replay shuffled to exercise late readings
+    regression_state.DECAY = 1.0
+    db.query(BinRegressionState).delete()
+    db.query(BinReading).delete()
+    random.shuffle(readings)
+    for reading in readings:
+        db.add(BinReading(**reading))
+        update_regression_state(db, [reading])
+    db.commit()
+    for state in db.query(BinRegressionState):
+        readings = db.query(BinReading).filter(BinReading.bin_id == state.bin_id).all()
+        expected = predict_fill_level(readings, hours_ahead=24)
+        actual = predict_from_regression_state(state, hours_ahead=24)
+        for key in expected:
+            assert close(expected[key], actual[key]), (state.bin_id, key, expected[key], actual[key])
+    print(f"✓ Undecayed state reproduces predict_fill_level for {BIN_COUNT} bins")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    random.seed(11)
+    verify()
@@ -22,6 +22,17 @@ const ModelComparison = ({ comparisonData, height = 300 }) => {
 
     const { all_metrics, recommended_model } = comparisonData;
 
+    // A bin whose models have not been trained yet
+    if (Object.keys(all_metrics).length === 0) {
+        return (
+            <div className="flex items-center justify-center h-[256px] bg-muted/5 rounded-xl border border-dashed border-border">
+                <p className="text-muted-foreground font-medium">
+                    {comparisonData.message || 'No trained models to compare yet'}
+                </p>
+            </div>
+        );
+    }
+
     const chartData = Object.entries(all_metrics)
         .filter(([_, metrics]) => !metrics.error)
         .map(([model, metrics]) => ({
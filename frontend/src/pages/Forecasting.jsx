@@ -8,7 +8,9 @@ import {
     getHistoricalVsPredicted,
     compareModels,
     getFeatureImportance,
-    trainModels
+    trainModels,
+    getTrainingJobResults,
+    waitForTrainingJob
 } from '../services/forecastingService';
 import { binsService } from '../services/binsService';
 
@@ -110,7 +112,18 @@ const Forecasting = () => {
         setTraining(true);
         setError(null);
         try {
-            await trainModels([selectedBin], ['linear', 'tree', 'forest', 'arima']);
+            // Training runs as a background job; keep the training state until it finishes
+            const job = await trainModels([selectedBin], ['linear', 'tree', 'forest', 'arima']);
+            const finished = await waitForTrainingJob(job.job_id);
+            if (finished.status === 'failed') {
+                setError(finished.error || 'Failed to train models');
+                return;
+            }
+            if (finished.failed_bins > 0) {
+                const { results } = await getTrainingJobResults(job.job_id, true);
+                setError(results[selectedBin]?.error || 'Failed to train models');
+                return;
+            }
             // Refresh everything after training
             loadPrediction();
             if (activeTab === 'comparison') loadModelComparison();
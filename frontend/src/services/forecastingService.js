@@ -6,9 +6,11 @@
 import api from './api';
 
 const FORECASTING_BASE = '/api/forecasting';
+const JOB_POLL_INTERVAL_MS = 2000;
 
 /**
- * Train ML models for specified bins
+ * Start a background job training ML models for specified bins
+ * Resolves with the queued job; use waitForTrainingJob to follow it
  */
 export const trainModels = async (binIds = null, modelTypes = ['linear', 'tree', 'forest']) => {
     try {
@@ -28,6 +30,48 @@ export const trainModels = async (binIds = null, modelTypes = ['linear', 'tree',
     }
 };
 
+/**
+ * Get a training job's status and progress
+ */
+export const getTrainingJob = async (jobId) => {
+    try {
+        const response = await api.get(`${FORECASTING_BASE}/train/jobs/${jobId}`);
+        return response.data;
+    } catch (error) {
+        console.error('Error getting training job:', error);
+        throw error;
+    }
+};
+
+/**
+ * Get a training job's per-bin results (metrics, or error)
+ */
+export const getTrainingJobResults = async (jobId, errorsOnly = false) => {
+    try {
+        const response = await api.get(`${FORECASTING_BASE}/train/jobs/${jobId}/results`, {
+            params: { errors_only: errorsOnly }
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Error getting training job results:', error);
+        throw error;
+    }
+};
+
+/**
+ * Poll a training job until it completes or fails
+ * Resolves with the job's final status
+ */
+export const waitForTrainingJob = async (jobId, intervalMs = JOB_POLL_INTERVAL_MS) => {
+    for (;;) {
+        const job = await getTrainingJob(jobId);
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+};
+
 /**
  * Get fill-level predictions for a specific bin
  */
@@ -112,6 +156,9 @@ export const getHistoricalVsPredicted = async (binId, daysBack = 7, hoursAhead =
 
 export default {
     trainModels,
+    getTrainingJob,
+    getTrainingJobResults,
+    waitForTrainingJob,
     getPrediction,
     compareModels,
     getFeatureImportance,